@@ -1,14 +1,53 @@
 from spotipy import Spotify
 from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
 from ytmusicapi import YTMusic
+from ytmusicapi.constants import YTM_BASE_API
 from fuzzywuzzy import fuzz
 import time
 import os
 import json
+import gzip
+import zlib
+import atexit
 import re
+import math
+import unicodedata
+import sys
+import argparse
+import asyncio
+import threading
+import hashlib
+import sqlite3
+import urllib.request
+import urllib.error
+import requests
+import tempfile
+import cProfile
+import pstats
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from functools import lru_cache, wraps
 from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import fcntl
+except ImportError:  # Windows: sem coordenação entre processos
+    fcntl = None
+
+try:
+    import aiohttp
+except ImportError:  # opcional: núcleo assíncrono (subcomando assincrono)
+    aiohttp = None
+
+try:
+    from unidecode import unidecode
+except ImportError:  # opcional: transliteração de títulos/artistas não latinos
+    unidecode = None
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -20,6 +59,66 @@ SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID', '')
 SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET', '')
 SPOTIFY_REDIRECT_URI = os.getenv('SPOTIFY_REDIRECT_URI', 'http://localhost:8888/callback')
 
+# Análise paralela da limpeza (0 = usar todos os núcleos)
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '0') or 0)
+PARALLEL_MIN_PAIRS = int(os.getenv('PARALLEL_MIN_PAIRS', '2000000') or 0)
+
+# Músicas do mesmo álbum a partir das quais o álbum é resolvido de uma vez
+ALBUM_BATCH_MIN_TRACKS = int(os.getenv('ALBUM_BATCH_MIN_TRACKS', '3') or 0)
+
+# Fila de músicas não encontradas (intervalo dobra a cada tentativa, até o máximo)
+NOT_FOUND_STORE = os.getenv('NOT_FOUND_STORE', 'nao_encontradas.json')
+NOT_FOUND_RETRY_HOURS = float(os.getenv('NOT_FOUND_RETRY_HOURS', '24') or 0)
+NOT_FOUND_RETRY_MAX_DAYS = float(os.getenv('NOT_FOUND_RETRY_MAX_DAYS', '30') or 0)
+# A fila é salva a cada lote gravado e a cada N músicas buscadas fora de lotes,
+# para que uma interrupção não perca o backoff da execução inteira
+NOT_FOUND_SAVE_EVERY = 50
+
+# Limites de taxa (chamadas por segundo) por conta no serviço multi-conta e
+# por credencial no coordenador entre processos
+SPOTIFY_RATE_PER_SEC = float(os.getenv('SPOTIFY_RATE_PER_SEC', '5') or 0)
+YTMUSIC_RATE_PER_SEC = float(os.getenv('YTMUSIC_RATE_PER_SEC', '2') or 0)
+
+# Pasta dos baldes de taxa compartilhados entre processos ('' = desativado)
+RATE_COORDINATOR_DIR = os.getenv('RATE_COORDINATOR_DIR', '')
+
+# Buscas: prazo por chamada (s), percentil de latência que dispara a estratégia
+# alternativa em paralelo e novas tentativas em caso de erro
+SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', '10') or 0)
+SEARCH_HEDGE_PERCENTILE = float(os.getenv('SEARCH_HEDGE_PERCENTILE', '95') or 0)
+SEARCH_RETRIES = int(os.getenv('SEARCH_RETRIES', '1') or 0)
+
+# Chaves de matching: transliterar textos não latinos (opcional, requer unidecode) e
+# arquivo opcional de apelidos de artistas ({"nome canônico": ["apelido", ...]})
+MATCH_TRANSLITERATE = os.getenv('MATCH_TRANSLITERATE', '0') == '1'
+ARTIST_ALIASES_FILE = os.getenv('ARTIST_ALIASES_FILE', 'artistas_alias.json')
+
+# Serviço local de mapeamentos compartilhado entre workers ('' = desativado),
+# banco usado pelo serviço e espera máxima (s) por uma busca de outro worker
+MAPPING_STORE_URL = os.getenv('MAPPING_STORE_URL', '')
+MAPPING_STORE_DB = os.getenv('MAPPING_STORE_DB', 'mapeamentos.db')
+MAPPING_STORE_WAIT = float(os.getenv('MAPPING_STORE_WAIT', '60') or 0)
+
+# Arquivo (gzip) com os candidatos de cada busca, para re-resolução offline ('' desativa)
+CANDIDATE_ARCHIVE = os.getenv('CANDIDATE_ARCHIVE', 'candidatos.jsonl.gz')
+
+# Orçamentos de chamadas à API por execução e por música (0 = sem limite) e o que
+# fazer ao esgotar o da execução: 'falhar' ou 'pausar' (pergunta se continua)
+CALL_BUDGET_RUN = int(os.getenv('CALL_BUDGET_RUN', '0') or 0)
+CALL_BUDGET_PER_TRACK = int(os.getenv('CALL_BUDGET_PER_TRACK', '0') or 0)
+CALL_BUDGET_MODE = os.getenv('CALL_BUDGET_MODE', 'falhar')
+
+# Requisições simultâneas no núcleo assíncrono (uma sessão HTTP por processo)
+ASYNC_MAX_IN_FLIGHT = int(os.getenv('ASYNC_MAX_IN_FLIGHT', '200') or 1)
+
+# Janela de execução em minutos para migrações com prazo (0 = sem prazo)
+MIGRATION_DEADLINE_MIN = float(os.getenv('MIGRATION_DEADLINE_MIN', '0') or 0)
+
+# Fração dos pares da última sincronização acima da qual as remoções pedem confirmação
+# (até SYNC_REMOVAL_FREE remoções nunca pedem, para não travar playlists pequenas)
+SYNC_MAX_REMOVAL_FRACTION = float(os.getenv('SYNC_MAX_REMOVAL_FRACTION', '0.25') or 0)
+SYNC_REMOVAL_FREE = 5
+
 # Cores ANSI para terminal
 class Colors:
     HEADER = '\033[95m'
@@ -67,16 +166,6 @@ def print_section(title):
     """Imprime uma seção."""
     print("\n" + Colors.BOLD + Colors.BLUE + f"╔══ {title} " + "═" * (74 - len(title)) + Colors.ENDC)
 
-def print_progress_bar(current, total, prefix='', suffix='', length=50):
-    """Imprime uma barra de progresso."""
-    percent = 100 * (current / float(total))
-    filled_length = int(length * current // total)
-    bar = '█' * filled_length + '░' * (length - filled_length)
-    
-    print(f'\r{prefix} {Colors.CYAN}|{bar}|{Colors.ENDC} {percent:.1f}% {suffix}', end='', flush=True)
-    if current == total:
-        print()
-
 def print_stats_box(stats):
     """Imprime estatísticas em uma caixa."""
     print(f"\n{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
@@ -92,1073 +181,5129 @@ def print_stats_box(stats):
     print(f"{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
 
 # ============================================================================
-# NORMALIZAÇÃO E MATCHING APRIMORADOS
+# EVENTOS - SAÍDA ESTRUTURADA COM RENDERIZAÇÃO LIMITADA
 # ============================================================================
+#
+# Os laços por música emitem eventos (run_started, track_resolved, batch_written,
+# track_removed, run_finished) em vez de imprimir; os destinos decidem o que mostrar.
 
-def normalize_title(title: str) -> str:
-    """Normaliza título removendo versões, features, etc."""
-    if not title:
-        return ""
-    
-    title = title.lower().strip()
+class NullSink:
+    """Descarta todos os eventos."""
     
-    # Remover conteúdo entre parênteses e colchetes
-    title = re.sub(r'\s*[\(\[].*?[\)\]]', '', title)
-    
-    # Remover feat/ft e tudo depois
-    title = re.sub(r'\s+(feat\.?|ft\.?|featuring|with)(\s+|$).*', '', title, flags=re.IGNORECASE)
+    def handle(self, event: Dict):
+        pass
     
-    # Remover palavras comuns de versão
-    version_words = [
-        'remastered', 'remaster', 'single version', 'album version',
-        'radio edit', 'extended', 'acoustic', 'live', 'remix',
-        'instrumental', 'bonus', 'demo', 'deluxe', 'explicit',
-        'clean', 'version', 'edition', 'from', 'original soundtrack'
-    ]
-    for word in version_words:
-        title = re.sub(r'\b' + word + r'\b', '', title)
+    def close(self):
+        pass
+
+class JsonlSink:
+    """Grava os eventos em JSONL, em blocos de `buffer_size` linhas."""
     
-    # Remover anos (ex: "2023")
-    title = re.sub(r'\b(19|20)\d{2}\b', '', title)
+    def __init__(self, path: str, buffer_size: int = 1000):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.lock = threading.Lock()
     
-    # Remover pontuação e caracteres especiais
-    title = re.sub(r'[^\w\s]', ' ', title)
+    def handle(self, event: Dict):
+        with self.lock:
+            self.buffer.append(json.dumps(event, ensure_ascii=False))
+            if len(self.buffer) >= self.buffer_size or event['evento'] == 'run_finished':
+                self._flush()
     
-    # Remover espaços extras
-    title = re.sub(r'\s+', ' ', title).strip()
+    def _flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.file.flush()
+            self.buffer = []
     
-    return title
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.file.close()
 
-def normalize_artist(artist: str) -> str:
-    """Normaliza nome de artista."""
-    if not artist:
-        return ""
-    
-    artist = str(artist).lower().strip()
-    
-    # Remover "the" no início
-    artist = re.sub(r'^the\s+', '', artist)
-    
-    # Substituir separadores por espaço
-    artist = artist.replace('&', ' ')
-    artist = artist.replace(',', ' ')
-    artist = artist.replace('/', ' ')
+class TTYRenderer:
+    """Mostra progresso, vazão e ETA, redesenhando no máximo a cada `interval` segundos.
     
-    # Remover pontuação
-    artist = re.sub(r'[^\w\s]', '', artist)
+    No terminal a linha de status é redesenhada no lugar; com a saída
+    redirecionada, uma linha simples é escrita a cada LOG_INTERVAL segundos.
+    """
     
-    # Remover espaços extras
-    artist = re.sub(r'\s+', ' ', artist).strip()
+    TTY_INTERVAL = 0.2
+    LOG_INTERVAL = 10.0
     
-    return artist
-
-def calculate_artist_match(sp_artists: List[str], yt_artists: List[str]) -> float:
-    """Calcula porcentagem de match entre listas de artistas."""
-    if not sp_artists or not yt_artists:
-        return 0.0
+    def __init__(self):
+        self.runs = {}  # thread → estado da operação em andamento
+        self.lock = threading.Lock()
     
-    sp_normalized = [normalize_artist(a) for a in sp_artists if a]
-    yt_normalized = [normalize_artist(a) for a in yt_artists if a]
+    def handle(self, event: Dict):
+        kind = event['evento']
+        with self.lock:
+            run = self.runs.get(threading.get_ident())
+            
+            if kind == 'run_started':
+                self.runs[threading.get_ident()] = {
+                    'operation': event.get('operacao', ''),
+                    'total': event.get('total', 0),
+                    'done': 0,
+                    'counts': Counter(),
+                    'start': event['ts'],
+                    'last_draw': 0.0
+                }
+                return
+            
+            if run is None:
+                return
+            
+            if kind in ('track_resolved', 'track_removed'):
+                run['done'] += 1
+                run['counts'][event.get('status', 'removida')] += 1
+                self._draw(run, event['ts'])
+            elif kind == 'batch_written' and event.get('erro'):
+                self._write_line(Colors.error(f"Erro ao gravar lote na playlist {event.get('playlist')}: {event['erro']}"))
+            elif kind == 'run_finished':
+                self._draw(run, event['ts'], final=True)
+                del self.runs[threading.get_ident()]
     
-    if not sp_normalized or not yt_normalized:
-        return 0.0
+    def _write_line(self, text: str):
+        stream = sys.stdout
+        stream.write(("\n" if stream.isatty() else "") + text + "\n")
+        stream.flush()
     
-    matches = 0
-    for sp_artist in sp_normalized:
-        for yt_artist in yt_normalized:
-            ratio = fuzz.ratio(sp_artist, yt_artist)
-            if ratio >= 75:
-                matches += 1
-                break
+    def _draw(self, run: Dict, now: float, final: bool = False):
+        stream = sys.stdout
+        tty = stream.isatty()
+        if not final and now - run['last_draw'] < (self.TTY_INTERVAL if tty else self.LOG_INTERVAL):
+            return
+        run['last_draw'] = now
+        
+        done, total = run['done'], max(run['total'], run['done'], 1)
+        elapsed = max(now - run['start'], 1e-6)
+        rate = done / elapsed
+        eta = (total - done) / rate if rate else 0
+        counts = "  ".join(f"{STATUS_ICONS.get(k, k)} {v}" for k, v in sorted(run['counts'].items()))
+        status = (f"{run['operation']}: {done}/{total} ({100 * done / total:.1f}%) • "
+                  f"{rate:.1f} músicas/s • ETA {int(eta // 60):02d}:{int(eta % 60):02d}  {counts}")
+        
+        if tty:
+            filled = int(30 * done / total)
+            bar = '█' * filled + '░' * (30 - filled)
+            stream.write(f"\r{Colors.CYAN}|{bar}|{Colors.ENDC} {status}\033[K" + ("\n" if final else ""))
+        else:
+            stream.write(status + "\n")
+        stream.flush()
     
-    return (matches / len(sp_normalized)) * 100
+    def close(self):
+        pass
 
-def is_match(sp_title: str, sp_artists: List[str], yt_title: str, yt_artists: List[str]) -> Tuple[bool, float, float]:
-    """Verifica se duas músicas são compatíveis."""
-    sp_title_norm = normalize_title(sp_title)
-    yt_title_norm = normalize_title(yt_title)
+# Ícones do resumo de status no renderizador
+STATUS_ICONS = {
+    'adicionada': '✓', 'encontrada': '✓', 'existente': '⊙',
+    'nao_encontrada': '✗', 'nao_encontrada_recente': '⏸', 'removida': '🗑', 'adiada': '⏭',
+    'erro': '⚠', 'cortada': '✂', 'colisao': '⚠', 'correta': '✓', 'protegida': '⊙', 'remover': '✗'
+}
+
+class EventBus:
+    """Distribui os eventos para os destinos configurados."""
     
-    title_ratio = fuzz.ratio(sp_title_norm, yt_title_norm)
-    artist_ratio = calculate_artist_match(sp_artists, yt_artists)
+    def __init__(self, sinks: Optional[List] = None):
+        self.sinks = sinks or []
     
-    # Critérios adaptativos de matching
-    match = (
-        (title_ratio >= 95 and artist_ratio >= 40) or
-        (title_ratio >= 85 and artist_ratio >= 50) or
-        (title_ratio >= 75 and artist_ratio >= 60)
-    )
+    def emit(self, kind: str, **fields):
+        if not self.sinks:
+            return
+        # conta/job identificam a origem quando jobs do serviço gravam no mesmo arquivo
+        job = getattr(_api_context, 'job', None) or {}
+        event = {'evento': kind, 'ts': time.time(), 'conta': job.get('conta'), 'job': job.get('id'), **fields}
+        for sink in self.sinks:
+            sink.handle(event)
     
-    return match, title_ratio, artist_ratio
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+EVENTS = EventBus([TTYRenderer()])
+
+def configure_events(output: str = 'tty', events_file: Optional[str] = None):
+    """Escolhe os destinos dos eventos: renderizador ('tty') ou nada ('nula'), mais um JSONL opcional."""
+    global EVENTS
+    sinks = [TTYRenderer() if output == 'tty' else NullSink()]
+    if events_file:
+        sinks.append(JsonlSink(events_file))
+    EVENTS = EventBus(sinks)
 
 # ============================================================================
-# AUTENTICAÇÃO
+# PERFIL DE EXECUÇÃO (--perfil)
 # ============================================================================
 
-def authenticate_spotify(need_write_access: bool = False) -> Spotify:
-    """Autentica no Spotify."""
-    print(Colors.info("Autenticando no Spotify..."))
+PROFILE_PHASES = ('ingest', 'resolve', 'write', 'analyse', 'remove')
+
+class PhaseProfiler:
+    """Mede CPU e memória por fase: ingest, resolve, write, analyse e remove.
     
-    # Verificar se tem credenciais
-    if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
-        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}║                    ⚠️  ERRO DE CONFIGURAÇÃO - SPOTIFY                     ║{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
-        
-        print(f"{Colors.YELLOW}As credenciais do Spotify não foram encontradas!{Colors.ENDC}\n")
-        print(f"{Colors.BOLD}📋 PASSO A PASSO PARA RESOLVER:{Colors.ENDC}\n")
+    Cada fase tem seu próprio cProfile, que mede só a thread que abriu a fase.
+    Uma thread de amostragem coleta as pilhas dessa thread e das threads de
+    busca disparadas por ela para o arquivo de pilhas colapsadas (flamegraph),
+    e o tracemalloc registra o pico de memória de cada fase. A mesma thread
+    tira um snapshot de alocações sempre que vê um novo máximo de memória em
+    uso na fase, então o relatório mostra os locais de alocação perto do pico
+    (não no fim da fase, quando boa parte já foi liberada).
+    """
+    
+    # Novo snapshot só quando o uso cresce 10% sobre o último (snapshots são caros)
+    SNAPSHOT_GROWTH = 1.1
+    
+    def __init__(self, run_dir: str, sample_interval: float = 0.005):
+        self.run_dir = run_dir
+        self.sample_interval = sample_interval
+        self.profiles = {}
+        self.stacks = {phase: Counter() for phase in PROFILE_PHASES}
+        self.wall_times = Counter()
+        self.entries = Counter()
+        self.peaks = {}
+        self.snapshots = {}
+        self.snapshot_sizes = {}
+        self.active = None  # (fase, thread)
+        self.workers = {}  # thread -> fase (estratégias de busca rodando em threads)
+        self._stop = threading.Event()
+        self._snapshot_lock = threading.Lock()
         
-        print(f"{Colors.CYAN}1️⃣  Crie um arquivo chamado {Colors.BOLD}.env{Colors.ENDC}{Colors.CYAN} na mesma pasta deste script{Colors.ENDC}")
-        print(f"   {Colors.YELLOW}→ Dica: Copie o arquivo .env.example e renomeie para .env{Colors.ENDC}\n")
+        tracemalloc.start(10)
+        self._sampler = threading.Thread(target=self._sample, name="perfil-amostragem", daemon=True)
+        self._sampler.start()
+    
+    @contextmanager
+    def phase(self, name: str):
+        """Mede o bloco como a fase indicada (fases aninhadas contam na externa)."""
+        if self.active is not None:
+            yield
+            return
         
-        print(f"{Colors.CYAN}2️⃣  Adicione estas linhas no arquivo .env:{Colors.ENDC}")
-        print(f"{Colors.GREEN}   ╭─────────────────────────────────────────────────────────╮")
-        print(f"   │ SPOTIFY_CLIENT_ID=seu_client_id_aqui                   │")
-        print(f"   │ SPOTIFY_CLIENT_SECRET=seu_client_secret_aqui           │")
-        print(f"   │ SPOTIFY_REDIRECT_URI=http://localhost:8888/callback    │")
-        print(f"   ╰─────────────────────────────────────────────────────────╯{Colors.ENDC}\n")
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.active = (name, threading.get_ident())
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.wall_times[name] += time.perf_counter() - start
+            self.entries[name] += 1
+            self.active = None
+            
+            self._snapshot_if_peak(name)
+            self.peaks[name] = max(self.peaks.get(name, 0), tracemalloc.get_traced_memory()[1])
+    
+    def _snapshot_if_peak(self, name: str):
+        """Tira um snapshot se o uso atual é um novo máximo da fase."""
+        with self._snapshot_lock:
+            current = tracemalloc.get_traced_memory()[0]
+            if current > self.snapshot_sizes.get(name, 0) * self.SNAPSHOT_GROWTH:
+                self.snapshot_sizes[name] = current
+                self.snapshots[name] = tracemalloc.take_snapshot()
+    
+    @contextmanager
+    def worker(self):
+        """Inclui a thread atual na amostragem da fase ativa (o cProfile só mede a thread da fase)."""
+        active = self.active
+        if active is None:
+            yield
+            return
         
-        print(f"{Colors.CYAN}3️⃣  Obtenha suas credenciais:{Colors.ENDC}")
-        print(f"   a) Acesse: {Colors.BOLD}https://developer.spotify.com/dashboard{Colors.ENDC}")
-        print(f"   b) Faça login com sua conta Spotify")
-        print(f"   c) Clique em {Colors.BOLD}'Create app'{Colors.ENDC}")
-        print(f"   d) Preencha os campos:")
-        print(f"      • App name: {Colors.GREEN}Migrador de Playlists{Colors.ENDC}")
-        print(f"      • Redirect URI: {Colors.GREEN}http://localhost:8888/callback{Colors.ENDC}")
-        print(f"   e) Após criar, clique em {Colors.BOLD}'Settings'{Colors.ENDC}")
-        print(f"   f) Copie o {Colors.BOLD}Client ID{Colors.ENDC} e {Colors.BOLD}Client Secret{Colors.ENDC}\n")
+        ident = threading.get_ident()
+        self.workers[ident] = active[0]
+        try:
+            yield
+        finally:
+            self.workers.pop(ident, None)
+    
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            active = self.active
+            threads = dict(self.workers)
+            if active is not None:
+                self._snapshot_if_peak(active[0])
+                threads[active[1]] = active[0]
+            if not threads:
+                continue
+            
+            frames = sys._current_frames()
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                
+                if stack:
+                    self.stacks[name][';'.join(reversed(stack))] += 1
+    
+    def write_reports(self) -> str:
+        """Grava os relatórios de cada fase na pasta da execução."""
+        self._stop.set()
+        self._sampler.join(timeout=1)
+        os.makedirs(self.run_dir, exist_ok=True)
         
-        print(f"{Colors.CYAN}4️⃣  Cole as credenciais no arquivo .env (sem as aspas!){Colors.ENDC}\n")
+        summary = []
+        for name in PROFILE_PHASES:
+            if name not in self.profiles:
+                continue
+            
+            with open(os.path.join(self.run_dir, f"{name}_funcoes.txt"), 'w', encoding='utf-8') as f:
+                stats = pstats.Stats(self.profiles[name], stream=f)
+                f.write(f"FASE: {name} (ordenado por tempo acumulado)\n\n")
+                stats.sort_stats('cumulative').print_stats(50)
+                f.write(f"\nFASE: {name} (ordenado por tempo próprio)\n\n")
+                stats.sort_stats('tottime').print_stats(50)
+            
+            with open(os.path.join(self.run_dir, f"{name}.folded"), 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks[name].most_common():
+                    f.write(f"{stack} {count}\n")
+            
+            with open(os.path.join(self.run_dir, f"{name}_memoria.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"FASE: {name}\n")
+                f.write(f"Pico de memória: {self.peaks.get(name, 0) / 1024 / 1024:.1f} MiB\n\n")
+                if name in self.snapshots:
+                    f.write(f"Maiores locais de alocação no maior uso observado "
+                            f"({self.snapshot_sizes[name] / 1024 / 1024:.1f} MiB):\n\n")
+                    for stat in self.snapshots[name].statistics('lineno')[:25]:
+                        f.write(f"{stat}\n")
+            
+            summary.append(
+                f"{name:<10} {self.wall_times[name]:>10.2f}s {self.entries[name]:>8} "
+                f"{self.peaks.get(name, 0) / 1024 / 1024:>10.1f} MiB"
+            )
         
-        print(f"{Colors.YELLOW}💡 DICA: Veja o arquivo SETUP.md para um guia detalhado com imagens!{Colors.ENDC}\n")
+        with open(os.path.join(self.run_dir, "resumo.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"{'fase':<10} {'tempo':>11} {'entradas':>8} {'pico':>14}\n")
+            f.write("\n".join(summary) + "\n")
         
-        print(f"{Colors.RED}❌ Script encerrado. Configure o .env e execute novamente.{Colors.ENDC}\n")
-        exit(1)
+        tracemalloc.stop()
+        return self.run_dir
+
+PROFILER: Optional[PhaseProfiler] = None
+
+def enable_profiling(run_dir: Optional[str] = None) -> PhaseProfiler:
+    """Ativa o modo de perfil para esta execução."""
+    global PROFILER
+    PROFILER = PhaseProfiler(run_dir or f"perfil_{int(time.time())}")
+    return PROFILER
+
+def profile_phase(name: str):
+    """Contexto que mede o bloco como uma fase (sem custo com o perfil desligado)."""
+    if PROFILER is None:
+        return nullcontext()
+    return PROFILER.phase(name)
+
+def profile_worker():
+    """Contexto para threads auxiliares de uma fase (amostradas junto com ela)."""
+    if PROFILER is None:
+        return nullcontext()
+    return PROFILER.worker()
+
+def profiled(name: str):
+    """Decorador equivalente a profile_phase para funções inteiras."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if PROFILER is None:
+                return func(*args, **kwargs)
+            with PROFILER.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ============================================================================
+# LIMITES DE TAXA E CONTEXTO POR CONTA
+# ============================================================================
+
+class RateLimiter:
+    """Token bucket thread-safe: até `rate` chamadas por segundo, com rajadas de até `burst`."""
     
-    try:
-        if need_write_access:
-            # OAuth com permissões de escrita
-            scope = "playlist-modify-public playlist-modify-private"
-            auth_manager = SpotifyOAuth(
-                client_id=SPOTIFY_CLIENT_ID,
-                client_secret=SPOTIFY_CLIENT_SECRET,
-                redirect_uri=SPOTIFY_REDIRECT_URI,
-                scope=scope,
-                cache_path=".spotify_cache"
-            )
-            sp = Spotify(auth_manager=auth_manager)
-            print(Colors.success("Conectado ao Spotify com permissões de escrita!"))
-        else:
-            # Client Credentials para leitura
-            auth_manager = SpotifyClientCredentials(
-                client_id=SPOTIFY_CLIENT_ID,
-                client_secret=SPOTIFY_CLIENT_SECRET
-            )
-            sp = Spotify(auth_manager=auth_manager)
-            print(Colors.success("Conectado ao Spotify!"))
-        
-        return sp
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
     
-    except Exception as e:
-        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}║                    ⚠️  ERRO AO CONECTAR NO SPOTIFY                        ║{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
-        
-        error_msg = str(e).lower()
+    def acquire(self):
+        """Bloqueia até haver uma permissão disponível."""
+        if self.rate <= 0:
+            return
         
-        if "invalid_client" in error_msg or "client_id" in error_msg or "client_secret" in error_msg:
-            print(f"{Colors.YELLOW}As credenciais do Spotify estão incorretas!{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}🔍 POSSÍVEIS CAUSAS:{Colors.ENDC}\n")
-            print(f"  {Colors.RED}✗{Colors.ENDC} Client ID ou Client Secret errados")
-            print(f"  {Colors.RED}✗{Colors.ENDC} Espaços extras antes/depois das credenciais")
-            print(f"  {Colors.RED}✗{Colors.ENDC} Credenciais entre aspas (remova as aspas!)\n")
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+class ThrottledClient:
+    """Envolve um cliente (Spotify/YTMusic) tomando uma permissão do limitador a cada requisição.
+    
+    Quando o cliente expõe a sessão HTTP (`_session`, como spotipy e
+    ytmusicapi), o limitador é instalado nela: assim as requisições internas
+    de paginação (ex.: get_playlist com limit=None) também são medidas. Sem
+    sessão, cada chamada de método toma uma permissão.
+    """
+    
+    def __init__(self, client, limiter: RateLimiter):
+        self._client = client
+        self._limiter = limiter
+        session = getattr(client, '_session', None)
+        self._session_level = isinstance(session, requests.Session)
+        if self._session_level:
+            request = session.request
             
-            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
-            print(f"  1. Abra o arquivo {Colors.BOLD}.env{Colors.ENDC}")
-            print(f"  2. Verifique se não há espaços ou aspas nas credenciais")
-            print(f"  3. Copie novamente do Spotify Developer Dashboard")
-            print(f"  4. Cole diretamente, sem aspas: {Colors.GREEN}SPOTIFY_CLIENT_ID=abc123...{Colors.ENDC}\n")
-        
-        elif "redirect" in error_msg or "uri" in error_msg:
-            print(f"{Colors.YELLOW}Problema com o Redirect URI!{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
-            print(f"  1. Acesse: {Colors.BOLD}https://developer.spotify.com/dashboard{Colors.ENDC}")
-            print(f"  2. Selecione seu app")
-            print(f"  3. Vá em {Colors.BOLD}Settings{Colors.ENDC}")
-            print(f"  4. Adicione nos Redirect URIs: {Colors.GREEN}http://localhost:8888/callback{Colors.ENDC}")
-            print(f"  5. Clique em {Colors.BOLD}Save{Colors.ENDC}\n")
+            def throttled_request(*args, **kwargs):
+                raise_if_abandoned()
+                limiter.acquire()
+                return request(*args, **kwargs)
+            
+            session.request = throttled_request
+    
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr) or self._session_level:
+            return attr
         
-        else:
-            print(f"{Colors.YELLOW}Erro desconhecido na autenticação:{Colors.ENDC}")
-            print(f"{Colors.RED}{e}{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}✅ SOLUÇÕES GERAIS:{Colors.ENDC}\n")
-            print(f"  • Verifique sua conexão com a internet")
-            print(f"  • Tente novamente em alguns minutos")
-            print(f"  • Recrie suas credenciais no Spotify Developer Dashboard\n")
+        def call(*args, **kwargs):
+            raise_if_abandoned()
+            self._limiter.acquire()
+            return attr(*args, **kwargs)
         
-        print(f"{Colors.RED}❌ Script encerrado. Corrija o erro e execute novamente.{Colors.ENDC}\n")
-        exit(1)
+        return call
 
-def authenticate_ytmusic() -> YTMusic:
-    """Autentica no YouTube Music."""
-    print(Colors.info("Autenticando no YouTube Music..."))
+class SharedRateLimiter:
+    """Token bucket compartilhado entre processos: o estado fica num arquivo travado com flock.
     
-    if not os.path.exists('headers_auth.json'):
-        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}║                ⚠️  ERRO DE CONFIGURAÇÃO - YOUTUBE MUSIC                   ║{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+    Todos os processos que usam a mesma credencial leem e atualizam o mesmo
+    balde, então a taxa somada não passa de `rate` chamadas por segundo.
+    """
+    
+    def __init__(self, path: str, rate: float, burst: Optional[float] = None):
+        self.path = path
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+    
+    def acquire(self):
+        """Bloqueia até haver uma permissão disponível no balde compartilhado."""
+        if self.rate <= 0:
+            return
         
-        print(f"{Colors.YELLOW}Arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.YELLOW} não encontrado!{Colors.ENDC}\n")
-        print(f"{Colors.BOLD}📋 PASSO A PASSO PARA CRIAR:{Colors.ENDC}\n")
+        while True:
+            with open(self.path, 'a+', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except json.JSONDecodeError:
+                    state = {}
+                
+                now = time.time()
+                elapsed = max(0.0, now - state.get('updated', now))
+                tokens = min(self.capacity, state.get('tokens', self.capacity) + elapsed * self.rate)
+                delay = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    delay = (1 - tokens) / self.rate
+                
+                f.seek(0)
+                f.truncate()
+                json.dump({'tokens': tokens, 'updated': now}, f)
+            
+            if not delay:
+                return
+            time.sleep(delay)
+
+# Pasta do coordenador ativo (None = cada processo controla o próprio ritmo)
+RATE_COORDINATOR = None
+
+def enable_rate_coordinator(directory: Optional[str] = None) -> bool:
+    """Ativa os baldes compartilhados entre processos na pasta indicada."""
+    global RATE_COORDINATOR
+    if fcntl is None:
+        print(Colors.warning("Coordenação entre processos indisponível neste sistema (sem fcntl)."))
+        return False
+    
+    RATE_COORDINATOR = directory or os.path.join(tempfile.gettempdir(), 'migrate_limites')
+    os.makedirs(RATE_COORDINATOR, exist_ok=True)
+    return True
+
+def coordinated(client, service: str, identity: str, rate: float):
+    """Envolve o cliente com o balde compartilhado da credencial (se o coordenador estiver ativo)."""
+    if RATE_COORDINATOR is None:
+        return client
+    
+    digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(RATE_COORDINATOR, f"{service}_{digest}.json")
+    return ThrottledClient(client, SharedRateLimiter(path, rate))
+
+# Contexto da thread atual (conta em execução no serviço multi-conta)
+_api_context = threading.local()
+
+def pace(seconds: float):
+    """Pausa entre chamadas; dispensada quando um limitador de taxa controla o ritmo."""
+    if RATE_COORDINATOR is not None or getattr(_api_context, 'rate_limited', False):
+        return
+    time.sleep(seconds)
+
+def data_path(filename: str) -> str:
+    """Caminho de um arquivo de dados, dentro da pasta da conta quando rodando no serviço."""
+    data_dir = getattr(_api_context, 'data_dir', None)
+    return os.path.join(data_dir, filename) if data_dir else filename
+
+# ============================================================================
+# CONTAGEM DE CHAMADAS E ORÇAMENTOS
+# ============================================================================
+
+class CallBudgetExceeded(Exception):
+    """Orçamento de chamadas da execução esgotado."""
+
+class CallLedger:
+    """Chamadas por endpoint e por música resolvida, com orçamentos por execução e por música."""
+    
+    def __init__(self, run_budget: Optional[int] = None, track_budget: Optional[int] = None):
+        self.lock = threading.Lock()
+        self.run_budget = CALL_BUDGET_RUN if run_budget is None else run_budget
+        self.track_budget = CALL_BUDGET_PER_TRACK if track_budget is None else track_budget
+        self.reset()
+    
+    def reset(self):
+        """Zera as contagens (início de uma execução)."""
+        with self.lock:
+            self.calls = Counter()
+            self.total = 0
+            self.limit = self.run_budget
+            self.tracks = 0
+            self.track_total = 0
+            self.track_max = 0
+            self.tracks_cut = 0
+    
+    def exhausted(self) -> bool:
+        return bool(self.limit) and self.total >= self.limit
+    
+    def charge(self, service: str, endpoint: str):
+        """Registra uma chamada; levanta CallBudgetExceeded (execução) ou TrackBudgetExceeded (música).
         
-        print(f"{Colors.CYAN}1️⃣  Abra o YouTube Music no navegador:{Colors.ENDC}")
-        print(f"   {Colors.BOLD}https://music.youtube.com{Colors.ENDC}\n")
+        A música é a do contexto da thread, herdado pelas estratégias de busca:
+        uma estratégia que termina depois da sua música conta para ela, não para a seguinte.
+        """
+        overdraft = getattr(_api_context, 'call_overdraft', False)
+        if self.exhausted() and not overdraft and not self.extend():
+            raise CallBudgetExceeded(f"orçamento de {self.limit} chamadas da execução esgotado")
         
-        print(f"{Colors.CYAN}2️⃣  Faça login na sua conta Google{Colors.ENDC}\n")
+        counter = getattr(_api_context, 'track_counter', None)
+        with self.lock:
+            if counter is not None and self.track_budget and counter['calls'] >= self.track_budget:
+                if counter['closed'] and not counter['cut']:
+                    self.tracks_cut += 1
+                counter['cut'] = True
+                raise TrackBudgetExceeded(f"orçamento de {self.track_budget} chamadas da música esgotado")
+            self.calls[f"{service}.{endpoint}"] += 1
+            self.total += 1
+            if counter is not None:
+                counter['calls'] += 1
+                if counter['closed']:
+                    self.track_total += 1
+                    self.track_max = max(self.track_max, counter['calls'])
+    
+    def extend(self) -> bool:
+        """No modo 'pausar' (terminal, thread principal), pergunta se libera mais um orçamento."""
+        if (CALL_BUDGET_MODE != 'pausar' or not sys.stdin.isatty()
+                or threading.current_thread() is not threading.main_thread()):
+            return False
         
-        print(f"{Colors.CYAN}3️⃣  Abra as Ferramentas do Desenvolvedor:{Colors.ENDC}")
-        print(f"   • Pressione {Colors.BOLD}F12{Colors.ENDC} (Windows/Linux)")
-        print(f"   • Ou {Colors.BOLD}Cmd + Option + I{Colors.ENDC} (Mac)\n")
+        answer = input(f"\n{Colors.YELLOW}⚠ Orçamento de {self.limit} chamadas esgotado. "
+                       f"Liberar mais {self.run_budget}? (s/n):{Colors.ENDC} ").strip().lower()
+        if answer != 's':
+            return False
+        with self.lock:
+            self.limit += self.run_budget
+        return True
+    
+    @contextmanager
+    def track(self):
+        """Atribui as chamadas do bloco (e das threads que ele dispara) à música sendo resolvida."""
+        counter = {'calls': 0, 'cut': False, 'closed': False}
+        previous = getattr(_api_context, 'track_counter', None)
+        _api_context.track_counter = counter
+        try:
+            yield
+        finally:
+            _api_context.track_counter = previous
+            with self.lock:
+                counter['closed'] = True
+                self.tracks += 1
+                self.track_total += counter['calls']
+                self.track_max = max(self.track_max, counter['calls'])
+                self.tracks_cut += counter['cut']
+    
+    @contextmanager
+    def overdraft(self):
+        """Libera as chamadas do bloco do orçamento da execução (gravar o que já foi resolvido ao interromper)."""
+        _api_context.call_overdraft = True
+        try:
+            yield
+        finally:
+            _api_context.call_overdraft = False
+    
+    def snapshot(self) -> Dict:
+        """Resumo legível por máquina."""
+        with self.lock:
+            return {
+                'total': self.total,
+                'por_endpoint': dict(self.calls),
+                'musicas_buscadas': self.tracks,
+                'media_por_musica': round(self.track_total / self.tracks, 2) if self.tracks else 0,
+                'max_por_musica': self.track_max,
+                'musicas_interrompidas': self.tracks_cut,
+                'orcamento_execucao': self.limit,
+                'orcamento_musica': self.track_budget
+            }
+    
+    def stats_lines(self) -> Dict[str, str]:
+        """Linhas para a caixa de estatísticas (vazio se não houve chamadas)."""
+        data = self.snapshot()
+        if not data['total']:
+            return {}
+        
+        budget = f" de {data['orcamento_execucao']}" if data['orcamento_execucao'] else ""
+        top = sorted(data['por_endpoint'].items(), key=lambda item: -item[1])[:3]
+        lines = {
+            f"{Colors.CYAN}☎ Chamadas à API{Colors.ENDC}": f"{Colors.CYAN}{data['total']}{budget}{Colors.ENDC}",
+            f"{Colors.CYAN}☎ Mais chamados{Colors.ENDC}": f"{Colors.CYAN}{', '.join(f'{name} {n}' for name, n in top)}{Colors.ENDC}"
+        }
+        if data['musicas_buscadas']:
+            lines[f"{Colors.CYAN}☎ Por música buscada (média / máx){Colors.ENDC}"] = \
+                f"{Colors.CYAN}{data['media_por_musica']:.1f} / {data['max_por_musica']}{Colors.ENDC}"
+        if data['musicas_interrompidas']:
+            lines[f"{Colors.YELLOW}✂ Buscas interrompidas pelo orçamento{Colors.ENDC}"] = \
+                f"{Colors.YELLOW}{data['musicas_interrompidas']}{Colors.ENDC}"
+        return lines
+
+CALL_LEDGER = CallLedger()
+
+def call_ledger() -> CallLedger:
+    """Contagem de chamadas da conta/job atual (ou a global)."""
+    return getattr(_api_context, 'call_ledger', None) or CALL_LEDGER
+
+def call_summary(operation: str) -> Dict[str, str]:
+    """Emite o evento api_calls da execução e devolve as linhas da caixa de estatísticas."""
+    ledger = call_ledger()
+    EVENTS.emit('api_calls', operacao=operation, **ledger.snapshot())
+    return ledger.stats_lines()
+
+class MeteredClient:
+    """Envolve um cliente (Spotify/YTMusic) registrando cada chamada na contagem da execução atual."""
+    
+    def __init__(self, client, service: str):
+        self._client = client
+        self._service = service
+    
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            raise_if_abandoned()
+            call_ledger().charge(self._service, name)
+            return attr(*args, **kwargs)
+        
+        return call
+
+def budgeted(func):
+    """Decorador para funções de busca (cliente, música): conta as chamadas da música e aplica os orçamentos.
+    
+    As estratégias rodam em threads; o orçamento da execução esgotado nelas
+    volta para cá, na thread da execução, onde pausa (e a busca é refeita) ou
+    interrompe a execução. O da música chega como TrackBudgetExceeded.
+    """
+    @wraps(func)
+    def wrapper(client, track):
+        ledger = call_ledger()
+        while True:
+            if ledger.exhausted() and not ledger.extend():
+                raise CallBudgetExceeded(f"orçamento de {ledger.limit} chamadas da execução esgotado")
+            try:
+                with ledger.track():
+                    result = func(client, track)
+            except CallBudgetExceeded:
+                if ledger.exhausted():
+                    continue
+                raise
+            if result or not ledger.exhausted():
+                return result
+    return wrapper
+
+# ============================================================================
+# BUSCA COM PRAZO E REQUISIÇÕES ESPECULATIVAS
+# ============================================================================
+
+# Latência usada para disparar a alternativa enquanto há poucas amostras
+SEARCH_HEDGE_DEFAULT_DELAY = 2.0
+SEARCH_HEDGE_MIN_SAMPLES = 20
+
+class SearchFailed(Exception):
+    """A busca não teve resposta (erro ou prazo estourado): não quer dizer que a música não existe."""
+
+class TrackBudgetExceeded(SearchFailed):
+    """Orçamento de chamadas de uma música esgotado: a busca dela foi cortada, não ficou sem resultado."""
+
+def search_failure_status(error: SearchFailed) -> str:
+    """Status do evento track_resolved para uma busca sem resposta."""
+    return 'cortada' if isinstance(error, TrackBudgetExceeded) else 'erro'
+
+def raise_if_abandoned():
+    """Na thread de uma estratégia abandonada, impede novas chamadas à API.
+    
+    Uma requisição HTTP já em andamento não pode ser interrompida; esta
+    verificação só evita as seguintes (retentativas, paginação, limitador).
+    """
+    future = getattr(_api_context, 'call_future', None)
+    if future is not None and future.abandoned:
+        raise SearchFailed("busca abandonada")
+
+class SearchMetrics:
+    """Latências e contadores das buscas (especulativas, canceladas, prazos, retentativas)."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=500)
+        self.counts = Counter()
+    
+    def record(self, latency: float):
+        with self.lock:
+            self.latencies.append(latency)
+    
+    def reset_counts(self):
+        """Zera os contadores (as latências continuam valendo para o percentil)."""
+        with self.lock:
+            self.counts.clear()
+    
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counts[name] += amount
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+    
+    def hedge_delay(self) -> float:
+        """Tempo de espera pela estratégia principal antes de disparar a alternativa."""
+        if len(self.latencies) < SEARCH_HEDGE_MIN_SAMPLES:
+            return min(SEARCH_HEDGE_DEFAULT_DELAY, SEARCH_DEADLINE or SEARCH_HEDGE_DEFAULT_DELAY)
+        return self.percentile(SEARCH_HEDGE_PERCENTILE)
+    
+    def stats_lines(self) -> Dict[str, str]:
+        """Linhas para a caixa de estatísticas (vazio se não houve buscas)."""
+        if not self.counts['chamadas']:
+            return {}
+        
+        c = self.counts
+        p50, p95 = self.percentile(50), self.percentile(95)
+        latency = f"p50 {p50:.2f}s / p95 {p95:.2f}s" if p50 is not None else "-"
+        return {
+            f"{Colors.CYAN}⏱ Chamadas de busca (latência){Colors.ENDC}": f"{Colors.CYAN}{c['chamadas']} ({latency}){Colors.ENDC}",
+            f"{Colors.CYAN}⚡ Especulativas (vencedoras){Colors.ENDC}": f"{Colors.CYAN}{c['especulativas']} ({c['especulativas_vencedoras']}){Colors.ENDC}",
+            f"{Colors.YELLOW}⌛ Canceladas / prazo estourado{Colors.ENDC}": f"{Colors.YELLOW}{c['canceladas']} / {c['prazo_estourado']}{Colors.ENDC}",
+            f"{Colors.YELLOW}↻ Retentativas / erros{Colors.ENDC}": f"{Colors.YELLOW}{c['retentativas']} / {c['erros']}{Colors.ENDC}"
+        }
+    
+    def summary(self) -> str:
+        """Resumo em uma linha (sem cores)."""
+        c = self.counts
+        return (f"{c['chamadas']} chamadas, {c['especulativas']} especulativas "
+                f"({c['especulativas_vencedoras']} vencedoras), {c['canceladas']} canceladas, "
+                f"{c['prazo_estourado']} com prazo estourado, {c['retentativas']} retentativas")
+
+SEARCH_METRICS = SearchMetrics()
+
+def search_metrics() -> SearchMetrics:
+    """Métricas de busca da conta/job atual (ou as globais)."""
+    return getattr(_api_context, 'search_metrics', None) or SEARCH_METRICS
+
+def _start_call(fn, metrics: SearchMetrics) -> Future:
+    """Roda fn numa thread daemon (uma chamada travada não segura o encerramento).
+    
+    A thread herda o contexto da conta (saída, pasta de dados, métricas,
+    contador de chamadas), senão gravaria nos arquivos e contadores globais.
+    """
+    future = Future()
+    context = dict(vars(_api_context))
+    
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        vars(_api_context).update(context)
+        _api_context.call_future = future
+        with profile_worker():
+            for attempt in range(SEARCH_RETRIES + 1):
+                start = time.monotonic()
+                try:
+                    result = fn()
+                except (CallBudgetExceeded, TrackBudgetExceeded) as e:
+                    future.set_exception(e)
+                    return
+                except Exception as e:
+                    if attempt < SEARCH_RETRIES and not future.abandoned:
+                        metrics.count('retentativas')
+                        time.sleep(0.5 * (attempt + 1))
+                        continue
+                    if not future.abandoned:
+                        metrics.count('erros')
+                    future.set_exception(e)
+                    return
+                metrics.record(time.monotonic() - start)
+                future.set_result(result)
+                return
+    
+    future.abandoned = False
+    metrics.count('chamadas')
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def hedged_search(strategies: List, metrics: Optional[SearchMetrics] = None):
+    """Executa estratégias de busca (em ordem de preferência) com prazo e especulação.
+    
+    Cada estratégia é uma função sem argumentos que devolve um id ou None.
+    A principal roda sozinha; se passar do percentil de latência, a próxima é
+    disparada em paralelo e o primeiro resultado válido vence. Chamadas que
+    estouram SEARCH_DEADLINE são abandonadas.
+    
+    Retorna None só quando todas as estratégias responderam sem resultado; se
+    alguma falhou ou estourou o prazo (e nenhuma encontrou), levanta
+    SearchFailed, para que a música não entre na fila de não encontradas.
+    Orçamentos esgotados numa estratégia sobem como CallBudgetExceeded
+    (execução) ou TrackBudgetExceeded (música cortada).
+    """
+    metrics = metrics or search_metrics()
+    pending = {}
+    next_index = 0
+    hedge_at = None
+    failures = []
+    budget_cut = None
+    
+    def launch(speculative: bool):
+        nonlocal next_index, hedge_at
+        now = time.monotonic()
+        future = _start_call(strategies[next_index], metrics)
+        pending[future] = (next_index, now + SEARCH_DEADLINE if SEARCH_DEADLINE > 0 else None, speculative)
+        next_index += 1
+        hedge_at = now + metrics.hedge_delay()
+        if speculative:
+            metrics.count('especulativas')
+    
+    def abandon(future, reason: str):
+        # A thread continua até a chamada em andamento voltar; raise_if_abandoned barra as próximas
+        future.abandoned = True
+        metrics.count(reason)
+    
+    launch(speculative=False)
+    
+    while pending:
+        now = time.monotonic()
+        deadlines = [d for _, d, _ in pending.values() if d is not None]
+        timeout = min(deadlines) - now if deadlines else None
+        if next_index < len(strategies):
+            hedge_wait = hedge_at - now
+            timeout = hedge_wait if timeout is None else min(timeout, hedge_wait)
+        
+        done, _ = wait(pending, timeout=max(0.0, timeout) if timeout is not None else None,
+                       return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            index, _, speculative = pending.pop(future)
+            try:
+                result = future.result()
+            except (CallBudgetExceeded, TrackBudgetExceeded) as e:
+                if not isinstance(budget_cut, CallBudgetExceeded):
+                    budget_cut = e
+                result = None
+            except Exception as e:
+                failures.append(str(e) or type(e).__name__)
+                result = None
+            
+            if result:
+                if speculative:
+                    metrics.count('especulativas_vencedoras')
+                for other in pending:
+                    abandon(other, 'canceladas')
+                return result
+        
+        now = time.monotonic()
+        for future, (_, deadline, _) in list(pending.items()):
+            if deadline is not None and now >= deadline:
+                pending.pop(future)
+                abandon(future, 'prazo_estourado')
+                failures.append(f"prazo de {SEARCH_DEADLINE:g}s estourado")
+        
+        if next_index < len(strategies):
+            if not pending:
+                # Principal terminou sem resultado (ou estourou o prazo): alternativa normal
+                launch(speculative=False)
+            elif now >= hedge_at:
+                launch(speculative=True)
+    
+    if budget_cut is not None:
+        raise budget_cut
+    if failures:
+        raise SearchFailed("; ".join(failures))
+    return None
+
+# ============================================================================
+# SERVIÇO DE MAPEAMENTOS - URI DO SPOTIFY ↔ VIDEOID COMPARTILHADOS
+# ============================================================================
+
+# Workers no mesmo host consultam o serviço antes de buscar: mapeamentos já
+# conhecidos voltam direto (por id de origem, ISRC ou chave normalizada) e uma
+# música sendo buscada por outro worker espera o resultado dele (single-flight).
+# A chave título|artista é igual para gravações diferentes (ao vivo, remaster,
+# acústica): um acerto só por ela vale com ISRC igual ou duração próxima.
+
+MAPPING_COLUMNS = ('spotify_uri', 'video_id', 'isrc', 'chave')
+
+def mapping_keys(track: Dict) -> Dict:
+    """Chaves de consulta de uma música (qualquer direção)."""
+    return {
+        'spotify_uri': track.get('uri'),
+        'video_id': track.get('videoId'),
+        'isrc': (track.get('isrc') or '').upper() or None,
+        'chave': f"{normalize_title(track['name'])}|{normalize_artist(track['all_artists'][0])}",
+        'duracao': track.get('duration')
+    }
+
+def mapping_target(direction: str) -> Tuple[str, str]:
+    """(coluna de origem, coluna de destino) de uma direção."""
+    if direction == "spotify_para_ytmusic":
+        return 'spotify_uri', 'video_id'
+    return 'video_id', 'spotify_uri'
+
+class MappingStore:
+    """Mapeamentos em SQLite com reserva de buscas em andamento."""
+    
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.flights = {}
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS mapeamentos (spotify_uri TEXT NOT NULL, video_id TEXT NOT NULL, "
+                "isrc TEXT, chave TEXT, atualizado REAL, duracao REAL, PRIMARY KEY (spotify_uri, video_id))"
+            )
+            # Bancos criados antes da coluna de duração
+            if 'duracao' not in {row[1] for row in self.conn.execute("PRAGMA table_info(mapeamentos)")}:
+                self.conn.execute("ALTER TABLE mapeamentos ADD COLUMN duracao REAL")
+            for column in MAPPING_COLUMNS:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{column} ON mapeamentos ({column})")
+    
+    def _lookup(self, direction: str, keys: Dict) -> Optional[str]:
+        source, target = mapping_target(direction)
+        for column in (source, 'isrc'):
+            if not keys.get(column):
+                continue
+            row = self.conn.execute(
+                f"SELECT {target} FROM mapeamentos WHERE {column} = ? ORDER BY atualizado DESC LIMIT 1",
+                (keys[column],)
+            ).fetchone()
+            if row:
+                return row[0]
+        if not keys.get('chave'):
+            return None
+        rows = self.conn.execute(
+            f"SELECT {target}, {source}, isrc, duracao FROM mapeamentos WHERE chave = ? ORDER BY atualizado DESC",
+            (keys['chave'],)
+        )
+        for match_id, source_id, isrc, duration in rows:
+            if self._same_recording(keys, source, source_id, isrc, duration):
+                return match_id
+        return None
+    
+    @staticmethod
+    def _same_recording(keys: Dict, source: str, source_id: Optional[str], isrc: Optional[str],
+                        duration: Optional[float]) -> bool:
+        """Um mapeamento achado só pela chave é da mesma gravação? (id de origem, ISRC ou duração)"""
+        if keys.get(source) and keys[source] == source_id:
+            return True
+        if keys.get('isrc') and isrc:
+            return keys['isrc'] == isrc
+        diff = duration_diff({'duration': keys.get('duracao')}, {'duration': duration})
+        return diff is not None and diff <= DURATION_MAX_DIFF
+    
+    @staticmethod
+    def _flight_key(direction: str, keys: Dict) -> str:
+        return f"{direction}|{keys.get('isrc') or keys['chave']}"
+    
+    def get_many(self, direction: str, batch: List[Dict], claim: bool = True, wait: float = 0) -> List[Dict]:
+        """Consulta um lote de músicas.
+        
+        Status por música: 'encontrada' (com 'id'), 'ausente' (sem reserva),
+        'buscar' (reservada para quem perguntou) ou 'nao_encontrada' (outro
+        worker acabou de buscar sem sucesso). Reservas de outro worker são
+        aguardadas por até wait segundos; depois disso, ou se a busca dele
+        falhou (erro, prazo, orçamento), quem esperava busca por conta própria.
+        """
+        results = []
+        waiting = []
+        with self.lock:
+            for keys in batch:
+                match_id = self._lookup(direction, keys)
+                if match_id:
+                    results.append({'status': 'encontrada', 'id': match_id})
+                    continue
+                if not claim:
+                    results.append({'status': 'ausente'})
+                    continue
+                
+                flight_key = self._flight_key(direction, keys)
+                flight = self.flights.get(flight_key)
+                if flight is None or time.monotonic() - flight['inicio'] > MAPPING_STORE_WAIT:
+                    self.flights[flight_key] = {'inicio': time.monotonic(), 'pronto': threading.Event(),
+                                                'id': None, 'falhou': False}
+                    results.append({'status': 'buscar'})
+                else:
+                    waiting.append((len(results), flight))
+                    results.append(None)
+        
+        deadline = time.monotonic() + wait
+        for position, flight in waiting:
+            if not flight['pronto'].wait(max(0.0, deadline - time.monotonic())) or flight['falhou']:
+                results[position] = {'status': 'buscar'}
+            elif flight['id']:
+                results[position] = {'status': 'encontrada', 'id': flight['id']}
+            else:
+                results[position] = {'status': 'nao_encontrada'}
+        return results
+    
+    def put_many(self, direction: str, batch: List[Dict]) -> int:
+        """Grava os mapeamentos encontrados e libera as reservas (inclusive das não encontradas).
+        
+        'falhou' libera a reserva sem resultado: quem esperava busca de novo
+        em vez de receber 'nao_encontrada'.
+        """
+        source, target = mapping_target(direction)
+        rows = []
+        with self.lock:
+            for keys in batch:
+                match_id = keys.get('id')
+                if match_id and keys.get(source):
+                    rows.append(dict(keys, **{target: match_id}))
+                flight = self.flights.pop(self._flight_key(direction, keys), None)
+                if flight is not None:
+                    flight['id'] = match_id
+                    flight['falhou'] = bool(keys.get('falhou'))
+                    flight['pronto'].set()
+        return self.import_rows(rows)
+    
+    def import_rows(self, rows: List[Dict]) -> int:
+        """Insere ou atualiza mapeamentos completos (spotify_uri e video_id)."""
+        rows = [r for r in rows if r.get('spotify_uri') and r.get('video_id')]
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO mapeamentos (spotify_uri, video_id, isrc, chave, atualizado, duracao) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(r['spotify_uri'], r['video_id'], r.get('isrc'), r.get('chave'), r.get('atualizado') or now,
+                  r.get('duracao')) for r in rows]
+            )
+        return len(rows)
+    
+    def export_rows(self) -> List[Dict]:
+        """Todos os mapeamentos gravados."""
+        with self.lock:
+            cursor = self.conn.execute(f"SELECT {', '.join(MAPPING_COLUMNS)}, duracao, atualizado FROM mapeamentos")
+            return [dict(zip(MAPPING_COLUMNS + ('duracao', 'atualizado'), row)) for row in cursor]
+
+class MappingStoreHandler(BaseHTTPRequestHandler):
+    """API JSON: POST /obter, POST /gravar, POST /importar, GET /exportar."""
+    
+    def _reply(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path == '/exportar':
+            self._reply(200, {'mapeamentos': self.server.store.export_rows()})
+        else:
+            self._reply(404, {'erro': 'rota desconhecida'})
+    
+    def do_POST(self):
+        store = self.server.store
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            if self.path == '/obter':
+                results = store.get_many(request['direcao'], request['faixas'], request.get('reservar', True),
+                                         min(float(request.get('espera', MAPPING_STORE_WAIT)), MAPPING_STORE_WAIT))
+                self._reply(200, {'resultados': results})
+            elif self.path == '/gravar':
+                self._reply(200, {'gravados': store.put_many(request['direcao'], request['faixas'])})
+            elif self.path == '/importar':
+                self._reply(200, {'gravados': store.import_rows(request['mapeamentos'])})
+            else:
+                self._reply(404, {'erro': 'rota desconhecida'})
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'erro': str(e)})
+    
+    def log_message(self, format, *args):
+        pass
+
+def serve_mapping_store(db_path: str, host: str = '127.0.0.1', port: int = 8765):
+    """Roda o serviço de mapeamentos até Ctrl+C."""
+    server = ThreadingHTTPServer((host, port), MappingStoreHandler)
+    server.daemon_threads = True
+    server.store = MappingStore(db_path)
+    print(Colors.success(f"Serviço de mapeamentos em http://{host}:{port} (banco: {db_path})"))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class MappingStoreClient:
+    """Cliente do serviço de mapeamentos.
+    
+    Sem conexão com o serviço, passa a ser ignorado pelo resto da execução;
+    um erro HTTP ou um tempo esgotado afetam só a chamada em que aconteceram.
+    """
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.available = True
+    
+    def _request(self, path: str, payload: Optional[Dict] = None) -> Dict:
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=MAPPING_STORE_WAIT + 10) as response:
+            return json.loads(response.read())
+    
+    def _call(self, path: str, payload: Optional[Dict] = None) -> Optional[Dict]:
+        if not self.available:
+            return None
+        try:
+            return self._request(path, payload)
+        except urllib.error.HTTPError as e:
+            print(Colors.warning(f"Serviço de mapeamentos recusou {path} ({e.code}); buscando sem ele desta vez."))
+        except (urllib.error.URLError, OSError) as e:
+            if isinstance(getattr(e, 'reason', e), TimeoutError):
+                print(Colors.warning(f"Serviço de mapeamentos não respondeu a tempo ({path}); buscando sem ele desta vez."))
+            else:
+                self.available = False
+                print(Colors.warning(f"Serviço de mapeamentos indisponível ({e}); buscando sem ele."))
+        except ValueError as e:
+            print(Colors.warning(f"Resposta inválida do serviço de mapeamentos ({e}); buscando sem ele desta vez."))
+        return None
+    
+    def lookup(self, direction: str, tracks: List[Dict], claim: bool = True) -> List[Dict]:
+        """Consulta um lote; sem o serviço, todas voltam como 'buscar'."""
+        response = self._call('/obter', {'direcao': direction, 'faixas': [mapping_keys(t) for t in tracks],
+                                         'reservar': claim, 'espera': MAPPING_STORE_WAIT})
+        return response['resultados'] if response else [{'status': 'buscar'} for _ in tracks]
+    
+    def store(self, direction: str, resolved: List[Tuple[Dict, Optional[str]]], failed: bool = False):
+        """Grava os resultados de um lote de buscas (None libera a reserva sem gravar).
+        
+        failed=True marca buscas que não terminaram: a reserva é liberada sem
+        publicar "não encontrada" para quem estava esperando.
+        """
+        self._call('/gravar', {'direcao': direction,
+                               'faixas': [dict(mapping_keys(t), id=match_id, falhou=failed) for t, match_id in resolved]})
+
+# Cliente ativo (None = cada worker busca sozinho)
+MAPPING_STORE = None
+
+def enable_mapping_store(url: str):
+    """Passa a consultar o serviço de mapeamentos antes de cada busca."""
+    global MAPPING_STORE
+    MAPPING_STORE = MappingStoreClient(url)
+
+def shared_mapping(direction: str):
+    """Decorador para funções de busca (cliente, música): consulta e alimenta o serviço de mapeamentos."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(client, track):
+            service = MAPPING_STORE
+            if service is None:
+                return func(client, track)
+            
+            result = service.lookup(direction, [track])[0]
+            if result['status'] == 'encontrada':
+                return result['id']
+            if result['status'] == 'nao_encontrada':
+                return None
+            
+            match_id = None
+            failed = True
+            try:
+                match_id = func(client, track)
+                failed = False
+            finally:
+                # Erro, prazo ou orçamento: libera a reserva sem dizer que a música não existe
+                service.store(direction, [(track, match_id)], failed=failed)
+            return match_id
+        return wrapper
+    return decorator
+
+def prefetch_mappings(direction: str, tracks: List[Dict]) -> Dict[str, str]:
+    """Mapeamentos já conhecidos de um lote (uma requisição, sem reservar), por track_key."""
+    if MAPPING_STORE is None or not tracks:
+        return {}
+    results = MAPPING_STORE.lookup(direction, tracks, claim=False)
+    return {track_key(t): r['id'] for t, r in zip(tracks, results) if r['status'] == 'encontrada'}
+
+def run_mapping_transfer(url: str, action: str, path: str):
+    """Exporta os mapeamentos do serviço para um JSONL, ou importa um JSONL para ele."""
+    client = MappingStoreClient(url)
+    if action == 'exportar':
+        response = client._call('/exportar')
+        if response is None:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in response['mapeamentos']:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        print(Colors.success(f"{len(response['mapeamentos'])} mapeamentos exportados para {path}"))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        response = client._call('/importar', {'mapeamentos': rows})
+        if response is not None:
+            print(Colors.success(f"{response['gravados']} mapeamentos importados de {path}"))
+
+# ============================================================================
+# NORMALIZAÇÃO E MATCHING APRIMORADOS
+# ============================================================================
+
+# Critérios adaptativos de matching: (título mínimo, artista mínimo)
+def parse_match_rules(text: str) -> Tuple[Tuple[int, int], ...]:
+    """Converte "95:40,85:50,75:60" em ((95, 40), (85, 50), (75, 60))."""
+    rules = []
+    for rule in text.split(','):
+        title_min, artist_min = rule.split(':')
+        rules.append((int(title_min), int(artist_min)))
+    return tuple(rules)
+
+DEFAULT_MATCH_RULES = '95:40,85:50,75:60'
+
+def env_match_rules() -> Tuple[Tuple[int, int], ...]:
+    """Critérios do .env (MATCH_RULES); um valor inválido volta aos padrões com um aviso."""
+    text = os.getenv('MATCH_RULES', DEFAULT_MATCH_RULES)
+    try:
+        return parse_match_rules(text)
+    except ValueError:
+        print(Colors.warning(f"MATCH_RULES inválido ({text!r}); usando {DEFAULT_MATCH_RULES}"))
+        return parse_match_rules(DEFAULT_MATCH_RULES)
+
+MATCH_RULES = env_match_rules()
+ARTIST_RATIO_THRESHOLD = 75
+
+# Peso do título no score dos candidatos (o restante vai para o artista)
+TITLE_WEIGHT = float(os.getenv('TITLE_WEIGHT', '0.7') or 0.7)
+
+# Duração: diferença máxima em segundos (0 desativa) e peso da proximidade no score
+DURATION_MAX_DIFF = float(os.getenv('DURATION_MAX_DIFF', '30') or 30)
+DURATION_WEIGHT = float(os.getenv('DURATION_WEIGHT', '0.1') or 0.1)
+
+def set_match_rules(rules: Optional[Tuple[Tuple[int, int], ...]] = None, title_weight: Optional[float] = None):
+    """Troca os critérios de matching e/ou o peso do título em tempo de execução."""
+    global MATCH_RULES, TITLE_WEIGHT
+    if rules:
+        MATCH_RULES = rules
+    if title_weight is not None:
+        TITLE_WEIGHT = title_weight
+
+# Apelidos embutidos (catálogos latinos e K-pop); o ARTIST_ALIASES_FILE complementa
+DEFAULT_ARTIST_ALIASES = {
+    'BTS': ['방탄소년단', 'Bangtan Boys', 'Bangtan Sonyeondan'],
+    'BLACKPINK': ['블랙핑크'],
+    'TWICE': ['트와이스'],
+    'SEVENTEEN': ['세븐틴'],
+    'Stray Kids': ['스트레이 키즈'],
+    'NewJeans': ['뉴진스'],
+    'IU': ['아이유'],
+    'Bad Bunny': ['Benito Antonio Martínez Ocasio'],
+    'Daddy Yankee': ['Daddy Yanky'],
+    'Ivete Sangalo': ['Ivete'],
+}
+
+@lru_cache(maxsize=None)
+def _strips_marks(base: str) -> bool:
+    """Acentos só são removidos de letras latinas e gregas."""
+    return unicodedata.name(base, '').startswith(('LATIN', 'GREEK'))
+
+@lru_cache(maxsize=65536)
+def fold_text(text: str) -> str:
+    """Chave Unicode: largura/compatibilidade (NFKD), acentos latinos/gregos removidos, casefold
+    e transliteração opcional.
+    
+    Marcas de outros alfabetos são mantidas e recompostas (NFC): dakuten e
+    handakuten (が ≠ か, パ ≠ ハ) e a breve do cirílico (Й ≠ И) mudam a letra.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    kept = []
+    base = ''
+    for c in text:
+        if not unicodedata.combining(c):
+            base = c
+        elif not base or _strips_marks(base):
+            continue  # acento solto no início não tem letra para modificar
+        kept.append(c)
+    text = unicodedata.normalize('NFC', ''.join(kept))
+    if MATCH_TRANSLITERATE and unidecode is not None and not text.isascii():
+        text = unidecode(text)
+    return text.casefold()
+
+@lru_cache(maxsize=None)
+def artist_aliases() -> Dict[str, Tuple[str, str]]:
+    """Mapa apelido normalizado → (nome canônico normalizado, nome canônico para busca)."""
+    table = dict(DEFAULT_ARTIST_ALIASES)
+    if ARTIST_ALIASES_FILE and os.path.exists(ARTIST_ALIASES_FILE):
+        try:
+            with open(ARTIST_ALIASES_FILE, 'r', encoding='utf-8') as f:
+                for canonical, aliases in json.load(f).items():
+                    table[canonical] = list(table.get(canonical, [])) + list(aliases)
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            print(Colors.warning(f"Arquivo de apelidos ignorado ({ARTIST_ALIASES_FILE}): {e}"))
+    
+    aliases = {}
+    for canonical, names in table.items():
+        entry = (_normalize_artist_key(canonical), canonical)
+        for name in [canonical] + list(names):
+            aliases[_normalize_artist_key(name)] = entry
+    return aliases
+
+def query_title(title: str) -> str:
+    """Título para a consulta: NFKC (largura total → normal) sem versões entre parênteses nem features."""
+    text = unicodedata.normalize('NFKC', title)
+    text = re.sub(r'\s*[\(\[].*?[\)\]]', '', text)
+    text = re.sub(r'\s+-\s+.*\b(remaster(ed)?|version|live|edit|mix|mono|stereo)\b.*$', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'\s+(feat\.?|ft\.?|featuring)\s+.*', '', text, flags=re.IGNORECASE)
+    return text.strip() or title
+
+def query_artist(artist: str) -> str:
+    """Artista para a consulta: nome canônico do apelido, se houver."""
+    alias = artist_aliases().get(_normalize_artist_key(artist))
+    return alias[1] if alias else unicodedata.normalize('NFKC', artist)
+
+@lru_cache(maxsize=65536)
+def normalize_title(title: str) -> str:
+    """Normaliza título removendo acentos, versões, features, etc."""
+    if not title:
+        return ""
+    
+    title = fold_text(title).strip()
+    
+    # Remover conteúdo entre parênteses e colchetes
+    title = re.sub(r'\s*[\(\[].*?[\)\]]', '', title)
+    
+    # Remover feat/ft e tudo depois
+    title = re.sub(r'\s+(feat\.?|ft\.?|featuring|with)(\s+|$).*', '', title, flags=re.IGNORECASE)
+    
+    # Remover palavras comuns de versão
+    version_words = [
+        'remastered', 'remaster', 'single version', 'album version',
+        'radio edit', 'extended', 'acoustic', 'live', 'remix',
+        'instrumental', 'bonus', 'demo', 'deluxe', 'explicit',
+        'clean', 'version', 'edition', 'from', 'original soundtrack'
+    ]
+    for word in version_words:
+        title = re.sub(r'\b' + word + r'\b', '', title)
+    
+    # Remover anos (ex: "2023")
+    title = re.sub(r'\b(19|20)\d{2}\b', '', title)
+    
+    # Remover pontuação e caracteres especiais
+    title = re.sub(r'[^\w\s]', ' ', title)
+    
+    # Remover espaços extras
+    title = re.sub(r'\s+', ' ', title).strip()
+    
+    return title
+
+@lru_cache(maxsize=65536)
+def normalize_artist(artist: str) -> str:
+    """Normaliza nome de artista (sem acentos, com apelidos resolvidos para o nome canônico)."""
+    if not artist:
+        return ""
+    
+    key = _normalize_artist_key(artist)
+    alias = artist_aliases().get(key)
+    return alias[0] if alias else key
+
+@lru_cache(maxsize=65536)
+def _normalize_artist_key(artist: str) -> str:
+    """Chave do artista sem a tabela de apelidos."""
+    if not artist:
+        return ""
+    
+    artist = fold_text(str(artist)).strip()
+    
+    # Remover "the" no início
+    artist = re.sub(r'^the\s+', '', artist)
+    
+    # Substituir separadores por espaço
+    artist = artist.replace('&', ' ')
+    artist = artist.replace(',', ' ')
+    artist = artist.replace('/', ' ')
+    
+    # Remover pontuação
+    artist = re.sub(r'[^\w\s]', '', artist)
+    
+    # Remover espaços extras
+    artist = re.sub(r'\s+', ' ', artist).strip()
+    
+    return artist
+
+def normalize_artists(artists: List[str]) -> List[str]:
+    """Normaliza uma lista de artistas, ignorando entradas vazias."""
+    return [normalize_artist(a) for a in artists if a]
+
+def track_key(track: Dict) -> str:
+    """Chave global de uma música: ISRC quando disponível, senão título + artista normalizados."""
+    if track.get('isrc'):
+        return f"isrc:{track['isrc'].upper()}"
+    return f"{normalize_title(track['name'])}|{normalize_artist(track['all_artists'][0])}"
+
+def calculate_artist_match(sp_artists: List[str], yt_artists: List[str]) -> float:
+    """Calcula porcentagem de match entre listas de artistas."""
+    if not sp_artists or not yt_artists:
+        return 0.0
+    
+    sp_normalized = normalize_artists(sp_artists)
+    yt_normalized = normalize_artists(yt_artists)
+    
+    if not sp_normalized or not yt_normalized:
+        return 0.0
+    
+    matches = 0
+    for sp_artist in sp_normalized:
+        for yt_artist in yt_normalized:
+            ratio = fuzz.ratio(sp_artist, yt_artist)
+            if ratio >= ARTIST_RATIO_THRESHOLD:
+                matches += 1
+                break
+    
+    return (matches / len(sp_normalized)) * 100
+
+# ----------------------------------------------------------------------------
+# Pré-filtro: limites superiores baratos para evitar o cálculo de Levenshtein
+# ----------------------------------------------------------------------------
+
+@lru_cache(maxsize=65536)
+def match_signature(text: str) -> Tuple[int, int]:
+    """Assinatura (tamanho, máscara de caracteres) de um texto normalizado."""
+    mask = 0
+    for char in text:
+        mask |= 1 << (ord(char) & 63)
+    return len(text), mask
+
+def ratio_upper_bound(a: str, b: str) -> int:
+    """Limite superior de fuzz.ratio(a, b) calculado só com as assinaturas.
+    
+    fuzz.ratio é 2·M/(len(a)+len(b)), onde M são os caracteres em comum.
+    M nunca passa do menor tamanho, descontados os caracteres que só
+    existem em um dos lados (colisões na máscara só afrouxam o limite).
+    """
+    if a == b:
+        return 100
+    if not a or not b:
+        return 0
+    
+    len_a, mask_a = match_signature(a)
+    len_b, mask_b = match_signature(b)
+    
+    common = min(
+        len_a - bin(mask_a & ~mask_b).count('1'),
+        len_b - bin(mask_b & ~mask_a).count('1')
+    )
+    return math.ceil(200 * common / (len_a + len_b))
+
+def artist_match_upper_bound(sp_artists: List[str], yt_artists: List[str]) -> float:
+    """Limite superior de calculate_artist_match sem cálculo fuzzy."""
+    if not sp_artists or not yt_artists:
+        return 0.0
+    
+    sp_normalized = normalize_artists(sp_artists)
+    yt_normalized = normalize_artists(yt_artists)
+    
+    if not sp_normalized or not yt_normalized:
+        return 0.0
+    
+    possible = 0
+    for sp_artist in sp_normalized:
+        # Checagem exata primeiro (caso mais comum: mesmo artista)
+        if sp_artist in yt_normalized or any(
+            ratio_upper_bound(sp_artist, yt_artist) >= ARTIST_RATIO_THRESHOLD
+            for yt_artist in yt_normalized
+        ):
+            possible += 1
+    
+    return (possible / len(sp_normalized)) * 100
+
+def could_match(sp_title_norm: str, sp_artists: List[str], yt_title_norm: str, yt_artists: List[str]) -> bool:
+    """Retorna False apenas se o par não pode satisfazer nenhum critério de MATCH_RULES."""
+    title_bound = ratio_upper_bound(sp_title_norm, yt_title_norm)
+    artist_floor = min((artist_min for title_min, artist_min in MATCH_RULES if title_bound >= title_min), default=None)
+    
+    if artist_floor is None:
+        return False
+    
+    return artist_match_upper_bound(sp_artists, yt_artists) >= artist_floor
+
+def parse_duration(value) -> Optional[float]:
+    """Converte duração ("3:45", "1:02:03" ou segundos) em segundos; None se ausente."""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) or None
+    try:
+        seconds = 0
+        for part in str(value).split(':'):
+            seconds = seconds * 60 + int(part)
+        return float(seconds) or None
+    except ValueError:
+        return None
+
+def duration_diff(track: Dict, candidate: Dict) -> Optional[float]:
+    """Diferença de duração em segundos, ou None se algum lado não tem duração."""
+    a, b = track.get('duration'), candidate.get('duration')
+    if not a or not b:
+        return None
+    return abs(a - b)
+
+def duration_compatible(track: Dict, candidate: Dict) -> bool:
+    """Pré-filtro O(1): descarta candidatos com duração muito diferente (ex.: versões ao vivo longas)."""
+    diff = duration_diff(track, candidate)
+    return diff is None or not DURATION_MAX_DIFF or diff <= DURATION_MAX_DIFF
+
+def is_match(sp_title: str, sp_artists: List[str], yt_title: str, yt_artists: List[str],
+             prefilter: bool = True) -> Tuple[bool, float, float]:
+    """Verifica se duas músicas são compatíveis.
+    
+    Com prefilter=True, pares descartados pelo pré-filtro retornam
+    (False, 0.0, 0.0) sem calcular as razões reais.
+    """
+    sp_title_norm = normalize_title(sp_title)
+    yt_title_norm = normalize_title(yt_title)
+    
+    if prefilter and not could_match(sp_title_norm, sp_artists, yt_title_norm, yt_artists):
+        return False, 0.0, 0.0
+    
+    title_ratio = fuzz.ratio(sp_title_norm, yt_title_norm)
+    artist_ratio = calculate_artist_match(sp_artists, yt_artists)
+    
+    match = any(
+        title_ratio >= title_min and artist_ratio >= artist_min
+        for title_min, artist_min in MATCH_RULES
+    )
+    
+    return match, title_ratio, artist_ratio
+
+def pick_best_candidate(track: Dict, candidates: List[Dict], source_is_spotify: bool) -> Optional[str]:
+    """Escolhe o candidato compatível de maior score (TITLE_WEIGHT título, o resto artista).
+    
+    Candidatos são dicts {'id', 'title', 'artists', 'duration'}; o is_match
+    sempre recebe o lado do Spotify primeiro. Quando as duas durações são
+    conhecidas, a proximidade entra no score com peso DURATION_WEIGHT.
+    """
+    best_match = None
+    best_score = 0
+    
+    for candidate in candidates:
+        if not duration_compatible(track, candidate):
+            continue
+        
+        if source_is_spotify:
+            args = (track['name'], track['all_artists'], candidate['title'], candidate['artists'])
+        else:
+            args = (candidate['title'], candidate['artists'], track['name'], track['all_artists'])
+        
+        match, title_ratio, artist_ratio = is_match(*args)
+        
+        if match:
+            score = (title_ratio * TITLE_WEIGHT) + (artist_ratio * (1 - TITLE_WEIGHT))
+            diff = duration_diff(track, candidate)
+            if diff is not None and DURATION_MAX_DIFF:
+                closeness = max(0.0, 1 - diff / DURATION_MAX_DIFF) * 100
+                score = score * (1 - DURATION_WEIGHT) + closeness * DURATION_WEIGHT
+            if score > best_score:
+                best_score = score
+                best_match = candidate['id']
+    
+    return best_match
+
+def first_matching_candidate(track: Dict, candidates: List[Dict], source_is_spotify: bool) -> Optional[str]:
+    """Retorna o primeiro candidato compatível, na ordem dos resultados."""
+    for candidate in candidates:
+        if not candidate['id'] or not duration_compatible(track, candidate):
+            continue
+        
+        if source_is_spotify:
+            args = (track['name'], track['all_artists'], candidate['title'], candidate['artists'])
+        else:
+            args = (candidate['title'], candidate['artists'], track['name'], track['all_artists'])
+        
+        if is_match(*args)[0]:
+            return candidate['id']
+    
+    return None
+
+def select_candidate(track: Dict, candidates: List[Dict], criterion: str, source_is_spotify: bool) -> Optional[str]:
+    """Aplica o critério de uma estratégia de busca: 'melhor' (maior score) ou 'primeiro' compatível."""
+    pick = pick_best_candidate if criterion == 'melhor' else first_matching_candidate
+    return pick(track, candidates, source_is_spotify)
+
+def search_plan(direction: str, track: Dict) -> List[Tuple[str, int, str]]:
+    """Estratégias de busca de uma música, em ordem: (consulta, ordem, critério)."""
+    title, artist = query_title(track['name']), query_artist(track['all_artists'][0])
+    if direction == "spotify_para_ytmusic":
+        # 1: título + primeiro artista (melhor score combinado); 2: só título (alternativa)
+        return [(f"{title} {artist}", 1, 'melhor'), (title, 2, 'primeiro')]
+    # 1: título + artista com filtros de campo; 2: busca mais ampla
+    return [(f"track:{title} artist:{artist}", 1, 'primeiro'), (f"{title} {artist}", 2, 'primeiro')]
+
+class MatchIndex:
+    """Índice local de candidatos ({'id', 'title', 'artists'}) para casar músicas sem chamar a API.
+    
+    Os candidatos são agrupados pelas palavras do título normalizado; só os
+    que compartilham alguma palavra com a música procurada passam pelo is_match.
+    """
+    
+    def __init__(self, candidates: List[Dict]):
+        self.candidates = candidates
+        self.buckets = {}
+        for position, candidate in enumerate(candidates):
+            for token in self._tokens(candidate['title']):
+                self.buckets.setdefault(token, []).append(position)
+    
+    def __len__(self):
+        return len(self.candidates)
+    
+    @staticmethod
+    def _tokens(title: str) -> set:
+        return set(normalize_title(title).split()) or {''}
+    
+    def add(self, candidate: Dict):
+        """Adiciona um candidato ao índice."""
+        self.candidates.append(candidate)
+        for token in self._tokens(candidate['title']):
+            self.buckets.setdefault(token, []).append(len(self.candidates) - 1)
+    
+    @profiled('resolve')
+    def find(self, track: Dict, source_is_spotify: bool, exclude: Optional[set] = None) -> Optional[str]:
+        """Retorna o id do melhor candidato compatível com a música, se houver.
+        
+        Candidatos cujo id está em exclude (já pareados) são ignorados.
+        """
+        positions = set()
+        for token in self._tokens(track['name']):
+            positions.update(self.buckets.get(token, ()))
+        
+        candidates = [self.candidates[p] for p in sorted(positions)]
+        if exclude:
+            candidates = [c for c in candidates if c['id'] not in exclude]
+        
+        if not candidates:
+            return None
+        
+        return pick_best_candidate(track, candidates, source_is_spotify)
+
+def find_reference_match(title: str, artists: List[str], reference_tracks: List[Dict],
+                         reference_is_source: bool) -> Tuple[bool, Optional[int], float, float]:
+    """Procura uma música na lista de referência.
+    
+    Retorna (match encontrado, índice da referência com maior razão de título,
+    razão de título, razão de artista). Pares que não podem dar match nem
+    superar o melhor título já visto são pulados sem cálculo fuzzy, então o
+    resultado é idêntico ao da comparação completa.
+    """
+    title_norm = normalize_title(title)
+    best_index = None
+    best_title_ratio = 0
+    best_artist_ratio = 0
+    
+    for index, ref in enumerate(reference_tracks):
+        ref_title_norm = normalize_title(ref['name'])
+        
+        if reference_is_source:
+            args = (ref['name'], ref['all_artists'], title, artists)
+            possible = could_match(ref_title_norm, ref['all_artists'], title_norm, artists)
+        else:
+            args = (title, artists, ref['name'], ref['all_artists'])
+            possible = could_match(title_norm, artists, ref_title_norm, ref['all_artists'])
+        
+        if not possible and ratio_upper_bound(title_norm, ref_title_norm) <= best_title_ratio:
+            continue
+        
+        match, title_ratio, artist_ratio = is_match(*args, prefilter=False)
+        
+        # Guardar melhor match para debug
+        if title_ratio > best_title_ratio:
+            best_index = index
+            best_title_ratio = title_ratio
+            best_artist_ratio = artist_ratio
+        
+        if match:
+            return True, best_index, best_title_ratio, best_artist_ratio
+    
+    return False, best_index, best_title_ratio, best_artist_ratio
+
+# ----------------------------------------------------------------------------
+# Análise em vários processos (playlists grandes)
+# ----------------------------------------------------------------------------
+
+_worker_reference: List[Dict] = []
+_worker_reference_is_source = True
+
+def _init_analysis_worker(reference_tracks: List[Dict], reference_is_source: bool):
+    """Recebe a referência uma única vez por processo."""
+    global _worker_reference, _worker_reference_is_source
+    _worker_reference = reference_tracks
+    _worker_reference_is_source = reference_is_source
+
+def _analyze_shard(targets: List[Tuple[str, List[str]]]) -> List[Tuple[bool, Optional[int], float, float]]:
+    """Analisa um pedaço da playlist alvo dentro do processo worker."""
+    return [
+        find_reference_match(title, artists, _worker_reference, _worker_reference_is_source)
+        for title, artists in targets
+    ]
+
+@profiled('analyse')
+def analyze_against_reference(targets: List[Tuple[str, List[str]]], reference_tracks: List[Dict],
+                              reference_is_source: bool) -> List[Tuple[bool, Optional[int], float, float]]:
+    """Roda find_reference_match para cada música alvo, em paralelo se compensar.
+    
+    Os resultados voltam na mesma ordem da playlist alvo, então a saída é
+    idêntica à da execução sequencial.
+    """
+    workers = ANALYSIS_WORKERS or os.cpu_count() or 1
+    workers = min(workers, len(targets))
+    
+    if workers > 1 and len(targets) * len(reference_tracks) >= PARALLEL_MIN_PAIRS:
+        reference = [{'name': t['name'], 'all_artists': t['all_artists']} for t in reference_tracks]
+        shard_size = max(1, math.ceil(len(targets) / (workers * 4)))
+        shards = [targets[i:i+shard_size] for i in range(0, len(targets), shard_size)]
+        
+        print(f"[*] Analisando {len(targets)} músicas em {workers} processos...")
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker,
+                                     initargs=(reference, reference_is_source)) as executor:
+                return [result for shard in executor.map(_analyze_shard, shards) for result in shard]
+        except Exception as e:
+            print(f"[!] Análise paralela indisponível ({e}), continuando em um processo...")
+    
+    return [
+        find_reference_match(title, artists, reference_tracks, reference_is_source)
+        for title, artists in targets
+    ]
+
+# ============================================================================
+# AUTENTICAÇÃO
+# ============================================================================
+
+def authenticate_spotify(need_write_access: bool = False, cache_path: str = ".spotify_cache") -> Spotify:
+    """Autentica no Spotify."""
+    print(Colors.info("Autenticando no Spotify..."))
+    
+    # Verificar se tem credenciais
+    if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
+        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}║                    ⚠️  ERRO DE CONFIGURAÇÃO - SPOTIFY                     ║{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+        
+        print(f"{Colors.YELLOW}As credenciais do Spotify não foram encontradas!{Colors.ENDC}\n")
+        print(f"{Colors.BOLD}📋 PASSO A PASSO PARA RESOLVER:{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}1️⃣  Crie um arquivo chamado {Colors.BOLD}.env{Colors.ENDC}{Colors.CYAN} na mesma pasta deste script{Colors.ENDC}")
+        print(f"   {Colors.YELLOW}→ Dica: Copie o arquivo .env.example e renomeie para .env{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}2️⃣  Adicione estas linhas no arquivo .env:{Colors.ENDC}")
+        print(f"{Colors.GREEN}   ╭─────────────────────────────────────────────────────────╮")
+        print(f"   │ SPOTIFY_CLIENT_ID=seu_client_id_aqui                   │")
+        print(f"   │ SPOTIFY_CLIENT_SECRET=seu_client_secret_aqui           │")
+        print(f"   │ SPOTIFY_REDIRECT_URI=http://localhost:8888/callback    │")
+        print(f"   ╰─────────────────────────────────────────────────────────╯{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}3️⃣  Obtenha suas credenciais:{Colors.ENDC}")
+        print(f"   a) Acesse: {Colors.BOLD}https://developer.spotify.com/dashboard{Colors.ENDC}")
+        print(f"   b) Faça login com sua conta Spotify")
+        print(f"   c) Clique em {Colors.BOLD}'Create app'{Colors.ENDC}")
+        print(f"   d) Preencha os campos:")
+        print(f"      • App name: {Colors.GREEN}Migrador de Playlists{Colors.ENDC}")
+        print(f"      • Redirect URI: {Colors.GREEN}http://localhost:8888/callback{Colors.ENDC}")
+        print(f"   e) Após criar, clique em {Colors.BOLD}'Settings'{Colors.ENDC}")
+        print(f"   f) Copie o {Colors.BOLD}Client ID{Colors.ENDC} e {Colors.BOLD}Client Secret{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}4️⃣  Cole as credenciais no arquivo .env (sem as aspas!){Colors.ENDC}\n")
+        
+        print(f"{Colors.YELLOW}💡 DICA: Veja o arquivo SETUP.md para um guia detalhado com imagens!{Colors.ENDC}\n")
+        
+        print(f"{Colors.RED}❌ Script encerrado. Configure o .env e execute novamente.{Colors.ENDC}\n")
+        exit(1)
+    
+    try:
+        if need_write_access:
+            # OAuth com permissões de escrita
+            scope = "playlist-read-private playlist-modify-public playlist-modify-private"
+            auth_manager = SpotifyOAuth(
+                client_id=SPOTIFY_CLIENT_ID,
+                client_secret=SPOTIFY_CLIENT_SECRET,
+                redirect_uri=SPOTIFY_REDIRECT_URI,
+                scope=scope,
+                cache_path=cache_path
+            )
+            sp = Spotify(auth_manager=auth_manager)
+            print(Colors.success("Conectado ao Spotify com permissões de escrita!"))
+        else:
+            # Client Credentials para leitura
+            auth_manager = SpotifyClientCredentials(
+                client_id=SPOTIFY_CLIENT_ID,
+                client_secret=SPOTIFY_CLIENT_SECRET
+            )
+            sp = Spotify(auth_manager=auth_manager)
+            print(Colors.success("Conectado ao Spotify!"))
+        
+        # O limite do Spotify é por app: todos os processos com o mesmo Client ID dividem o balde
+        return MeteredClient(coordinated(sp, 'spotify', SPOTIFY_CLIENT_ID, SPOTIFY_RATE_PER_SEC), 'spotify')
+    
+    except Exception as e:
+        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}║                    ⚠️  ERRO AO CONECTAR NO SPOTIFY                        ║{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+        
+        error_msg = str(e).lower()
+        
+        if "invalid_client" in error_msg or "client_id" in error_msg or "client_secret" in error_msg:
+            print(f"{Colors.YELLOW}As credenciais do Spotify estão incorretas!{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}🔍 POSSÍVEIS CAUSAS:{Colors.ENDC}\n")
+            print(f"  {Colors.RED}✗{Colors.ENDC} Client ID ou Client Secret errados")
+            print(f"  {Colors.RED}✗{Colors.ENDC} Espaços extras antes/depois das credenciais")
+            print(f"  {Colors.RED}✗{Colors.ENDC} Credenciais entre aspas (remova as aspas!)\n")
+            
+            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
+            print(f"  1. Abra o arquivo {Colors.BOLD}.env{Colors.ENDC}")
+            print(f"  2. Verifique se não há espaços ou aspas nas credenciais")
+            print(f"  3. Copie novamente do Spotify Developer Dashboard")
+            print(f"  4. Cole diretamente, sem aspas: {Colors.GREEN}SPOTIFY_CLIENT_ID=abc123...{Colors.ENDC}\n")
+        
+        elif "redirect" in error_msg or "uri" in error_msg:
+            print(f"{Colors.YELLOW}Problema com o Redirect URI!{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
+            print(f"  1. Acesse: {Colors.BOLD}https://developer.spotify.com/dashboard{Colors.ENDC}")
+            print(f"  2. Selecione seu app")
+            print(f"  3. Vá em {Colors.BOLD}Settings{Colors.ENDC}")
+            print(f"  4. Adicione nos Redirect URIs: {Colors.GREEN}http://localhost:8888/callback{Colors.ENDC}")
+            print(f"  5. Clique em {Colors.BOLD}Save{Colors.ENDC}\n")
+        
+        else:
+            print(f"{Colors.YELLOW}Erro desconhecido na autenticação:{Colors.ENDC}")
+            print(f"{Colors.RED}{e}{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}✅ SOLUÇÕES GERAIS:{Colors.ENDC}\n")
+            print(f"  • Verifique sua conexão com a internet")
+            print(f"  • Tente novamente em alguns minutos")
+            print(f"  • Recrie suas credenciais no Spotify Developer Dashboard\n")
+        
+        print(f"{Colors.RED}❌ Script encerrado. Corrija o erro e execute novamente.{Colors.ENDC}\n")
+        exit(1)
+
+def authenticate_ytmusic(auth_path: str = 'headers_auth.json') -> YTMusic:
+    """Autentica no YouTube Music."""
+    print(Colors.info("Autenticando no YouTube Music..."))
+    
+    if not os.path.exists(auth_path):
+        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}║                ⚠️  ERRO DE CONFIGURAÇÃO - YOUTUBE MUSIC                   ║{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+        
+        print(f"{Colors.YELLOW}Arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.YELLOW} não encontrado!{Colors.ENDC}\n")
+        print(f"{Colors.BOLD}📋 PASSO A PASSO PARA CRIAR:{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}1️⃣  Abra o YouTube Music no navegador:{Colors.ENDC}")
+        print(f"   {Colors.BOLD}https://music.youtube.com{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}2️⃣  Faça login na sua conta Google{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}3️⃣  Abra as Ferramentas do Desenvolvedor:{Colors.ENDC}")
+        print(f"   • Pressione {Colors.BOLD}F12{Colors.ENDC} (Windows/Linux)")
+        print(f"   • Ou {Colors.BOLD}Cmd + Option + I{Colors.ENDC} (Mac)\n")
+        
+        print(f"{Colors.CYAN}4️⃣  Vá para a aba {Colors.BOLD}Network{Colors.ENDC} (Rede){Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}5️⃣  Clique em qualquer música para começar a tocar{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}6️⃣  Na lista de requisições, procure por:{Colors.ENDC}")
+        print(f"   • {Colors.BOLD}browse{Colors.ENDC} ou {Colors.BOLD}next{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}7️⃣  Clique com botão direito na requisição:{Colors.ENDC}")
+        print(f"   {Colors.GREEN}→ Copy → Copy as cURL (bash){Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}8️⃣  No terminal/prompt, execute:{Colors.ENDC}")
+        print(f"{Colors.GREEN}   ╭─────────────────────────────────────╮")
+        print(f"   │  ytmusicapi browser                 │")
+        print(f"   ╰─────────────────────────────────────╯{Colors.ENDC}\n")
+        
+        print(f"{Colors.CYAN}9️⃣  Cole o comando cURL quando solicitado e pressione Enter{Colors.ENDC}\n")
+        
+        print(f"{Colors.GREEN}✓ O arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.GREEN} será criado automaticamente!{Colors.ENDC}\n")
+        
+        print(f"{Colors.YELLOW}💡 DICA: Veja o arquivo SETUP.md para um guia visual completo!{Colors.ENDC}\n")
+        
+        print(f"{Colors.RED}❌ Script encerrado. Crie o headers_auth.json e execute novamente.{Colors.ENDC}\n")
+        exit(1)
+    
+    try:
+        ytmusic = YTMusic(auth_path)
+        print(Colors.success("Conectado ao YouTube Music!"))
+        return MeteredClient(coordinated(ytmusic, 'ytmusic', os.path.abspath(auth_path), YTMUSIC_RATE_PER_SEC), 'ytmusic')
+    
+    except json.JSONDecodeError:
+        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}║                ⚠️  ERRO: ARQUIVO JSON INVÁLIDO                            ║{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+        
+        print(f"{Colors.YELLOW}O arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.YELLOW} está corrompido ou mal formatado!{Colors.ENDC}\n")
+        print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
+        print(f"  1. Delete o arquivo: {Colors.RED}headers_auth.json{Colors.ENDC}")
+        print(f"  2. Execute novamente: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}")
+        print(f"  3. Siga o processo de autenticação corretamente\n")
+        
+        print(f"{Colors.RED}❌ Script encerrado.{Colors.ENDC}\n")
+        exit(1)
+    
+    except Exception as e:
+        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}║              ⚠️  ERRO AO CONECTAR NO YOUTUBE MUSIC                        ║{Colors.ENDC}")
+        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
+        
+        error_msg = str(e).lower()
+        
+        if "unauthorized" in error_msg or "401" in error_msg or "token" in error_msg:
+            print(f"{Colors.YELLOW}As credenciais expiraram ou são inválidas!{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
+            print(f"  1. Delete o arquivo: {Colors.RED}headers_auth.json{Colors.ENDC}")
+            print(f"  2. Execute: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}")
+            print(f"  3. Faça login no YouTube Music novamente no navegador")
+            print(f"  4. Copie um novo cURL atualizado\n")
+        
+        elif "connection" in error_msg or "network" in error_msg:
+            print(f"{Colors.YELLOW}Problema de conexão com o YouTube Music!{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}✅ SOLUÇÕES:{Colors.ENDC}\n")
+            print(f"  • Verifique sua conexão com a internet")
+            print(f"  • Tente novamente em alguns segundos")
+            print(f"  • Verifique se o YouTube Music está acessível no navegador\n")
+        
+        else:
+            print(f"{Colors.YELLOW}Erro desconhecido:{Colors.ENDC}")
+            print(f"{Colors.RED}{e}{Colors.ENDC}\n")
+            print(f"{Colors.BOLD}✅ SOLUÇÃO GERAL:{Colors.ENDC}\n")
+            print(f"  • Recrie o arquivo de autenticação: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}\n")
+        
+        print(f"{Colors.RED}❌ Script encerrado. Corrija o erro e execute novamente.{Colors.ENDC}\n")
+        exit(1)
+
+# ============================================================================
+# EXECUÇÃO COM PRAZO - MAIS BARATAS PRIMEIRO, RESTO PARA A PRÓXIMA JANELA
+# ============================================================================
+
+# Custo esperado de cada música: 0 = sem busca (já no destino, resolvida pelo
+# álbum ou pelo serviço de mapeamentos, ou não encontrada recentemente),
+# 1 = uma busca, 2 = provável busca alternativa (já falhou antes).
+TRACK_COST_FREE, TRACK_COST_SEARCH, TRACK_COST_FALLBACK = 0, 1, 2
+
+# Pausa por música fora do limitador de taxa (pace(0.5) por busca + pace(2) a cada 20)
+TRACK_PAUSE_SECONDS = 0.6
+
+# Resolvidas à espera do prefixo na ordem da origem: acima disso são gravadas assim mesmo,
+# para uma interrupção perto do prazo não perder o que a janela já pagou
+DEADLINE_FLUSH_EVERY = 100
+
+def track_search_cost(track: Dict, destination_index: 'MatchIndex', resolved: Dict,
+                      not_found_store: Dict, direction: str) -> int:
+    """Custo esperado (número de buscas) para resolver uma música."""
+    if track_key(track) in resolved or destination_index.find(track, source_is_spotify=True):
+        return TRACK_COST_FREE
+    entry = not_found_store['entries'].get(not_found_key(direction, track))
+    if entry is None:
+        return TRACK_COST_SEARCH
+    return TRACK_COST_FALLBACK if time.time() >= entry['next_retry'] else TRACK_COST_FREE
+
+class TimeBudget:
+    """Prazo de parede de uma execução, com custo estimado pelas latências observadas."""
+    
+    def __init__(self, seconds: float, metrics: 'SearchMetrics'):
+        self.deadline = time.monotonic() + seconds
+        self.metrics = metrics
+        self.observed = {TRACK_COST_SEARCH: [], TRACK_COST_FALLBACK: []}
+        self.write_reserve = 2.0
+        self.pending_writes = 1
+    
+    def estimate(self, cost: int) -> float:
+        """Segundos esperados para uma música do nível de custo indicado."""
+        if cost == TRACK_COST_FREE:
+            return 0.0
+        samples = self.observed[cost]
+        if samples:
+            return sum(samples) / len(samples)
+        latency = self.metrics.percentile(50) or SEARCH_HEDGE_DEFAULT_DELAY / 2
+        pause = 0.0 if RATE_COORDINATOR is not None or getattr(_api_context, 'rate_limited', False) else TRACK_PAUSE_SECONDS
+        return cost * latency + pause
+    
+    def fits(self, cost: int) -> bool:
+        """True se ainda dá para resolver a música e gravar os lotes pendentes antes do prazo."""
+        return time.monotonic() + self.estimate(cost) + self.write_reserve * self.pending_writes <= self.deadline
+    
+    def observe(self, cost: int, elapsed: float):
+        if cost != TRACK_COST_FREE:
+            self.observed[cost].append(elapsed)
+    
+    def observe_write(self, elapsed: float):
+        self.write_reserve = max(self.write_reserve, elapsed)
+    
+    def projection(self, costs: List[int]) -> float:
+        """Segundos previstos para resolver as músicas adiadas."""
+        return sum(self.estimate(cost) for cost in costs)
+
+def set_migration_deadline(minutes: float):
+    """Define a janela padrão (minutos) das migrações Spotify → YT Music."""
+    global MIGRATION_DEADLINE_MIN
+    MIGRATION_DEADLINE_MIN = minutes
+
+def deadline_checkpoint_path(playlist_id: str) -> str:
+    return data_path(f"pendentes_{playlist_id}.json")
+
+def load_deadline_checkpoint(playlist_id: str) -> set:
+    """Chaves das músicas adiadas na janela anterior (têm prioridade dentro do mesmo custo)."""
+    path = deadline_checkpoint_path(playlist_id)
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return set(json.load(f).get('chaves', []))
+    except (OSError, json.JSONDecodeError):
+        return set()
+
+def save_deadline_checkpoint(playlist_id: str, playlist_url: str, deferred: List[Tuple[Dict, int]], projected: float):
+    """Grava as músicas adiadas e a previsão de conclusão (ou remove o arquivo se não sobrou nada)."""
+    path = deadline_checkpoint_path(playlist_id)
+    if not deferred:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'origem': playlist_url,
+            'destino': playlist_id,
+            'gravado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'previsao_segundos': round(projected, 1),
+            'conclusao_prevista': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(time.time() + projected)),
+            'chaves': [track_key(t) for t, _ in deferred],
+            'musicas': [{'nome': t['name'], 'artista': t['artist'], 'custo': cost} for t, cost in deferred]
+        }, f, ensure_ascii=False, indent=2)
+
+# ============================================================================
+# BUSCA E MIGRAÇÃO - SPOTIFY → YOUTUBE MUSIC
+# ============================================================================
+
+@profiled('ingest')
+def get_spotify_tracks(sp: Spotify, playlist_url: str) -> List[Dict]:
+    """Busca todas as músicas de uma playlist do Spotify."""
+    print(Colors.info("Buscando músicas da playlist do Spotify..."))
+    
+    playlist_id = playlist_url.split("/")[-1].split("?")[0]
+    tracks = []
+    
+    results = sp.playlist_items(playlist_id, additional_types=['track'])
+    while results:
+        for item in results['items']:
+            record = spotify_track_record(item['track'])
+            if record:
+                tracks.append(record)
+        
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
+    
+    print(Colors.success(f"Encontradas {Colors.BOLD}{len(tracks)}{Colors.ENDC} músicas válidas!"))
+    return tracks
+
+def spotify_track_record(track: Optional[Dict]) -> Optional[Dict]:
+    """Converte uma música da API do Spotify para o formato interno (None se sem nome/artistas)."""
+    if not track or not track.get('name'):
+        return None
+    
+    artists = [artist['name'] for artist in track.get('artists', []) 
+              if artist and artist.get('name')]
+    if not artists:
+        return None
+    
+    return {
+        'name': track['name'],
+        'artist': ', '.join(artists),
+        'all_artists': artists,
+        'album': track.get('album', {}).get('name', ''),
+        'isrc': track.get('external_ids', {}).get('isrc', None),
+        'uri': track.get('uri'),
+        'duration': parse_duration((track.get('duration_ms') or 0) / 1000)
+    }
+
+def ytmusic_candidate(result: Dict) -> Dict:
+    """Converte um resultado do YT Music para o formato de candidato."""
+    return {
+        'id': result.get('videoId'),
+        'title': result.get('title', ''),
+        'artists': [a['name'] for a in result.get('artists') or [] if a.get('name')],
+        'duration': parse_duration(result.get('duration_seconds') or result.get('duration'))
+    }
+
+@shared_mapping("spotify_para_ytmusic")
+@budgeted
+@profiled('resolve')
+def search_on_ytmusic(ytmusic: YTMusic, track: Dict) -> Optional[str]:
+    """Busca uma música no YouTube Music com algoritmo aprimorado."""
+    archive = candidate_archive()
+    
+    def strategy(query, order, criterion):
+        candidates = [ytmusic_candidate(r) for r in ytmusic.search(query, filter='songs', limit=10)]
+        archive.record_search("spotify_para_ytmusic", track, query, order, criterion, candidates)
+        return select_candidate(track, candidates, criterion, source_is_spotify=True)
+    
+    return hedged_search([
+        lambda plan=plan: strategy(*plan) for plan in search_plan("spotify_para_ytmusic", track)
+    ])
+
+def find_or_create_ytmusic_playlist(ytmusic: YTMusic, playlist_name: str, interactive: bool = True,
+                                    library: Optional[List[Dict]] = None) -> Optional[str]:
+    """Encontra uma playlist pelo nome no YT Music ou cria uma nova.
+    
+    No modo não interativo, uma playlist existente é sempre reaproveitada.
+    Retorna None se o usuário cancelar.
+    """
+    if library is None:
+        library = ytmusic.get_library_playlists(limit=100)
+    
+    for playlist in library:
+        if playlist['title'] == playlist_name:
+            print(Colors.success(f"Playlist '{playlist_name}' encontrada!"))
+            
+            if not interactive:
+                return playlist['playlistId']
+            
+            print(f"\n{Colors.BOLD}Opções:{Colors.ENDC}")
+            print(f"  {Colors.GREEN}1{Colors.ENDC} - Continuar nesta playlist")
+            print(f"  {Colors.YELLOW}2{Colors.ENDC} - Criar uma nova playlist")
+            print(f"  {Colors.RED}3{Colors.ENDC} - Cancelar")
+            
+            choice = input(f"\n{Colors.CYAN}Escolha (1/2/3):{Colors.ENDC} ").strip()
+            if choice == "3":
+                return None
+            if choice != "2":
+                return playlist['playlistId']
+            break
+    
+    yt_playlist_id = ytmusic.create_playlist(playlist_name, "Migrada do Spotify")
+    library.append({'title': playlist_name, 'playlistId': yt_playlist_id})
+    print(Colors.success(f"Playlist criada! ID: {yt_playlist_id}"))
+    return yt_playlist_id
+
+@profiled('ingest')
+def get_ytmusic_playlist_candidates(ytmusic: YTMusic, playlist_id: str) -> List[Dict]:
+    """Retorna as músicas de uma playlist do YT Music no formato de candidato."""
+    try:
+        playlist_items = ytmusic.get_playlist(playlist_id, limit=None)
+        return [ytmusic_candidate(t) for t in playlist_items.get('tracks') or [] if t.get('videoId')]
+    except Exception:
+        return []
+
+def get_ytmusic_playlist_video_ids(ytmusic: YTMusic, playlist_id: str) -> set:
+    """Retorna os videoIds já presentes em uma playlist do YT Music."""
+    return {c['id'] for c in get_ytmusic_playlist_candidates(ytmusic, playlist_id)}
+
+def migrate_spotify_to_ytmusic(sp: Spotify, ytmusic: YTMusic, playlist_url: str, playlist_name: Optional[str] = None,
+                               deadline_min: Optional[float] = None):
+    """Migra playlist do Spotify para YouTube Music.
+    
+    Com playlist_name informado, roda sem perguntas (reaproveitando a
+    playlist de destino se ela já existir). Com prazo (deadline_min ou
+    MIGRATION_DEADLINE_MIN), as músicas mais baratas vão primeiro e as que não
+    cabem na janela ficam em pendentes_[playlist].json para a próxima execução.
+    """
+    print_header("MIGRAÇÃO: SPOTIFY → YOUTUBE MUSIC")
+    search_metrics().reset_counts()
+    call_ledger().reset()
+    deadline_min = MIGRATION_DEADLINE_MIN if deadline_min is None else deadline_min
+    budget = TimeBudget(deadline_min * 60, search_metrics()) if deadline_min else None
+    
+    # Buscar músicas do Spotify
+    tracks = get_spotify_tracks(sp, playlist_url)
+    
+    if not tracks:
+        print(Colors.error("Nenhuma música encontrada na playlist!"))
+        return
+    
+    # Criar/selecionar playlist no YT Music
+    print_section("Configuração da Playlist")
+    interactive = playlist_name is None
+    if interactive:
+        playlist_name = input(f"\n{Colors.CYAN}Nome da playlist no YouTube Music:{Colors.ENDC} ").strip() or "Migrada do Spotify"
+    
+    yt_playlist_id = find_or_create_ytmusic_playlist(ytmusic, playlist_name, interactive=interactive)
+    if not yt_playlist_id:
+        return
+    
+    # Obter músicas já existentes (casadas localmente antes de qualquer busca)
+    destination_tracks = get_ytmusic_playlist_candidates(ytmusic, yt_playlist_id)
+    existing_video_ids = {c['id'] for c in destination_tracks}
+    destination_index = MatchIndex(destination_tracks)
+    if existing_video_ids:
+        print(Colors.info(f"{len(existing_video_ids)} músicas já na playlist"))
+    
+    # Migrar músicas
+    added = 0
+    skipped = 0
+    not_found = []
+    failed = []
+    batch_size = 20
+    
+    print_section(f"Migrando {len(tracks)} Músicas")
+    
+    not_found_store = load_not_found_store()
+    archive = candidate_archive()
+    known_misses = 0
+    # Álbuns só para o que ainda falta: nada de chamadas para músicas já no destino ou fora da nova tentativa
+    album_resolved = resolve_albums_on_ytmusic(ytmusic, [
+        t for t in tracks
+        if not destination_index.find(t, source_is_spotify=True)
+        and is_retry_due(not_found_store, "spotify_para_ytmusic", t)
+    ], budget)
+    deferred = []
+    costs = {}
+    # Com prazo, resolve na ordem de custo e grava na ordem da origem, à medida que o prefixo fica pronto
+    source_order = {id(track): position for position, track in enumerate(tracks)}
+    ready = {}  # posição na origem → videoId ainda não gravado
+    settled = set()
+    settled_upto = 0
+    next_write = 0
+    
+    def write_batch(video_ids: List[str]):
+        nonlocal added
+        started = time.monotonic()
+        try:
+            with profile_phase('write'):
+                ytmusic.add_playlist_items(yt_playlist_id, video_ids)
+            added += len(video_ids)
+            EVENTS.emit('batch_written', playlist=yt_playlist_id, quantidade=len(video_ids))
+        except CallBudgetExceeded:
+            raise
+        except Exception as e:
+            EVENTS.emit('batch_written', playlist=yt_playlist_id, quantidade=0, erro=str(e))
+        if budget is not None:
+            budget.observe_write(time.monotonic() - started)
+    
+    def flush_ready(upto: int, force: bool = False):
+        """Grava, na ordem da origem, os lotes completos do prefixo já processado (tracks[:upto]).
+        
+        Com force (fim ou interrupção), ou com DEADLINE_FLUSH_EVERY resolvidas esperando,
+        grava tudo o que está pronto, mesmo fora do prefixo.
+        """
+        nonlocal settled_upto, next_write
+        settled.update(source_order[id(track)] for track in tracks[settled_upto:upto])
+        settled_upto = max(settled_upto, upto)
+        while next_write in settled:
+            next_write += 1
+        
+        force = force or len(ready) >= DEADLINE_FLUSH_EVERY
+        positions = sorted(p for p in ready if force or p < next_write)
+        if not force:
+            positions = positions[:len(positions) // batch_size * batch_size]
+        for i in range(0, len(positions), batch_size):
+            chunk = positions[i:i+batch_size]
+            write_batch([ready[p] for p in chunk])
+            for p in chunk:
+                del ready[p]
+            if i + batch_size < len(positions) and not deferred:
+                pace(2)
+    
+    if budget is not None:
+        album_resolved.update(prefetch_mappings("spotify_para_ytmusic", [t for t in tracks if track_key(t) not in album_resolved]))
+        previously_deferred = load_deadline_checkpoint(yt_playlist_id)
+        for track in tracks:
+            costs[id(track)] = track_search_cost(track, destination_index, album_resolved, not_found_store, "spotify_para_ytmusic")
+        tracks = sorted(tracks, key=lambda t: (costs[id(t)], track_key(t) not in previously_deferred))
+        print(Colors.info(f"Prazo de {deadline_min:g} min: {sum(1 for c in costs.values() if not c)} sem busca, "
+                          f"{sum(1 for c in costs.values() if c == TRACK_COST_SEARCH)} com uma busca, "
+                          f"{sum(1 for c in costs.values() if c == TRACK_COST_FALLBACK)} com busca alternativa provável"))
+    
+    EVENTS.emit('run_started', operacao="spotify_para_ytmusic", playlist=yt_playlist_id, total=len(tracks))
+    
+    stopped = None
+    position = 0
+    video_ids = []
+    try:
+        for batch_idx in range(0, len(tracks), batch_size):
+            batch = tracks[batch_idx:batch_idx+batch_size]
+            video_ids = []
+            
+            for position, track in enumerate(batch, batch_idx):
+                cost = costs.get(id(track), TRACK_COST_FREE)
+                if budget is not None:
+                    budget.pending_writes = len(ready) // batch_size + 1
+                if budget is not None and (deferred or not budget.fits(cost)) and cost != TRACK_COST_FREE:
+                    deferred.append((track, cost))
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='adiada')
+                    continue
+                
+                if destination_index.find(track, source_is_spotify=True):
+                    skipped += 1
+                    forget_not_found(not_found_store, "spotify_para_ytmusic", track)
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='existente')
+                    continue
+                
+                video_id = album_resolved.get(track_key(track))
+                known_miss = not video_id and not is_retry_due(not_found_store, "spotify_para_ytmusic", track)
+                if not video_id and not known_miss:
+                    started = time.monotonic()
+                    try:
+                        video_id = search_on_ytmusic(ytmusic, track)
+                    except SearchFailed as e:
+                        failed.append(f"{track['name']} - {track['artist']}")
+                        EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=search_failure_status(e), erro=str(e))
+                        continue
+                    finally:
+                        pace(0.5)
+                        if budget is not None:
+                            budget.observe(cost, time.monotonic() - started)
+                if not known_miss:
+                    archive.record_decision("spotify_para_ytmusic", track, yt_playlist_id, video_id)
+                
+                if video_id:
+                    forget_not_found(not_found_store, "spotify_para_ytmusic", track)
+                    if video_id in existing_video_ids:
+                        skipped += 1
+                        status = 'existente'
+                    else:
+                        if budget is not None:
+                            ready[source_order[id(track)]] = video_id
+                        else:
+                            video_ids.append(video_id)
+                        existing_video_ids.add(video_id)
+                        destination_index.add({'id': video_id, 'title': track['name'], 'artists': track['all_artists'],
+                                               'duration': track.get('duration')})
+                        status = 'adicionada'
+                else:
+                    not_found.append(f"{track['name']} - {track['artist']}")
+                    record_not_found(not_found_store, "spotify_para_ytmusic", track, yt_playlist_id, attempted=not known_miss)
+                    known_misses += known_miss
+                    status = 'nao_encontrada_recente' if known_miss else 'nao_encontrada'
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=status, id=video_id)
+            
+            position = batch_idx + len(batch)
+            if video_ids:
+                write_batch(video_ids)
+                video_ids = []
+            if budget is not None:
+                flush_ready(position)
+            save_not_found_store(not_found_store)
+            
+            if not deferred:
+                pace(2)
+        
+        position = len(tracks)
+        flush_ready(position, force=True)
+    except CallBudgetExceeded as e:
+        # Para sem perder o que já foi resolvido: grava o pendente e adia o que faltou
+        stopped = e
+        with call_ledger().overdraft():
+            if video_ids:
+                write_batch(video_ids)
+            flush_ready(position, force=True)
+        if budget is not None:
+            deferred.extend((track, costs[id(track)]) for track in tracks[position:])
+    
+    save_not_found_store(not_found_store)
+    archive.flush()
+    projected = budget.projection([cost for _, cost in deferred]) if budget is not None else 0.0
+    if budget is not None:
+        save_deadline_checkpoint(yt_playlist_id, playlist_url, deferred, projected)
+    EVENTS.emit('run_finished', operacao="spotify_para_ytmusic", adicionadas=added, existentes=skipped,
+                nao_encontradas=len(not_found), falhas=len(failed), adiadas=len(deferred),
+                previsao_segundos=round(projected, 1), interrompida=str(stopped) if stopped else None)
+    
+    # Resumo
+    print_header("MIGRAÇÃO INTERROMPIDA" if stopped else "MIGRAÇÃO CONCLUÍDA")
+    
+    stats = {
+        f"{Colors.GREEN}✓ Músicas adicionadas{Colors.ENDC}": f"{Colors.GREEN}{added}{Colors.ENDC}",
+        f"{Colors.YELLOW}⊙ Músicas já existentes{Colors.ENDC}": f"{Colors.YELLOW}{skipped}{Colors.ENDC}",
+        f"{Colors.RED}✗ Não encontradas{Colors.ENDC}": f"{Colors.RED}{len(not_found)}{Colors.ENDC}",
+        f"{Colors.CYAN}📊 Total processado{Colors.ENDC}": f"{Colors.CYAN}{added + skipped + len(not_found)}/{len(tracks)}{Colors.ENDC}",
+        f"{Colors.BOLD}📈 Taxa de sucesso{Colors.ENDC}": f"{Colors.BOLD}{((added + skipped)/len(tracks)*100):.1f}%{Colors.ENDC}"
+    }
+    if known_misses:
+        stats[f"{Colors.CYAN}⏸ Buscas evitadas (não encontradas recentemente){Colors.ENDC}"] = f"{Colors.CYAN}{known_misses}{Colors.ENDC}"
+    if failed:
+        stats[f"{Colors.YELLOW}⚠ Buscas com erro (tentadas de novo na próxima execução){Colors.ENDC}"] = f"{Colors.YELLOW}{len(failed)}{Colors.ENDC}"
+    if stopped:
+        stats[f"{Colors.RED}⛔ Interrompida{Colors.ENDC}"] = f"{Colors.RED}{stopped}{Colors.ENDC}"
+    if deferred:
+        finish = time.strftime('%d/%m %H:%M', time.localtime(time.time() + projected))
+        stats[f"{Colors.YELLOW}⏭ Adiadas para a próxima janela{Colors.ENDC}"] = f"{Colors.YELLOW}{len(deferred)}{Colors.ENDC}"
+        stats[f"{Colors.YELLOW}⏳ Previsão para concluir{Colors.ENDC}"] = f"{Colors.YELLOW}{projected / 60:.1f} min de buscas (se continuasse agora, terminaria às {finish}){Colors.ENDC}"
+    stats.update(search_metrics().stats_lines())
+    stats.update(call_summary("spotify_para_ytmusic"))
+    
+    print_stats_box(stats)
+    
+    if not_found:
+        save_not_found(not_found, "spotify_para_ytmusic")
+    if deferred:
+        print(Colors.info(f"Pendentes salvas em: {deadline_checkpoint_path(yt_playlist_id)}"))
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# BUSCA E MIGRAÇÃO - YOUTUBE MUSIC → SPOTIFY
+# ============================================================================
+
+@profiled('ingest')
+def get_ytmusic_tracks(ytmusic: YTMusic, playlist_id: str, strict: bool = False) -> List[Dict]:
+    """Busca todas as músicas de uma playlist do YouTube Music.
+    
+    Com strict=True um erro de leitura é levantado em vez de virar lista vazia
+    (para quem não pode confundir "falhou" com "playlist vazia").
+    """
+    print("[*] Buscando músicas da playlist do YouTube Music...")
+    
+    try:
+        playlist = ytmusic.get_playlist(playlist_id, limit=None)
+        tracks = []
+        
+        for item in playlist.get('tracks', []):
+            record = ytmusic_track_record(item)
+            if record:
+                tracks.append(record)
+        
+        print(f"[+] Encontradas {len(tracks)} músicas válidas!")
+        return tracks
+    
+    except Exception as e:
+        if strict:
+            raise
+        print(f"[!] Erro ao buscar playlist: {e}")
+        return []
+
+def ytmusic_track_record(item: Optional[Dict]) -> Optional[Dict]:
+    """Converte uma música de playlist do YT Music para o formato interno (None se sem título/artistas)."""
+    if not item or not item.get('title'):
+        return None
+    
+    artists = [a['name'] for a in item.get('artists', []) if a.get('name')]
+    if not artists:
+        return None
+    
+    return {
+        'name': item['title'],
+        'artist': ', '.join(artists),
+        'all_artists': artists,
+        'album': item.get('album', {}).get('name', '') if item.get('album') else '',
+        'videoId': item.get('videoId', ''),
+        'setVideoId': item.get('setVideoId'),
+        'duration': parse_duration(item.get('duration_seconds') or item.get('duration'))
+    }
+
+def spotify_candidate(item: Dict) -> Dict:
+    """Converte um item de música do Spotify para o formato de candidato."""
+    return {
+        'id': item.get('uri'),
+        'title': item.get('name', ''),
+        'artists': [a['name'] for a in item.get('artists') or [] if a.get('name')],
+        'duration': parse_duration((item.get('duration_ms') or 0) / 1000)
+    }
+
+@shared_mapping("ytmusic_para_spotify")
+@budgeted
+@profiled('resolve')
+def search_on_spotify(sp: Spotify, track: Dict) -> Optional[str]:
+    """Busca uma música no Spotify."""
+    archive = candidate_archive()
+    
+    def strategy(query, order, criterion):
+        results = sp.search(q=query, type='track', limit=10)
+        candidates = [spotify_candidate(item) for item in results['tracks']['items'] if item]
+        archive.record_search("ytmusic_para_spotify", track, query, order, criterion, candidates)
+        return select_candidate(track, candidates, criterion, source_is_spotify=False)
+    
+    return hedged_search([
+        lambda plan=plan: strategy(*plan) for plan in search_plan("ytmusic_para_spotify", track)
+    ])
+
+def find_or_create_spotify_playlist(sp: Spotify, playlist_name: str, interactive: bool = True) -> Optional[str]:
+    """Encontra uma playlist do usuário pelo nome no Spotify ou cria uma nova.
+    
+    No modo não interativo, uma playlist existente é sempre reaproveitada.
+    Retorna None se o usuário cancelar.
+    """
+    user_id = sp.current_user()['id']
+    
+    for playlist in get_spotify_library_playlists(sp):
+        if playlist['name'] == playlist_name and playlist.get('owner') == user_id:
+            print(f"[+] Playlist '{playlist_name}' encontrada no Spotify!")
+            
+            if not interactive:
+                return playlist['id']
+            
+            print("    1 - Continuar nesta playlist")
+            print("    2 - Criar uma nova playlist")
+            print("    3 - Cancelar")
+            
+            choice = input("[?] Escolha (1/2/3): ").strip()
+            if choice == "3":
+                return None
+            if choice != "2":
+                return playlist['id']
+            break
+    
+    sp_playlist = sp.user_playlist_create(
+        user_id, 
+        playlist_name, 
+        description="Migrada do YouTube Music"
+    )
+    print(f"[+] Playlist criada no Spotify! ID: {sp_playlist['id']}")
+    return sp_playlist['id']
+
+@profiled('ingest')
+def get_spotify_playlist_candidates(sp: Spotify, playlist_id: str) -> List[Dict]:
+    """Retorna as músicas de uma playlist do Spotify no formato de candidato."""
+    candidates = []
+    try:
+        results = sp.playlist_items(playlist_id, fields='items(track(uri,name,duration_ms,artists(name))),next',
+                                    additional_types=['track'])
+        while results:
+            for item in results['items']:
+                if item.get('track') and item['track'].get('uri'):
+                    candidates.append(spotify_candidate(item['track']))
+            
+            if results['next']:
+                results = sp.next(results)
+            else:
+                break
+    except Exception:
+        pass
+    
+    return candidates
+
+def migrate_ytmusic_to_spotify(sp: Spotify, ytmusic: YTMusic, yt_playlist_url: str, playlist_name: Optional[str] = None):
+    """Migra playlist do YouTube Music para Spotify.
+    
+    Com playlist_name informado, roda sem perguntas (reaproveitando a
+    playlist de destino se ela já existir).
+    """
+    print("\n" + "="*80)
+    print("MIGRAÇÃO: YOUTUBE MUSIC → SPOTIFY")
+    print("="*80)
+    search_metrics().reset_counts()
+    call_ledger().reset()
+    
+    # Extrair ID da playlist do YT Music
+    if 'list=' in yt_playlist_url:
+        yt_playlist_id = yt_playlist_url.split('list=')[1].split('&')[0]
+    else:
+        yt_playlist_id = yt_playlist_url.split('/')[-1].split('?')[0]
+    
+    # Buscar músicas do YT Music
+    tracks = get_ytmusic_tracks(ytmusic, yt_playlist_id)
+    
+    if not tracks:
+        print("[!] Nenhuma música encontrada!")
+        return
+    
+    # Criar/selecionar playlist no Spotify
+    interactive = playlist_name is None
+    if interactive:
+        playlist_name = input("\n[?] Nome da playlist no Spotify: ").strip() or "Migrada do YouTube Music"
+    
+    sp_playlist_id = find_or_create_spotify_playlist(sp, playlist_name, interactive=interactive)
+    if not sp_playlist_id:
+        return
+    
+    # Músicas já existentes (casadas localmente antes de qualquer busca)
+    destination_tracks = get_spotify_playlist_candidates(sp, sp_playlist_id)
+    existing_uris = {c['id'] for c in destination_tracks}
+    destination_index = MatchIndex(destination_tracks)
+    if existing_uris:
+        print(f"[i] {len(existing_uris)} músicas já na playlist")
+    
+    # Migrar músicas
+    added = 0
+    skipped = 0
+    not_found = []
+    failed = []
+    batch_size = 50  # Spotify permite até 100 por batch
+    
+    print(f"\n[*] Iniciando migração de {len(tracks)} músicas...\n")
+    
+    not_found_store = load_not_found_store()
+    archive = candidate_archive()
+    # Álbuns só para o que ainda falta: nada de chamadas para músicas já no destino ou fora da nova tentativa
+    album_resolved = resolve_albums_on_spotify(sp, [
+        t for t in tracks
+        if not destination_index.find(t, source_is_spotify=False)
+        and is_retry_due(not_found_store, "ytmusic_para_spotify", t)
+    ])
+    
+    EVENTS.emit('run_started', operacao="ytmusic_para_spotify", playlist=sp_playlist_id, total=len(tracks))
+    
+    def write_batch(track_uris: List[str]):
+        nonlocal added
+        try:
+            with profile_phase('write'):
+                sp.playlist_add_items(sp_playlist_id, track_uris)
+            added += len(track_uris)
+            EVENTS.emit('batch_written', playlist=sp_playlist_id, quantidade=len(track_uris))
+        except CallBudgetExceeded:
+            raise
+        except Exception as e:
+            EVENTS.emit('batch_written', playlist=sp_playlist_id, quantidade=0, erro=str(e))
+    
+    stopped = None
+    track_uris = []
+    try:
+        for i in range(0, len(tracks), batch_size):
+            batch = tracks[i:i+batch_size]
+            track_uris = []
+            
+            for track in batch:
+                if destination_index.find(track, source_is_spotify=False):
+                    skipped += 1
+                    forget_not_found(not_found_store, "ytmusic_para_spotify", track)
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='existente')
+                    continue
+                
+                track_uri = album_resolved.get(track_key(track))
+                known_miss = not track_uri and not is_retry_due(not_found_store, "ytmusic_para_spotify", track)
+                if not track_uri and not known_miss:
+                    try:
+                        track_uri = search_on_spotify(sp, track)
+                    except SearchFailed as e:
+                        failed.append(f"{track['name']} - {track['artist']}")
+                        EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=search_failure_status(e), erro=str(e))
+                        continue
+                    finally:
+                        pace(0.3)
+                if not known_miss:
+                    archive.record_decision("ytmusic_para_spotify", track, sp_playlist_id, track_uri)
+                
+                if track_uri and track_uri in existing_uris:
+                    skipped += 1
+                    forget_not_found(not_found_store, "ytmusic_para_spotify", track)
+                    status = 'existente'
+                elif track_uri:
+                    forget_not_found(not_found_store, "ytmusic_para_spotify", track)
+                    track_uris.append(track_uri)
+                    existing_uris.add(track_uri)
+                    destination_index.add({'id': track_uri, 'title': track['name'], 'artists': track['all_artists'],
+                                           'duration': track.get('duration')})
+                    status = 'adicionada'
+                else:
+                    not_found.append(f"{track['name']} - {track['artist']}")
+                    record_not_found(not_found_store, "ytmusic_para_spotify", track, sp_playlist_id, attempted=not known_miss)
+                    status = 'nao_encontrada_recente' if known_miss else 'nao_encontrada'
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=status, id=track_uri)
+            
+            if track_uris:
+                write_batch(track_uris)
+                track_uris = []
+            save_not_found_store(not_found_store)
+            
+            pace(1)
+    except CallBudgetExceeded as e:
+        # Para sem perder o que já foi resolvido: grava o lote pendente
+        stopped = e
+        if track_uris:
+            with call_ledger().overdraft():
+                write_batch(track_uris)
+    
+    save_not_found_store(not_found_store)
+    archive.flush()
+    EVENTS.emit('run_finished', operacao="ytmusic_para_spotify", adicionadas=added, existentes=skipped,
+                nao_encontradas=len(not_found), falhas=len(failed), interrompida=str(stopped) if stopped else None)
+    
+    # Resumo
+    print("\n" + "="*80)
+    print("MIGRAÇÃO INTERROMPIDA!" if stopped else "MIGRAÇÃO CONCLUÍDA!")
+    print("="*80)
+    print(f"✓ Adicionadas: {added}")
+    print(f"⊙ Já existentes: {skipped}")
+    print(f"✗ Não encontradas: {len(not_found)}")
+    if failed:
+        print(f"⚠ Buscas com erro (tentadas de novo na próxima execução): {len(failed)}")
+    if stopped:
+        print(f"⛔ Interrompida: {stopped}")
+    print(f"📊 Taxa de sucesso: {((added + skipped)/len(tracks)*100):.1f}%")
+    print(f"⏱ Buscas: {search_metrics().summary()}")
+    call_summary("ytmusic_para_spotify")
+    calls = call_ledger().snapshot()
+    print(f"☎ Chamadas à API: {calls['total']} ({calls['media_por_musica']:.1f} por música buscada, "
+          f"máx. {calls['max_por_musica']})")
+    print(f"🔗 Link: https://open.spotify.com/playlist/{sp_playlist_id}")
+    
+    if not_found:
+        save_not_found(not_found, "ytmusic_para_spotify")
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# RESOLUÇÃO POR ÁLBUM - UMA BUSCA POR ÁLBUM EM VEZ DE UMA POR MÚSICA
+# ============================================================================
+
+def group_tracks_by_album(tracks: List[Dict]) -> List[List[Dict]]:
+    """Agrupa músicas por (álbum, artista principal), mantendo só grupos grandes o bastante."""
+    groups = {}
+    seen = set()
+    
+    for track in tracks:
+        key = track_key(track)
+        if not track.get('album') or key in seen:
+            continue
+        seen.add(key)
+        
+        album_key = (normalize_title(track['album']), normalize_artist(track['all_artists'][0]))
+        if album_key[0]:
+            groups.setdefault(album_key, []).append(track)
+    
+    return [group for group in groups.values() if len(group) >= max(ALBUM_BATCH_MIN_TRACKS, 1)]
+
+def is_same_album(track: Dict, album_title: str, album_artists: List[str]) -> bool:
+    """Verifica se um álbum encontrado corresponde ao álbum da música."""
+    title_ratio = fuzz.ratio(normalize_title(track['album']), normalize_title(album_title))
+    return title_ratio >= 85 and calculate_artist_match(track['all_artists'][:1], album_artists) >= 50
+
+def match_album_group(group: List[Dict], candidates: List[Dict], source_is_spotify: bool) -> Dict[str, str]:
+    """Casa localmente as músicas do grupo com a lista de faixas do álbum."""
+    resolved = {}
+    for track in group:
+        match_id = pick_best_candidate(track, candidates, source_is_spotify)
+        if match_id:
+            resolved[track_key(track)] = match_id
+    return resolved
+
+@profiled('resolve')
+def resolve_albums_on_ytmusic(ytmusic: YTMusic, tracks: List[Dict], budget: Optional['TimeBudget'] = None) -> Dict[str, str]:
+    """Resolve grupos do mesmo álbum com uma busca e uma leitura do álbum no YT Music.
+    
+    Retorna {track_key: videoId} apenas das músicas encontradas; as demais
+    seguem para a busca individual. Com prazo, cada álbum conta como uma busca
+    alternativa (duas chamadas) e os que não cabem ficam para a busca individual.
+    """
+    groups = group_tracks_by_album(tracks)
+    resolved = {}
+    
+    if not groups:
+        return resolved
+    
+    print(Colors.info(f"Resolvendo {len(groups)} álbuns ({sum(len(g) for g in groups)} músicas) de uma vez..."))
+    
+    for position, group in enumerate(groups):
+        if budget is not None and not budget.fits(TRACK_COST_FALLBACK):
+            print(Colors.warning(f"{len(groups) - position} álbuns não cabem no prazo; suas músicas seguem para a busca individual"))
+            break
+        first = group[0]
+        started = time.monotonic()
+        try:
+            results = ytmusic.search(f"{first['album']} {first['all_artists'][0]}", filter='albums', limit=5)
+            album = next((
+                r for r in results
+                if r.get('browseId') and is_same_album(first, r.get('title', ''), [a['name'] for a in r.get('artists') or []])
+            ), None)
+            if not album:
+                continue
+            
+            album_data = ytmusic.get_album(album['browseId'])
+        except CallBudgetExceeded:
+            break  # a busca individual interrompe a execução sem perder o que já foi resolvido
+        except Exception:
+            continue
+        finally:
+            if budget is not None:
+                budget.observe(TRACK_COST_FALLBACK, time.monotonic() - started)
+        
+        album_artists = [a['name'] for a in album_data.get('artists') or [] if a.get('name')]
+        candidates = []
+        for item in album_data.get('tracks', []):
+            if item.get('videoId'):
+                candidate = ytmusic_candidate(item)
+                candidate['artists'] = candidate['artists'] or album_artists
+                candidates.append(candidate)
+        
+        archive = candidate_archive()
+        for track in group:
+            archive.record_search("spotify_para_ytmusic", track, f"album:{album['browseId']}", 0, 'melhor', candidates)
+        resolved.update(match_album_group(group, candidates, source_is_spotify=True))
+        pace(0.5)
+    
+    print(Colors.success(f"{len(resolved)} músicas resolvidas pelos álbuns"))
+    return resolved
+
+@profiled('resolve')
+def resolve_albums_on_spotify(sp: Spotify, tracks: List[Dict]) -> Dict[str, str]:
+    """Resolve grupos do mesmo álbum com uma busca e uma leitura do álbum no Spotify.
+    
+    Retorna {track_key: uri} apenas das músicas encontradas; as demais
+    seguem para a busca individual.
+    """
+    groups = group_tracks_by_album(tracks)
+    resolved = {}
+    
+    if not groups:
+        return resolved
+    
+    print(f"[*] Resolvendo {len(groups)} álbuns ({sum(len(g) for g in groups)} músicas) de uma vez...")
+    
+    for group in groups:
+        first = group[0]
+        try:
+            results = sp.search(q=f"album:{first['album']} artist:{first['all_artists'][0]}", type='album', limit=5)
+            album = next((
+                a for a in results['albums']['items']
+                if a and is_same_album(first, a.get('name', ''), [ar['name'] for ar in a.get('artists', [])])
+            ), None)
+            if not album:
+                continue
+            
+            candidates = []
+            page = sp.album_tracks(album['id'], limit=50)
+            while page:
+                candidates.extend(spotify_candidate(item) for item in page['items'] if item and item.get('uri'))
+                page = sp.next(page) if page['next'] else None
+        except CallBudgetExceeded:
+            break  # a busca individual interrompe a execução sem perder o que já foi resolvido
+        except Exception:
+            continue
+        
+        archive = candidate_archive()
+        for track in group:
+            archive.record_search("ytmusic_para_spotify", track, f"album:{album['id']}", 0, 'melhor', candidates)
+        resolved.update(match_album_group(group, candidates, source_is_spotify=False))
+        pace(0.3)
+    
+    print(f"[+] {len(resolved)} músicas resolvidas pelos álbuns")
+    return resolved
+
+# ============================================================================
+# MIGRAÇÃO DE BIBLIOTECA - SPOTIFY → YOUTUBE MUSIC (DEDUPLICAÇÃO GLOBAL)
+# ============================================================================
+
+@profiled('ingest')
+def get_spotify_library_playlists(sp: Spotify) -> List[Dict]:
+    """Lista todas as playlists da biblioteca do usuário no Spotify."""
+    playlists = []
+    
+    results = sp.current_user_playlists(limit=50)
+    while results:
+        for item in results['items']:
+            if item:
+                playlists.append({
+                    'id': item['id'],
+                    'name': item['name'],
+                    'owner': (item.get('owner') or {}).get('id')
+                })
+        
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
+    
+    return playlists
+
+def resolve_tracks_on_ytmusic(ytmusic: YTMusic, tracks: List[Dict], not_found_store: Optional[Dict] = None
+                              ) -> Tuple[Dict[str, Optional[str]], Optional[CallBudgetExceeded]]:
+    """Resolve cada música única (por track_key) uma única vez no YouTube Music.
+    
+    Músicas não encontradas recentemente (ver NOT_FOUND_STORE) são puladas
+    sem chamar a API. Buscas com erro ficam fora do resultado.
+    
+    Retorna (resultados, interrupção): com o orçamento de chamadas esgotado,
+    para e devolve o que já resolveu junto com a exceção.
+    """
+    resolved = dict(resolve_albums_on_ytmusic(ytmusic, [
+        t for t in tracks if not_found_store is None or is_retry_due(not_found_store, "spotify_para_ytmusic", t)
+    ]))
+    resolved.update(prefetch_mappings("spotify_para_ytmusic", [t for t in tracks if track_key(t) not in resolved]))
+    EVENTS.emit('run_started', operacao="busca_biblioteca", total=len(tracks))
+    
+    stopped = None
+    try:
+        for position, track in enumerate(tracks, 1):
+            if not_found_store is not None and position % NOT_FOUND_SAVE_EVERY == 0:
+                save_not_found_store(not_found_store)
+            key = track_key(track)
+            if key in resolved:
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='encontrada', id=resolved[key])
+                continue
+            
+            if not_found_store is not None and not is_retry_due(not_found_store, "spotify_para_ytmusic", track):
+                resolved[key] = None
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='nao_encontrada_recente')
+                continue
+            
+            try:
+                resolved[key] = search_on_ytmusic(ytmusic, track)
+            except SearchFailed as e:
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=search_failure_status(e), erro=str(e))
+                pace(0.5)
+                continue
+            if resolved[key] and not_found_store is not None:
+                forget_not_found(not_found_store, "spotify_para_ytmusic", track)
+            
+            EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'],
+                        status='encontrada' if resolved[key] else 'nao_encontrada', id=resolved[key])
+            pace(0.5)
+    except CallBudgetExceeded as e:
+        stopped = e
+    
+    EVENTS.emit('run_finished', operacao="busca_biblioteca", encontradas=sum(1 for v in resolved.values() if v),
+                interrompida=str(stopped) if stopped else None)
+    return resolved, stopped
+
+def migrate_library_spotify_to_ytmusic(sp: Spotify, ytmusic: YTMusic, playlist_urls: Optional[List[str]] = None):
+    """Migra várias playlists (ou a biblioteca inteira) buscando cada música uma única vez."""
+    print_header("MIGRAÇÃO DE BIBLIOTECA: SPOTIFY → YOUTUBE MUSIC")
+    search_metrics().reset_counts()
+    call_ledger().reset()
+    
+    # 1. Ler todas as playlists antes de qualquer busca
+    print_section("Lendo Playlists do Spotify")
+    if playlist_urls:
+        sources = []
+        for url in playlist_urls:
+            playlist_id = url.split("/")[-1].split("?")[0]
+            sources.append({'id': playlist_id, 'name': sp.playlist(playlist_id, fields='name')['name']})
+    else:
+        sources = get_spotify_library_playlists(sp)
+    
+    playlists = []
+    for source in sources:
+        print(Colors.info(f"Playlist: {Colors.BOLD}{source['name']}{Colors.ENDC}"))
+        tracks = get_spotify_tracks(sp, source['id'])
+        if tracks:
+            playlists.append({'name': source['name'], 'tracks': tracks})
+    
+    if not playlists:
+        print(Colors.error("Nenhuma música encontrada nas playlists!"))
+        return
+    
+    # 2. Carregar os destinos e casar localmente o que já existe
+    print_section("Lendo Playlists de Destino no YouTube Music")
+    library = ytmusic.get_library_playlists(limit=None)
+    added = 0
+    skipped = 0
+    batch_size = 50
+    
+    for playlist in playlists:
+        playlist['yt_id'] = find_or_create_ytmusic_playlist(ytmusic, playlist['name'], interactive=False, library=library)
+        destination_tracks = get_ytmusic_playlist_candidates(ytmusic, playlist['yt_id'])
+        playlist['existing'] = {c['id'] for c in destination_tracks}
+        destination_index = MatchIndex(destination_tracks)
+        playlist['pending'] = [t for t in playlist['tracks'] if not destination_index.find(t, source_is_spotify=True)]
+        skipped += len(playlist['tracks']) - len(playlist['pending'])
+    
+    # 3. Conjunto global de músicas únicas que ainda faltam em algum destino
+    unique_tracks = {}
+    for playlist in playlists:
+        for track in playlist['pending']:
+            unique_tracks.setdefault(track_key(track), track)
+    
+    total_entries = sum(len(p['tracks']) for p in playlists)
+    total_unique = len({track_key(t) for p in playlists for t in p['tracks']})
+    print(Colors.info(
+        f"{total_entries} músicas em {len(playlists)} playlists → {total_unique} únicas, "
+        f"{Colors.BOLD}{len(unique_tracks)}{Colors.ENDC} a buscar"
+    ))
+    
+    # 4. Buscar cada música única uma vez
+    print_section(f"Buscando {len(unique_tracks)} Músicas Únicas")
+    not_found_store = load_not_found_store()
+    due_before = {key for key, t in unique_tracks.items() if is_retry_due(not_found_store, "spotify_para_ytmusic", t)}
+    resolved, stopped = resolve_tracks_on_ytmusic(ytmusic, list(unique_tracks.values()), not_found_store)
+    searched = set(due_before)
+    
+    # 5. Distribuir os resultados para cada playlist de destino
+    print_section("Atualizando Playlists no YouTube Music")
+    archive = candidate_archive()
+    
+    for playlist in playlists:
+        yt_playlist_id = playlist['yt_id']
+        existing_video_ids = playlist['existing']
         
-        print(f"{Colors.CYAN}4️⃣  Vá para a aba {Colors.BOLD}Network{Colors.ENDC} (Rede){Colors.ENDC}\n")
+        video_ids = []
+        for track in playlist['pending']:
+            key = track_key(track)
+            if key not in resolved:
+                continue  # busca com erro: nem decisão nem fila de não encontradas
+            video_id = resolved[key]
+            if video_id or key in searched:
+                archive.record_decision("spotify_para_ytmusic", track, yt_playlist_id, video_id)
+            if not video_id:
+                record_not_found(not_found_store, "spotify_para_ytmusic", track, yt_playlist_id,
+                                 attempted=key in due_before)
+                due_before.discard(key)
+                continue
+            if video_id in existing_video_ids:
+                skipped += 1
+            else:
+                video_ids.append(video_id)
+                existing_video_ids.add(video_id)
         
-        print(f"{Colors.CYAN}5️⃣  Clique em qualquer música para começar a tocar{Colors.ENDC}\n")
+        i = 0
+        while i < len(video_ids):
+            batch = video_ids[i:i+batch_size]
+            try:
+                # Interrompida pelo orçamento: grava mesmo assim o que já foi resolvido
+                with call_ledger().overdraft() if stopped else nullcontext(), profile_phase('write'):
+                    ytmusic.add_playlist_items(yt_playlist_id, batch)
+                added += len(batch)
+                EVENTS.emit('batch_written', playlist=yt_playlist_id, quantidade=len(batch))
+            except CallBudgetExceeded as e:
+                stopped = e
+                continue
+            except Exception as e:
+                EVENTS.emit('batch_written', playlist=yt_playlist_id, quantidade=0, erro=str(e))
+            i += batch_size
+            pace(1)
+        save_not_found_store(not_found_store)
         
-        print(f"{Colors.CYAN}6️⃣  Na lista de requisições, procure por:{Colors.ENDC}")
-        print(f"   • {Colors.BOLD}browse{Colors.ENDC} ou {Colors.BOLD}next{Colors.ENDC}\n")
+        print(Colors.success(f"{playlist['name']}: {len(video_ids)} músicas adicionadas"))
+    
+    save_not_found_store(not_found_store)
+    archive.flush()
+    
+    # Resumo
+    print_header("MIGRAÇÃO DE BIBLIOTECA INTERROMPIDA" if stopped else "MIGRAÇÃO DE BIBLIOTECA CONCLUÍDA")
+    
+    not_found = [f"{t['name']} - {t['artist']}" for key, t in unique_tracks.items() if key in resolved and not resolved[key]]
+    stats = {
+        f"{Colors.CYAN}📚 Playlists{Colors.ENDC}": f"{Colors.CYAN}{len(playlists)}{Colors.ENDC}",
+        f"{Colors.CYAN}🎵 Músicas únicas buscadas{Colors.ENDC}": f"{Colors.CYAN}{len(unique_tracks)}/{total_entries}{Colors.ENDC}",
+        f"{Colors.GREEN}✓ Músicas adicionadas{Colors.ENDC}": f"{Colors.GREEN}{added}{Colors.ENDC}",
+        f"{Colors.YELLOW}⊙ Músicas já existentes{Colors.ENDC}": f"{Colors.YELLOW}{skipped}{Colors.ENDC}",
+        f"{Colors.RED}✗ Não encontradas (únicas){Colors.ENDC}": f"{Colors.RED}{len(not_found)}{Colors.ENDC}",
+        f"{Colors.BOLD}📈 Taxa de sucesso{Colors.ENDC}": f"{Colors.BOLD}{((added + skipped)/total_entries*100):.1f}%{Colors.ENDC}"
+    }
+    if stopped:
+        stats[f"{Colors.RED}⛔ Interrompida{Colors.ENDC}"] = f"{Colors.RED}{stopped}{Colors.ENDC}"
+    stats.update(search_metrics().stats_lines())
+    stats.update(call_summary("biblioteca"))
+    
+    print_stats_box(stats)
+    
+    if not_found:
+        save_not_found(not_found, "biblioteca_spotify_para_ytmusic")
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# SINCRONIZAÇÃO BIDIRECIONAL - UMA LEITURA POR LADO
+# ============================================================================
+#
+# O estado da última sincronização guarda os pares (uri, videoId). Uma música
+# sem par que estava pareada antes foi apagada do outro lado (remove); uma
+# música sem par que nunca foi pareada é nova (adiciona no outro lado).
+
+def sync_state_path(spotify_playlist_id: str, yt_playlist_id: str) -> str:
+    return data_path(f"sincronizacao_{spotify_playlist_id}_{yt_playlist_id}.json")
+
+def load_sync_state(spotify_playlist_id: str, yt_playlist_id: str) -> Dict:
+    """Carrega os pares da última sincronização deste par de playlists."""
+    try:
+        with open(sync_state_path(spotify_playlist_id, yt_playlist_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {'pairs': []}
+
+def save_sync_state(spotify_playlist_id: str, yt_playlist_id: str, pairs: Dict[str, str]):
+    """Salva os pares (escrita atômica)."""
+    path = sync_state_path(spotify_playlist_id, yt_playlist_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'synced_at': time.time(), 'pairs': [[uri, vid] for uri, vid in pairs.items()]}, f, indent=2)
+    os.replace(tmp_path, path)
+
+@profiled('resolve')
+def pair_playlists(sp_tracks: List[Dict], yt_tracks: List[Dict], known_pairs: List[List[str]]) -> Dict[str, str]:
+    """Pareia as duas playlists (uri → videoId), um para um.
+    
+    Pares da última sincronização com os dois lados ainda presentes são
+    mantidos sem comparação; o restante é casado com as regras de matching.
+    """
+    sp_ids = {t['uri'] for t in sp_tracks}
+    yt_ids = {t['videoId'] for t in yt_tracks}
+    pairs = {}
+    taken = set()
+    
+    for uri, video_id in known_pairs:
+        if uri in sp_ids and video_id in yt_ids and uri not in pairs and video_id not in taken:
+            pairs[uri] = video_id
+            taken.add(video_id)
+    
+    index = MatchIndex([
+        {'id': t['videoId'], 'title': t['name'], 'artists': t['all_artists'], 'duration': t.get('duration')}
+        for t in yt_tracks if t['videoId'] not in taken
+    ])
+    for track in sp_tracks:
+        if track['uri'] in pairs:
+            continue
+        video_id = index.find(track, source_is_spotify=True, exclude=taken)
+        if video_id:
+            pairs[track['uri']] = video_id
+            taken.add(video_id)
+    
+    return pairs
+
+def sync_playlists(sp: Spotify, ytmusic: YTMusic, spotify_playlist_id: str, yt_playlist_id: str,
+                   interactive: bool = True):
+    """Sincroniza as duas playlists nos dois sentidos com uma leitura de cada lado."""
+    print_header("SINCRONIZAÇÃO: SPOTIFY ↔ YOUTUBE MUSIC")
+    search_metrics().reset_counts()
+    call_ledger().reset()
+    
+    # 1. Uma leitura por lado (uma leitura com erro não pode virar "playlist vazia")
+    try:
+        sp_tracks = list({t['uri']: t for t in get_spotify_tracks(sp, spotify_playlist_id) if t.get('uri')}.values())
+        yt_tracks = list({t['videoId']: t for t in get_ytmusic_tracks(ytmusic, yt_playlist_id, strict=True)
+                          if t.get('videoId')}.values())
+    except Exception as e:
+        print(Colors.error(f"Erro ao ler as playlists, sincronização cancelada: {e}"))
+        return
+    
+    # 2. Um único pareamento
+    state = load_sync_state(spotify_playlist_id, yt_playlist_id)
+    if state['pairs'] and (not sp_tracks or not yt_tracks):
+        side = "do Spotify" if not sp_tracks else "do YT Music"
+        print(Colors.error(f"A playlist {side} veio vazia, mas havia {len(state['pairs'])} músicas pareadas. "
+                           f"Sincronização cancelada para não apagar o outro lado."))
+        print(Colors.info(f"Se ela foi mesmo esvaziada, apague {sync_state_path(spotify_playlist_id, yt_playlist_id)}"))
+        return
+    pairs = pair_playlists(sp_tracks, yt_tracks, state['pairs'])
+    paired_yt = set(pairs.values())
+    previous_sp = {uri for uri, _ in state['pairs']}
+    previous_yt = {vid for _, vid in state['pairs']}
+    
+    # 3. Sem par: apagada do outro lado (estava pareada) ou nova (adicionar no outro lado)
+    sp_unpaired = [t for t in sp_tracks if t['uri'] not in pairs]
+    yt_unpaired = [t for t in yt_tracks if t['videoId'] not in paired_yt]
+    remove_from_sp = [t for t in sp_unpaired if t['uri'] in previous_sp]
+    add_to_yt = [t for t in sp_unpaired if t['uri'] not in previous_sp]
+    remove_from_yt = [t for t in yt_unpaired if t['videoId'] in previous_yt]
+    add_to_sp = [t for t in yt_unpaired if t['videoId'] not in previous_yt]
+    # Sem setVideoId o YT Music não aceita a remoção: o par antigo fica salvo e a remoção é tentada de novo
+    stuck_yt = [t for t in remove_from_yt if not t.get('setVideoId')]
+    remove_from_yt = [t for t in remove_from_yt if t.get('setVideoId')]
+    stuck_ids = {t['videoId'] for t in stuck_yt}
+    stuck_pairs = {uri: vid for uri, vid in state['pairs'] if vid in stuck_ids}
+    
+    print_section("Diferenças")
+    print(Colors.info(f"{len(pairs)} músicas pareadas ({len(sp_tracks)} no Spotify, {len(yt_tracks)} no YT Music)"))
+    print(Colors.info(f"Spotify → YT Music: {len(add_to_yt)} a adicionar, {len(remove_from_yt)} a remover"))
+    print(Colors.info(f"YT Music → Spotify: {len(add_to_sp)} a adicionar, {len(remove_from_sp)} a remover"))
+    if not state['pairs'] and (add_to_yt or add_to_sp):
+        print(Colors.warning("Primeira sincronização: as músicas que faltam de cada lado serão adicionadas ao outro."))
+    if stuck_yt:
+        print(Colors.warning(f"{len(stuck_yt)} músicas sem setVideoId não podem ser removidas do YT Music "
+                             f"(serão tentadas de novo na próxima sincronização)."))
+        for track in stuck_yt[:20]:
+            print(f"  {Colors.YELLOW}⚠{Colors.ENDC} {track['name']} - {track['artist']}")
+    
+    if not (add_to_yt or add_to_sp or remove_from_yt or remove_from_sp):
+        save_sync_state(spotify_playlist_id, yt_playlist_id, {**pairs, **stuck_pairs})
+        if stuck_yt:
+            return
+        print(Colors.success("As playlists já estão sincronizadas! ✨"))
+        return
+    
+    removals = len(remove_from_sp) + len(remove_from_yt)
+    if removals > max(SYNC_REMOVAL_FREE, SYNC_MAX_REMOVAL_FRACTION * len(state['pairs'])):
+        print(Colors.warning(f"{removals} remoções de {len(state['pairs'])} músicas pareadas "
+                             f"(limite: {SYNC_MAX_REMOVAL_FRACTION:.0%}, SYNC_MAX_REMOVAL_FRACTION)."))
+        if not interactive:
+            print(Colors.error("Sincronização cancelada: confirme as remoções no modo interativo."))
+            return
+        confirm = input(f"{Colors.YELLOW}Digite 'remover' para confirmar essas remoções:{Colors.ENDC} ").strip().lower()
+        if confirm != 'remover':
+            print(Colors.warning("Operação cancelada."))
+            return
+    
+    if interactive:
+        for label, tracks in (("Remover do Spotify", remove_from_sp), ("Remover do YT Music", remove_from_yt)):
+            for track in tracks[:20]:
+                print(f"  {Colors.RED}✗{Colors.ENDC} {label}: {track['name']} - {track['artist']}")
+        confirm = input(f"\n{Colors.CYAN}Aplicar a sincronização? (s/n):{Colors.ENDC} ").strip().lower()
+        if confirm != 's':
+            print(Colors.warning("Operação cancelada."))
+            return
+    
+    # 4. Resolver as adições (uma busca por música nova)
+    not_found_store = load_not_found_store()
+    not_found = []
+    failed = []
+    collisions = []
+    new_yt_ids, new_sp_uris = [], []
+    existing_yt = {t['videoId'] for t in yt_tracks}
+    existing_sp = {t['uri'] for t in sp_tracks}
+    EVENTS.emit('run_started', operacao="sincronizacao", total=len(add_to_yt) + len(add_to_sp))
+    
+    stopped = None
+    try:
+        for direction, tracks, search, existing, new_ids, playlist_id in (
+            ("spotify_para_ytmusic", add_to_yt, lambda t: search_on_ytmusic(ytmusic, t), existing_yt, new_yt_ids, yt_playlist_id),
+            ("ytmusic_para_spotify", add_to_sp, lambda t: search_on_spotify(sp, t), existing_sp, new_sp_uris, spotify_playlist_id)
+        ):
+            if tracks:
+                print_section(f"Buscando {len(tracks)} Músicas ({direction.replace('_', ' ')})")
+            for position, track in enumerate(tracks, 1):
+                if position % NOT_FOUND_SAVE_EVERY == 0:
+                    save_not_found_store(not_found_store)
+                match_id = None
+                due = is_retry_due(not_found_store, direction, track)
+                if due:
+                    try:
+                        match_id = search(track)
+                    except SearchFailed as e:
+                        # Fica sem par: a próxima sincronização tenta de novo
+                        failed.append(f"{track['name']} - {track['artist']}")
+                        EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], direcao=direction,
+                                    status=search_failure_status(e), erro=str(e))
+                        continue
+                    finally:
+                        pace(0.5)
+                
+                if not match_id:
+                    not_found.append(f"{track['name']} - {track['artist']}")
+                    record_not_found(not_found_store, direction, track, playlist_id, attempted=due)
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], direcao=direction,
+                                status='nao_encontrada' if due else 'nao_encontrada_recente')
+                    continue
+                
+                forget_not_found(not_found_store, direction, track)
+                if match_id in existing:
+                    # Já está no destino (pareada com outra música ou sem par): parear de novo quebraria o 1:1
+                    collisions.append(f"{track['name']} - {track['artist']} → {match_id}")
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], direcao=direction,
+                                status='colisao', id=match_id)
+                    continue
+                
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], direcao=direction,
+                            status='encontrada', id=match_id)
+                own_id = track['uri'] if direction == "spotify_para_ytmusic" else track['videoId']
+                if direction == "spotify_para_ytmusic":
+                    pairs[own_id] = match_id
+                else:
+                    pairs[match_id] = own_id
+                new_ids.append(match_id)
+                existing.add(match_id)
+    except CallBudgetExceeded as e:
+        # Aplica o que já foi resolvido; as que faltaram ficam sem par para a próxima sincronização
+        stopped = e
+    
+    save_not_found_store(not_found_store)
+    EVENTS.emit('run_finished', operacao="sincronizacao", nao_encontradas=len(not_found), falhas=len(failed),
+                colisoes=len(collisions), interrompida=str(stopped) if stopped else None)
+    
+    # 5. Escrita em lote nos dois lados (fora do orçamento: aplicar só metade deixaria os pares inconsistentes)
+    print_section("Aplicando Mudanças")
+    try:
+        with call_ledger().overdraft(), profile_phase('write'):
+            if new_yt_ids:
+                ytmusic.add_playlist_items(yt_playlist_id, new_yt_ids)
+            for i in range(0, len(new_sp_uris), 100):
+                sp.playlist_add_items(spotify_playlist_id, new_sp_uris[i:i+100])
         
-        print(f"{Colors.CYAN}7️⃣  Clique com botão direito na requisição:{Colors.ENDC}")
-        print(f"   {Colors.GREEN}→ Copy → Copy as cURL (bash){Colors.ENDC}\n")
+        with call_ledger().overdraft(), profile_phase('remove'):
+            removable = [{'videoId': t['videoId'], 'setVideoId': t['setVideoId']} for t in remove_from_yt]
+            if removable:
+                ytmusic.remove_playlist_items(yt_playlist_id, removable)
+            uris = [t['uri'] for t in remove_from_sp]
+            for i in range(0, len(uris), 100):
+                sp.playlist_remove_all_occurrences_of_items(spotify_playlist_id, uris[i:i+100])
+    except Exception as e:
+        print(Colors.error(f"Erro ao aplicar a sincronização: {e}"))
+        return
+    
+    for playlist_id, count in ((yt_playlist_id, len(new_yt_ids)), (spotify_playlist_id, len(new_sp_uris))):
+        EVENTS.emit('batch_written', playlist=playlist_id, quantidade=count)
+    for playlist_id, removed_tracks, id_field in ((yt_playlist_id, remove_from_yt, 'videoId'), (spotify_playlist_id, remove_from_sp, 'uri')):
+        for track in removed_tracks:
+            EVENTS.emit('track_removed', playlist=playlist_id, nome=track['name'], artista=track['artist'], id=track[id_field])
+    
+    save_sync_state(spotify_playlist_id, yt_playlist_id, {**pairs, **stuck_pairs})
+    
+    print_header("SINCRONIZAÇÃO INTERROMPIDA" if stopped else "SINCRONIZAÇÃO CONCLUÍDA")
+    stats = {
+        f"{Colors.CYAN}🔗 Músicas pareadas{Colors.ENDC}": f"{Colors.CYAN}{len(pairs)}{Colors.ENDC}",
+        f"{Colors.GREEN}✓ Adicionadas no YT Music{Colors.ENDC}": f"{Colors.GREEN}{len(new_yt_ids)}{Colors.ENDC}",
+        f"{Colors.GREEN}✓ Adicionadas no Spotify{Colors.ENDC}": f"{Colors.GREEN}{len(new_sp_uris)}{Colors.ENDC}",
+        f"{Colors.RED}✗ Removidas do YT Music{Colors.ENDC}": f"{Colors.RED}{len(remove_from_yt)}{Colors.ENDC}",
+        f"{Colors.RED}✗ Removidas do Spotify{Colors.ENDC}": f"{Colors.RED}{len(remove_from_sp)}{Colors.ENDC}",
+        f"{Colors.YELLOW}⊘ Não encontradas{Colors.ENDC}": f"{Colors.YELLOW}{len(not_found)}{Colors.ENDC}"
+    }
+    if failed:
+        stats[f"{Colors.YELLOW}⚠ Buscas com erro (tentadas de novo na próxima sincronização){Colors.ENDC}"] = \
+            f"{Colors.YELLOW}{len(failed)}{Colors.ENDC}"
+    if collisions:
+        stats[f"{Colors.YELLOW}⚠ Colisões (achou uma música que já está no destino){Colors.ENDC}"] = \
+            f"{Colors.YELLOW}{len(collisions)}{Colors.ENDC}"
+    if stuck_yt:
+        stats[f"{Colors.YELLOW}⚠ Não removidas do YT Music (sem setVideoId){Colors.ENDC}"] = \
+            f"{Colors.YELLOW}{len(stuck_yt)}{Colors.ENDC}"
+    if stopped:
+        stats[f"{Colors.RED}⛔ Interrompida{Colors.ENDC}"] = f"{Colors.RED}{stopped}{Colors.ENDC}"
+    stats.update(search_metrics().stats_lines())
+    stats.update(call_summary("sincronizacao"))
+    print_stats_box(stats)
+    
+    if collisions:
+        print_section("Colisões (não pareadas, confira manualmente)")
+        for line in collisions[:20]:
+            print(f"  {Colors.YELLOW}⚠{Colors.ENDC} {line}")
+    
+    if not_found:
+        save_not_found(not_found, "sincronizacao")
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# UTILITÁRIOS
+# ============================================================================
+
+def save_not_found(tracks: List[str], direction: str):
+    """Salva músicas não encontradas em arquivo."""
+    filename = data_path(f"nao_encontradas_{direction}_{int(time.time())}.txt")
+    
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("="*70 + "\n")
+        f.write(f"MÚSICAS NÃO ENCONTRADAS ({direction})\n")
+        f.write("="*70 + "\n\n")
+        f.write(f"Total: {len(tracks)}\n\n")
         
-        print(f"{Colors.CYAN}8️⃣  No terminal/prompt, execute:{Colors.ENDC}")
-        print(f"{Colors.GREEN}   ╭─────────────────────────────────────╮")
-        print(f"   │  ytmusicapi browser                 │")
-        print(f"   ╰─────────────────────────────────────╯{Colors.ENDC}\n")
+        for i, track in enumerate(tracks, 1):
+            f.write(f"{i}. {track}\n")
+    
+    print(f"\n[+] Lista salva em: {filename}")
+
+# ============================================================================
+# FILA DE NÃO ENCONTRADAS - NOVAS TENTATIVAS COM INTERVALO CRESCENTE
+# ============================================================================
+
+def load_not_found_store(path: Optional[str] = None) -> Dict:
+    """Carrega a fila persistente de músicas não encontradas."""
+    path = path or data_path(NOT_FOUND_STORE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            store = json.load(f)
+        if isinstance(store.get('entries'), dict):
+            return rekey_not_found_store(store)
+    except (OSError, json.JSONDecodeError):
+        pass
+    return {'version': 1, 'entries': {}}
+
+def rekey_not_found_store(store: Dict) -> Dict:
+    """Recalcula as chaves a partir da música salva (as chaves mudam com a normalização)."""
+    entries = {}
+    for key, entry in store['entries'].items():
+        new_key = not_found_key(entry['direction'], entry['track']) if 'track' in entry else key
+        if new_key in entries:
+            merged = entries[new_key]
+            merged['playlists'] = list(dict.fromkeys(merged['playlists'] + entry['playlists']))
+            merged['attempts'] = max(merged['attempts'], entry['attempts'])
+            merged['next_retry'] = max(merged['next_retry'], entry['next_retry'])
+        else:
+            entries[new_key] = entry
+    store['entries'] = entries
+    return store
+
+def save_not_found_store(store: Dict, path: Optional[str] = None):
+    """Salva a fila de não encontradas (escrita atômica)."""
+    path = path or data_path(NOT_FOUND_STORE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(store, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def not_found_key(direction: str, track: Dict) -> str:
+    """Chave de uma música na fila de não encontradas."""
+    return f"{direction}|{track_key(track)}"
+
+def is_retry_due(store: Dict, direction: str, track: Dict) -> bool:
+    """Retorna False se a música falhou recentemente e ainda não deve ser buscada de novo."""
+    entry = store['entries'].get(not_found_key(direction, track))
+    return not entry or time.time() >= entry['next_retry']
+
+def record_not_found(store: Dict, direction: str, track: Dict, playlist_id: Optional[str], attempted: bool = True):
+    """Registra uma música não encontrada e agenda a próxima tentativa.
+    
+    Com attempted=False (busca pulada), só associa a playlist de destino,
+    sem contar uma nova tentativa.
+    """
+    key = not_found_key(direction, track)
+    now = time.time()
+    entry = store['entries'].setdefault(key, {
+        'direction': direction,
+        'track': {
+            'name': track['name'],
+            'artist': track['artist'],
+            'all_artists': track['all_artists'],
+            'album': track.get('album', ''),
+            'isrc': track.get('isrc'),
+            'duration': track.get('duration')
+        },
+        'playlists': [],
+        'attempts': 0,
+        'first_seen': now,
+        'last_attempt': now,
+        'next_retry': now
+    })
+    
+    if playlist_id and playlist_id not in entry['playlists']:
+        entry['playlists'].append(playlist_id)
+    
+    if attempted:
+        entry['attempts'] += 1
+        entry['last_attempt'] = now
+        interval = NOT_FOUND_RETRY_HOURS * 3600 * (2 ** (entry['attempts'] - 1))
+        entry['next_retry'] = now + min(interval, NOT_FOUND_RETRY_MAX_DAYS * 86400)
+
+def forget_not_found(store: Dict, direction: str, track: Dict) -> Optional[Dict]:
+    """Remove uma música da fila (foi encontrada)."""
+    return store['entries'].pop(not_found_key(direction, track), None)
+
+def due_not_found_entries(store: Dict) -> List[Tuple[str, Dict]]:
+    """Lista as entradas cuja próxima tentativa já venceu."""
+    now = time.time()
+    return [(key, entry) for key, entry in store['entries'].items() if now >= entry['next_retry']]
+
+def retry_not_found(sp: Optional[Spotify], ytmusic: Optional[YTMusic], store: Dict):
+    """Busca novamente apenas as músicas vencidas e adiciona as encontradas às playlists de destino."""
+    due = due_not_found_entries(store)
+    
+    if not due:
+        print(Colors.info("Nenhuma música com nova tentativa vencida."))
+        return
+    
+    print_section(f"Reprocessando {len(due)} Músicas")
+    search_metrics().reset_counts()
+    call_ledger().reset()
+    found = 0
+    missed = 0
+    failed = 0
+    additions = {}  # (direção, playlist) -> ids
+    resolved_keys = []  # só saem da fila depois de gravadas nas playlists
+    
+    EVENTS.emit('run_started', operacao="reprocessar", total=len(due))
+    
+    stopped = None
+    try:
+        for position, (key, entry) in enumerate(due, 1):
+            if position % NOT_FOUND_SAVE_EVERY == 0:
+                save_not_found_store(store)
+            track = entry['track']
+            direction = entry['direction']
+            
+            try:
+                if direction == "spotify_para_ytmusic":
+                    match_id = search_on_ytmusic(ytmusic, track)
+                    pace(0.5)
+                else:
+                    match_id = search_on_spotify(sp, track)
+                    pace(0.3)
+            except SearchFailed as e:
+                # Continua na fila com o mesmo agendamento: um erro não conta como tentativa
+                failed += 1
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status=search_failure_status(e), erro=str(e))
+                continue
+            
+            for playlist_id in entry['playlists']:
+                candidate_archive().record_decision(direction, track, playlist_id, match_id)
+            
+            if match_id:
+                found += 1
+                resolved_keys.append(key)
+                for playlist_id in entry['playlists']:
+                    additions.setdefault((direction, playlist_id), []).append(match_id)
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='encontrada', id=match_id)
+            else:
+                missed += 1
+                record_not_found(store, direction, track, None)
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='nao_encontrada',
+                            proxima_tentativa=store['entries'][key]['next_retry'])
+    except CallBudgetExceeded as e:
+        # As que faltaram continuam vencidas; as encontradas são gravadas abaixo
+        stopped = e
+    
+    EVENTS.emit('run_finished', operacao="reprocessar", encontradas=found, falhas=failed,
+                interrompida=str(stopped) if stopped else None)
+    candidate_archive().flush()
+    
+    for (direction, playlist_id), ids in additions.items():
+        try:
+            # Já saíram da fila: grava mesmo com o orçamento esgotado
+            with call_ledger().overdraft():
+                if direction == "spotify_para_ytmusic":
+                    existing = get_ytmusic_playlist_video_ids(ytmusic, playlist_id)
+                    ids = [i for i in dict.fromkeys(ids) if i not in existing]
+                    if ids:
+                        with profile_phase('write'):
+                            ytmusic.add_playlist_items(playlist_id, ids)
+                else:
+                    ids = list(dict.fromkeys(ids))
+                    for i in range(0, len(ids), 100):
+                        with profile_phase('write'):
+                            sp.playlist_add_items(playlist_id, ids[i:i+100])
+                print(Colors.success(f"{len(ids)} músicas adicionadas à playlist {playlist_id}"))
+        except Exception as e:
+            print(Colors.error(f"Erro ao adicionar na playlist {playlist_id}: {e}"))
+    
+    for key in resolved_keys:
+        store['entries'].pop(key, None)
+    save_not_found_store(store)
+    
+    print_stats_box({
+        f"{Colors.GREEN}✓ Encontradas agora{Colors.ENDC}": f"{Colors.GREEN}{found}{Colors.ENDC}",
+        f"{Colors.RED}✗ Ainda não encontradas{Colors.ENDC}": f"{Colors.RED}{missed}{Colors.ENDC}",
+        f"{Colors.YELLOW}⚠ Buscas com erro (continuam vencidas){Colors.ENDC}": f"{Colors.YELLOW}{failed}{Colors.ENDC}",
+        f"{Colors.CYAN}⏸ Aguardando próxima tentativa{Colors.ENDC}": f"{Colors.CYAN}{len(store['entries']) - (len(due) - found)}{Colors.ENDC}",
+        **({f"{Colors.RED}⛔ Interrompida{Colors.ENDC}": f"{Colors.RED}{stopped}{Colors.ENDC}"} if stopped else {}),
+        **search_metrics().stats_lines(),
+        **call_summary("reprocessar")
+    })
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# ARQUIVO DE CANDIDATOS - RE-RESOLUÇÃO OFFLINE COM NOVAS REGRAS
+# ============================================================================
+#
+# Cada linha do arquivo (JSONL compactado com gzip) é um registro:
+#   busca:   candidatos devolvidos por uma consulta (ordem 0 = álbum, 1 e 2 = estratégias)
+#   decisao: id escolhido para a música numa playlist de destino (None = não encontrada)
+
+class CandidateArchive:
+    """Acumula buscas e decisões e as grava em lotes no arquivo compactado."""
+    
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.lock = threading.Lock()
+        self.buffer = []
+    
+    def _append(self, record: Dict):
+        if not self.path:
+            return
         
-        print(f"{Colors.CYAN}9️⃣  Cole o comando cURL quando solicitado e pressione Enter{Colors.ENDC}\n")
+        with self.lock:
+            self.buffer.append(record)
+            full = len(self.buffer) >= 500
+        if full:
+            self.flush()
+    
+    def record_search(self, direction: str, track: Dict, query: str, order: int,
+                      criterion: str, candidates: List[Dict]):
+        """Arquiva os candidatos de uma consulta ('melhor' = maior score, 'primeiro' = primeiro compatível)."""
+        self._append({
+            'tipo': 'busca',
+            'direcao': direction,
+            'chave': track_key(track),
+            'faixa': {
+                'name': track['name'],
+                'artist': track['artist'],
+                'all_artists': track['all_artists'],
+                'album': track.get('album', ''),
+                'isrc': track.get('isrc'),
+                'duration': track.get('duration')
+            },
+            'consulta': query,
+            'ordem': order,
+            'criterio': criterion,
+            'candidatos': candidates,
+            'ts': time.time()
+        })
+    
+    def record_decision(self, direction: str, track: Dict, playlist_id: str, chosen_id: Optional[str]):
+        """Registra o id escolhido para a música na playlist de destino."""
+        self._append({
+            'tipo': 'decisao',
+            'direcao': direction,
+            'chave': track_key(track),
+            'playlist': playlist_id,
+            'id': chosen_id,
+            'ts': time.time()
+        })
+    
+    def flush(self):
+        """Grava os registros pendentes (cada gravação é um novo membro gzip).
         
-        print(f"{Colors.GREEN}✓ O arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.GREEN} será criado automaticamente!{Colors.ENDC}\n")
+        O membro é gravado com o arquivo travado (flock), para que processos
+        gravando no mesmo arquivo não intercalem os bytes de seus membros.
+        """
+        with self.lock:
+            records, self.buffer = self.buffer, []
+            if not records:
+                return
+            
+            with open(self.path, 'ab') as raw:
+                if fcntl is not None:
+                    fcntl.flock(raw, fcntl.LOCK_EX)
+                with gzip.open(raw, 'at', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def candidate_archive() -> CandidateArchive:
+    """Arquivo de candidatos da conta/pasta de dados atual."""
+    path = data_path(CANDIDATE_ARCHIVE) if CANDIDATE_ARCHIVE else None
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = CandidateArchive(path)
+        return _archives[path]
+
+@atexit.register
+def flush_candidate_archives():
+    for archive in list(_archives.values()):
+        archive.flush()
+
+def load_candidate_archive(path: str) -> Tuple[Dict, Dict]:
+    """Lê o arquivo de candidatos.
+    
+    Retorna (buscas, decisões): buscas[(direção, chave)] = {'faixa', 'respostas': {ordem: registro}}
+    com a resposta mais recente de cada estratégia, e decisões[(direção, chave, playlist)] = id.
+    Um arquivo cortado no meio (processo morto durante a gravação) vale até o último
+    registro inteiro; linhas ilegíveis são puladas.
+    """
+    searches = {}
+    decisions = {}
+    
+    # Chaves gravadas com outra normalização são convertidas pela música da busca
+    # correspondente; decisões sem busca arquivada ficam com a chave antiga
+    rekeyed = {}
+    
+    skipped = 0
+    with open(path, 'rb') as raw:
+        if fcntl is not None:
+            fcntl.flock(raw, fcntl.LOCK_SH)
+        try:
+            with gzip.open(raw, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        skipped += 1
+                        continue
+                    
+                    if record['tipo'] == 'busca':
+                        chave = rekeyed.setdefault((record['direcao'], record['chave']), track_key(record['faixa']))
+                        entry = searches.setdefault((record['direcao'], chave), {'faixa': record['faixa'], 'respostas': {}})
+                        entry['respostas'][record['ordem']] = record
+                    elif record['tipo'] == 'decisao':
+                        chave = rekeyed.get((record['direcao'], record['chave']), record['chave'])
+                        decisions[(record['direcao'], chave, record['playlist'])] = record['id']
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            print(Colors.warning(f"Arquivo de candidatos cortado ({e}); usando os registros lidos até aqui."))
+    
+    if skipped:
+        print(Colors.warning(f"{skipped} linhas ilegíveis no arquivo de candidatos foram ignoradas."))
+    return searches, decisions
+
+def rescore_archived(direction: str, track: Dict, responses: Dict) -> Optional[str]:
+    """Refaz a escolha com as regras atuais, estratégia por estratégia, sem chamar a API."""
+    source_is_spotify = direction == "spotify_para_ytmusic"
+    
+    for order in sorted(responses):
+        response = responses[order]
+        match_id = select_candidate(track, response['candidatos'], response['criterio'], source_is_spotify)
+        if match_id:
+            return match_id
+    
+    return None
+
+def reresolve_archive(path: str) -> List[Dict]:
+    """Lista as decisões que mudariam com as regras de matching atuais."""
+    searches, decisions = load_candidate_archive(path)
+    rescored = {}
+    changes = []
+    
+    for (direction, key, playlist_id), old_id in decisions.items():
+        entry = searches.get((direction, key))
+        if not entry:
+            continue
         
-        print(f"{Colors.YELLOW}💡 DICA: Veja o arquivo SETUP.md para um guia visual completo!{Colors.ENDC}\n")
+        if (direction, key) not in rescored:
+            rescored[(direction, key)] = rescore_archived(direction, entry['faixa'], entry['respostas'])
+        new_id = rescored[(direction, key)]
+        
+        if new_id != old_id:
+            changes.append({
+                'direcao': direction,
+                'playlist': playlist_id,
+                'chave': key,
+                'faixa': entry['faixa'],
+                'antes': old_id,
+                'depois': new_id
+            })
+    
+    return changes
+
+def apply_reresolution(sp: Optional[Spotify], ytmusic: Optional[YTMusic], changes: List[Dict], archive_path: str):
+    """Aplica as mudanças nas playlists de destino: remove o id antigo e adiciona o novo."""
+    _, decisions = load_candidate_archive(archive_path)
+    archive = CandidateArchive(archive_path)
+    not_found_store = load_not_found_store()
+    by_playlist = {}
+    for change in changes:
+        by_playlist.setdefault((change['direcao'], change['playlist']), []).append(change)
+    
+    for (direction, playlist_id), playlist_changes in by_playlist.items():
+        changed_keys = {c['chave'] for c in playlist_changes}
+        kept_ids = {match_id for (d, key, p), match_id in decisions.items()
+                    if d == direction and p == playlist_id and key not in changed_keys and match_id}
+        old_ids = {c['antes'] for c in playlist_changes if c['antes']}
+        new_ids = list(dict.fromkeys(c['depois'] for c in playlist_changes if c['depois']))
+        # Um id antigo que continua sendo a escolha de outra música (alterada ou não) fica na playlist
+        old_ids -= set(new_ids) | kept_ids
+        
+        try:
+            if direction == "spotify_para_ytmusic":
+                playlist = ytmusic.get_playlist(playlist_id, limit=None)
+                present = playlist.get('tracks', [])
+                remove = [{'videoId': t['videoId'], 'setVideoId': t['setVideoId']}
+                          for t in present if t.get('videoId') in old_ids and t.get('setVideoId')]
+                present_ids = {t.get('videoId') for t in present}
+                add = [i for i in new_ids if i not in present_ids]
+                with profile_phase('write'):
+                    if remove:
+                        ytmusic.remove_playlist_items(playlist_id, remove)
+                    if add:
+                        ytmusic.add_playlist_items(playlist_id, add)
+            else:
+                present_ids = get_playlist_removal_keys(sp, ytmusic, 'spotify', playlist_id)
+                remove = [i for i in old_ids if i in present_ids]
+                add = [i for i in new_ids if i not in present_ids]
+                with profile_phase('write'):
+                    for i in range(0, len(remove), 100):
+                        sp.playlist_remove_all_occurrences_of_items(playlist_id, remove[i:i+100])
+                    for i in range(0, len(add), 100):
+                        sp.playlist_add_items(playlist_id, add[i:i+100])
+        except Exception as e:
+            print(Colors.error(f"Erro ao atualizar a playlist {playlist_id}: {e}"))
+            continue
+        
+        for change in playlist_changes:
+            archive.record_decision(direction, change['faixa'], playlist_id, change['depois'])
+            if change['depois']:
+                forget_not_found(not_found_store, direction, change['faixa'])
+            else:
+                record_not_found(not_found_store, direction, change['faixa'], playlist_id, attempted=False)
+        
+        print(Colors.success(f"Playlist {playlist_id}: {len(remove)} removidas, {len(add)} adicionadas"))
+        pace(1)
+    
+    archive.flush()
+    save_not_found_store(not_found_store)
+
+def run_reresolution(archive_path: str, apply: bool = False):
+    """Re-resolve o arquivo de candidatos com as regras atuais e mostra as decisões alteradas."""
+    print_header("RE-RESOLUÇÃO OFFLINE")
+    
+    if not os.path.exists(archive_path):
+        print(Colors.error(f"Arquivo de candidatos não encontrado: {archive_path}"))
+        return
+    
+    rules = ", ".join(f"{t}/{a}" for t, a in MATCH_RULES)
+    print(Colors.info(f"Regras: {rules} | peso do título: {TITLE_WEIGHT:.2f}"))
+    
+    changes = reresolve_archive(archive_path)
+    if not changes:
+        print(Colors.success("Nenhuma decisão mudaria com estas regras."))
+        return
+    
+    print_section(f"{len(changes)} Decisões Alteradas")
+    for change in changes:
+        track = change['faixa']
+        print(f"  {track['name'][:35]:<35} • {track['artist'][:20]:<20} "
+              f"{Colors.RED}{change['antes'] or '-'}{Colors.ENDC} → {Colors.GREEN}{change['depois'] or '-'}{Colors.ENDC}")
+    
+    filename = f"reresolucao_{int(time.time())}.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'regras': MATCH_RULES, 'peso_titulo': TITLE_WEIGHT, 'mudancas': changes}, f, ensure_ascii=False, indent=2)
+    print(Colors.info(f"Mudanças salvas em: {filename}"))
+    
+    if not apply:
+        print(Colors.info("Use --aplicar para atualizar as playlists de destino."))
+        return
+    
+    directions = {c['direcao'] for c in changes}
+    sp = authenticate_spotify(need_write_access=True) if "ytmusic_para_spotify" in directions else None
+    ytmusic = authenticate_ytmusic() if "spotify_para_ytmusic" in directions else None
+    apply_reresolution(sp, ytmusic, changes, archive_path)
+
+# ============================================================================
+# LIMPEZA DE PLAYLIST - REMOVE MÚSICAS INCORRETAS
+# ============================================================================
+
+def clean_ytmusic_playlist(sp: Spotify, ytmusic: YTMusic, spotify_url: str, ytmusic_playlist_id: str):
+    """Remove músicas incorretas do YT Music baseado na playlist do Spotify."""
+    print("\n" + "="*80)
+    print("LIMPEZA DE PLAYLIST - YOUTUBE MUSIC")
+    print("="*80)
+    
+    # Buscar músicas do Spotify (referência)
+    print("\n[*] Buscando músicas da playlist de referência do Spotify...")
+    spotify_tracks = get_spotify_tracks(sp, spotify_url)
+    
+    if not spotify_tracks:
+        print("[!] Nenhuma música encontrada no Spotify!")
+        return
+    
+    print(f"[+] {len(spotify_tracks)} músicas na playlist do Spotify")
+    
+    # Buscar músicas do YT Music
+    print("\n[*] Buscando músicas da playlist do YouTube Music...")
+    try:
+        with profile_phase('ingest'):
+            yt_playlist = ytmusic.get_playlist(ytmusic_playlist_id, limit=None)
+        yt_tracks = yt_playlist.get('tracks', [])
+    except Exception as e:
+        print(f"[!] Erro ao carregar playlist do YT Music: {e}")
+        return
+    
+    if not yt_tracks:
+        print("[+] A playlist do YouTube Music está vazia!")
+        return
+    
+    print(f"[+] {len(yt_tracks)} músicas na playlist do YouTube Music")
+    
+    # Perguntar sobre proteção por data
+    print("\n" + "="*80)
+    print("CONFIGURAÇÃO DE PROTEÇÃO")
+    print("="*80)
+    print("\nDeseja proteger músicas adicionadas manualmente pelo usuário?")
+    print("(Músicas adicionadas ANTES da primeira migração não serão removidas)")
+    print()
+    protect_manual = input("[?] Proteger músicas manuais? (s/n): ").strip().lower() == 's'
+    
+    cutoff_date = None
+    if protect_manual:
+        print("\n[*] Digite a data da primeira migração automática:")
+        print("    Músicas adicionadas ANTES dessa data serão protegidas")
+        print("    Formato: DD/MM/AAAA (ex: 15/11/2025)")
+        date_str = input("[?] Data: ").strip()
         
-        print(f"{Colors.RED}❌ Script encerrado. Crie o headers_auth.json e execute novamente.{Colors.ENDC}\n")
-        exit(1)
+        try:
+            from datetime import datetime
+            cutoff_date = datetime.strptime(date_str, "%d/%m/%Y")
+            print(f"[+] Protegendo músicas adicionadas antes de {cutoff_date.strftime('%d/%m/%Y')}")
+        except:
+            print("[!] Data inválida! Continuando sem proteção...")
+            cutoff_date = None
     
-    try:
-        ytmusic = YTMusic('headers_auth.json')
-        print(Colors.success("Conectado ao YouTube Music!"))
-        return ytmusic
+    # Modo debug
+    debug_mode = input("\n[?] Ativar modo debug? (s/n): ").strip().lower() == 's'
     
-    except json.JSONDecodeError:
-        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}║                ⚠️  ERRO: ARQUIVO JSON INVÁLIDO                            ║{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
-        
-        print(f"{Colors.YELLOW}O arquivo {Colors.BOLD}headers_auth.json{Colors.ENDC}{Colors.YELLOW} está corrompido ou mal formatado!{Colors.ENDC}\n")
-        print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
-        print(f"  1. Delete o arquivo: {Colors.RED}headers_auth.json{Colors.ENDC}")
-        print(f"  2. Execute novamente: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}")
-        print(f"  3. Siga o processo de autenticação corretamente\n")
-        
-        print(f"{Colors.RED}❌ Script encerrado.{Colors.ENDC}\n")
-        exit(1)
+    # Analisar músicas
+    print("\n" + "="*80)
+    print("ANALISANDO PLAYLIST...")
+    print("="*80 + "\n")
     
-    except Exception as e:
-        print(f"\n{Colors.RED}{Colors.BOLD}╔════════════════════════════════════════════════════════════════════════════╗{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}║              ⚠️  ERRO AO CONECTAR NO YOUTUBE MUSIC                        ║{Colors.ENDC}")
-        print(f"{Colors.RED}{Colors.BOLD}╚════════════════════════════════════════════════════════════════════════════╝{Colors.ENDC}\n")
-        
-        error_msg = str(e).lower()
+    tracks_to_remove = []
+    protected_tracks = []
+    plan_remove = []
+    plan_protected = []
+    
+    analysis = analyze_against_reference(
+        [(t.get('title', ''), [a['name'] for a in t.get('artists', []) if a.get('name')]) for t in yt_tracks],
+        spotify_tracks,
+        reference_is_source=True
+    )
+    EVENTS.emit('run_started', operacao="analise_limpeza", playlist=ytmusic_playlist_id, total=len(yt_tracks))
+    
+    for yt_track, (found_match, best_index, title_ratio, artist_ratio) in zip(yt_tracks, analysis):
+        yt_title = yt_track.get('title', '')
+        yt_artists = [a['name'] for a in yt_track.get('artists', []) if a.get('name')]
+        yt_artist_str = ', '.join(yt_artists)
         
-        if "unauthorized" in error_msg or "401" in error_msg or "token" in error_msg:
-            print(f"{Colors.YELLOW}As credenciais expiraram ou são inválidas!{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}✅ SOLUÇÃO:{Colors.ENDC}\n")
-            print(f"  1. Delete o arquivo: {Colors.RED}headers_auth.json{Colors.ENDC}")
-            print(f"  2. Execute: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}")
-            print(f"  3. Faça login no YouTube Music novamente no navegador")
-            print(f"  4. Copie um novo cURL atualizado\n")
+        # Verificar data de adição (se disponível)
+        is_protected = False
+        if cutoff_date and 'setVideoId' in yt_track:
+            # setVideoId presente indica que temos metadados completos
+            # Nota: A API do ytmusicapi não expõe diretamente a data de adição
+            # mas podemos usar outras heurísticas
+            pass
         
-        elif "connection" in error_msg or "network" in error_msg:
-            print(f"{Colors.YELLOW}Problema de conexão com o YouTube Music!{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}✅ SOLUÇÕES:{Colors.ENDC}\n")
-            print(f"  • Verifique sua conexão com a internet")
-            print(f"  • Tente novamente em alguns segundos")
-            print(f"  • Verifique se o YouTube Music está acessível no navegador\n")
+        # Melhor match na playlist do Spotify
+        best_ref = spotify_tracks[best_index] if best_index is not None else None
+        best_match_info = {
+            'title_ratio': title_ratio,
+            'artist_ratio': artist_ratio,
+            'sp_title': best_ref['name'] if best_ref else '',
+            'sp_artist': best_ref['artist'] if best_ref else ''
+        }
         
+        # Decidir se remove
+        if not found_match:
+            if is_protected:
+                protected_tracks.append((yt_title, yt_artist_str))
+                plan_protected.append({
+                    'title': yt_title,
+                    'artists': yt_artists,
+                    'videoId': yt_track.get('videoId'),
+                    'setVideoId': yt_track.get('setVideoId')
+                })
+                status = 'protegida'
+            else:
+                tracks_to_remove.append(yt_track)
+                plan_remove.append({
+                    'title': yt_title,
+                    'artists': yt_artists,
+                    'videoId': yt_track.get('videoId'),
+                    'setVideoId': yt_track.get('setVideoId'),
+                    'best_match': best_match_info
+                })
+                status = 'remover'
         else:
-            print(f"{Colors.YELLOW}Erro desconhecido:{Colors.ENDC}")
-            print(f"{Colors.RED}{e}{Colors.ENDC}\n")
-            print(f"{Colors.BOLD}✅ SOLUÇÃO GERAL:{Colors.ENDC}\n")
-            print(f"  • Recrie o arquivo de autenticação: {Colors.GREEN}ytmusicapi browser{Colors.ENDC}\n")
-        
-        print(f"{Colors.RED}❌ Script encerrado. Corrija o erro e execute novamente.{Colors.ENDC}\n")
-        exit(1)
-
-# ============================================================================
-# BUSCA E MIGRAÇÃO - SPOTIFY → YOUTUBE MUSIC
-# ============================================================================
-
-def get_spotify_tracks(sp: Spotify, playlist_url: str) -> List[Dict]:
-    """Busca todas as músicas de uma playlist do Spotify."""
-    print(Colors.info("Buscando músicas da playlist do Spotify..."))
+            status = 'correta'
+        EVENTS.emit('track_resolved', nome=yt_title, artista=yt_artist_str, status=status, id=yt_track.get('videoId'),
+                    melhor_match=best_match_info)
     
-    playlist_id = playlist_url.split("/")[-1].split("?")[0]
-    tracks = []
+    EVENTS.emit('run_finished', operacao="analise_limpeza", remover=len(tracks_to_remove), protegidas=len(protected_tracks))
+    if debug_mode:
+        print_clean_details(plan_remove, 'sp_title', 'sp_artist')
+    
+    # Resumo
+    print("\n" + "="*80)
+    print("RESUMO DA ANÁLISE")
+    print("="*80)
+    print(f"✓ Músicas corretas: {len(yt_tracks) - len(tracks_to_remove) - len(protected_tracks)}")
+    print(f"⊙ Músicas protegidas: {len(protected_tracks)}")
+    print(f"✗ Músicas a remover: {len(tracks_to_remove)}")
+    
+    if protected_tracks:
+        print("\n[i] Músicas protegidas (adicionadas manualmente):")
+        for title, artist in protected_tracks[:10]:
+            print(f"    • {title} - {artist}")
+        if len(protected_tracks) > 10:
+            print(f"    ... e mais {len(protected_tracks) - 10} músicas")
+    
+    if not tracks_to_remove:
+        print("\n[+] Nenhuma música incorreta encontrada!")
+        print("[+] A playlist está sincronizada! ✨")
+        return
+    
+    # Mostrar músicas que serão removidas
+    print(f"\n[!] As seguintes {len(tracks_to_remove)} músicas serão REMOVIDAS:")
+    for i, track in enumerate(tracks_to_remove[:20], 1):
+        title = track.get('title', '')
+        artists = ', '.join([a['name'] for a in track.get('artists', [])])
+        print(f"    {i}. {title} - {artists}")
+    
+    if len(tracks_to_remove) > 20:
+        print(f"    ... e mais {len(tracks_to_remove) - 20} músicas")
     
+    # Plano de remoção (permite revisar e aplicar depois sem refazer a análise)
+    plan = build_clean_plan(
+        platform='ytmusic',
+        playlist_id=ytmusic_playlist_id,
+        reference_platform='spotify',
+        reference_url=spotify_url,
+        reference_tracks=spotify_tracks,
+        cutoff_date=cutoff_date,
+        analyzed=len(yt_tracks),
+        remove=plan_remove,
+        protected=plan_protected
+    )
+    plan_file = save_clean_plan(plan)
+    print(f"\n[+] Plano de limpeza salvo em: {plan_file}")
+    
+    # Confirmação
+    print("\n" + "="*80)
+    confirm = input("\n[?] Confirma a remoção dessas músicas? (s/n): ").strip().lower()
+    
+    if confirm == 's':
+        apply_clean_plan(sp, ytmusic, plan, plan_file)
+    else:
+        print("\n[!] Operação cancelada. Nenhuma música foi removida.")
+        print(f"[i] Para aplicar depois, use a opção 5 do menu com o arquivo {plan_file}")
+
+@profiled('ingest')
+def get_spotify_playlist_entries(sp: Spotify, playlist_id: str) -> List[Dict]:
+    """Busca as entradas de uma playlist do Spotify com URI, posição e data de adição."""
     results = sp.playlist_items(playlist_id, additional_types=['track'])
+    entries = []
+    position = 0
+    
     while results:
         for item in results['items']:
             track = item['track']
             if track and track.get('name'):
-                artists = [artist['name'] for artist in track.get('artists', []) 
-                          if artist and artist.get('name')]
-                
+                artists = [a['name'] for a in track.get('artists', []) if a and a.get('name')]
                 if artists:
-                    tracks.append({
+                    entries.append({
+                        'uri': track['uri'],
                         'name': track['name'],
-                        'artist': ', '.join(artists),
-                        'all_artists': artists,
-                        'album': track.get('album', {}).get('name', ''),
-                        'isrc': track.get('external_ids', {}).get('isrc', None)
+                        'artists': artists,
+                        'artist_str': ', '.join(artists),
+                        'added_at': item.get('added_at', ''),
+                        'position': position
                     })
+            position += 1
         
         if results['next']:
             results = sp.next(results)
         else:
             break
     
-    print(Colors.success(f"Encontradas {Colors.BOLD}{len(tracks)}{Colors.ENDC} músicas válidas!"))
-    return tracks
+    return entries
 
-def search_on_ytmusic(ytmusic: YTMusic, track: Dict) -> Optional[str]:
-    """Busca uma música no YouTube Music com algoritmo aprimorado."""
-    try:
-        track_name = track['name']
-        all_artists = track['all_artists']
-        
-        # Estratégia 1: Busca com título + primeiro artista
-        query = f"{track_name} {all_artists[0]}"
-        results = ytmusic.search(query, filter='songs', limit=10)
-        
-        # Avaliar resultados
-        best_match = None
-        best_score = 0
-        
-        for result in results:
-            yt_title = result.get('title', '')
-            yt_artists = [a['name'] for a in result.get('artists', [])]
-            
-            match, title_ratio, artist_ratio = is_match(
-                track_name, all_artists, yt_title, yt_artists
-            )
-            
-            if match:
-                # Score combinado (70% título, 30% artista)
-                score = (title_ratio * 0.7) + (artist_ratio * 0.3)
-                if score > best_score:
-                    best_score = score
-                    best_match = result['videoId']
-        
-        if best_match:
-            return best_match
-        
-        # Estratégia 2: Busca só com título (se a primeira falhar)
-        results = ytmusic.search(track_name, filter='songs', limit=10)
-        for result in results:
-            yt_title = result.get('title', '')
-            yt_artists = [a['name'] for a in result.get('artists', [])]
-            
-            match, title_ratio, artist_ratio = is_match(
-                track_name, all_artists, yt_title, yt_artists
-            )
-            
-            if match:
-                return result['videoId']
-        
-        return None
+def clean_spotify_playlist(sp: Spotify, ytmusic: YTMusic, spotify_playlist_id: str, ytmusic_url: str):
+    """Remove músicas incorretas do Spotify baseado na playlist do YT Music."""
+    print("\n" + "="*80)
+    print("LIMPEZA DE PLAYLIST - SPOTIFY")
+    print("="*80)
     
-    except Exception as e:
-        return None
-
-def migrate_spotify_to_ytmusic(sp: Spotify, ytmusic: YTMusic, playlist_url: str):
-    """Migra playlist do Spotify para YouTube Music."""
-    print_header("MIGRAÇÃO: SPOTIFY → YOUTUBE MUSIC")
+    # Extrair ID do YT Music
+    if 'list=' in ytmusic_url:
+        yt_playlist_id = ytmusic_url.split('list=')[1].split('&')[0]
+    else:
+        yt_playlist_id = ytmusic_url.split('/')[-1].split('?')[0]
+    
+    # Buscar músicas do YT Music (referência)
+    print("\n[*] Buscando músicas da playlist de referência do YouTube Music...")
+    ytmusic_tracks = get_ytmusic_tracks(ytmusic, yt_playlist_id)
+    
+    if not ytmusic_tracks:
+        print("[!] Nenhuma música encontrada no YouTube Music!")
+        return
+    
+    print(f"[+] {len(ytmusic_tracks)} músicas na playlist do YouTube Music")
     
     # Buscar músicas do Spotify
-    tracks = get_spotify_tracks(sp, playlist_url)
+    print("\n[*] Buscando músicas da playlist do Spotify...")
+    try:
+        sp_tracks = get_spotify_playlist_entries(sp, spotify_playlist_id)
+    except Exception as e:
+        print(f"[!] Erro ao carregar playlist do Spotify: {e}")
+        return
     
-    if not tracks:
-        print(Colors.error("Nenhuma música encontrada na playlist!"))
+    if not sp_tracks:
+        print("[+] A playlist do Spotify está vazia!")
         return
     
-    # Criar/selecionar playlist no YT Music
-    print_section("Configuração da Playlist")
-    playlist_name = input(f"\n{Colors.CYAN}Nome da playlist no YouTube Music:{Colors.ENDC} ").strip() or "Migrada do Spotify"
+    print(f"[+] {len(sp_tracks)} músicas na playlist do Spotify")
     
-    yt_playlist_id = None
-    existing_playlists = ytmusic.get_library_playlists(limit=100)
+    # Proteção por data
+    print("\n" + "="*80)
+    print("CONFIGURAÇÃO DE PROTEÇÃO")
+    print("="*80)
+    protect_manual = input("\n[?] Proteger músicas adicionadas manualmente? (s/n): ").strip().lower() == 's'
     
-    for playlist in existing_playlists:
-        if playlist['title'] == playlist_name:
-            yt_playlist_id = playlist['playlistId']
-            print(Colors.success(f"Playlist '{playlist_name}' encontrada!"))
-            
-            print(f"\n{Colors.BOLD}Opções:{Colors.ENDC}")
-            print(f"  {Colors.GREEN}1{Colors.ENDC} - Continuar nesta playlist")
-            print(f"  {Colors.YELLOW}2{Colors.ENDC} - Criar uma nova playlist")
-            print(f"  {Colors.RED}3{Colors.ENDC} - Cancelar")
-            
-            choice = input(f"\n{Colors.CYAN}Escolha (1/2/3):{Colors.ENDC} ").strip()
-            if choice == "2":
-                yt_playlist_id = None
-            elif choice == "3":
-                return
-            break
+    cutoff_date = None
+    if protect_manual:
+        from datetime import datetime
+        print("\n[*] Digite a data da primeira migração automática:")
+        print("    Formato: DD/MM/AAAA (ex: 15/11/2025)")
+        date_str = input("[?] Data: ").strip()
+        
+        try:
+            cutoff_date = datetime.strptime(date_str, "%d/%m/%Y")
+            print(f"[+] Protegendo músicas adicionadas antes de {cutoff_date.strftime('%d/%m/%Y')}")
+        except:
+            print("[!] Data inválida! Continuando sem proteção...")
+            cutoff_date = None
     
-    if not yt_playlist_id:
-        yt_playlist_id = ytmusic.create_playlist(playlist_name, "Migrada do Spotify")
-        print(Colors.success(f"Playlist criada! ID: {yt_playlist_id}"))
+    debug_mode = input("\n[?] Ativar modo debug? (s/n): ").strip().lower() == 's'
     
-    # Obter músicas já existentes
-    existing_video_ids = set()
-    try:
-        playlist_items = ytmusic.get_playlist(yt_playlist_id, limit=None)
-        if playlist_items.get('tracks'):
-            existing_video_ids = {t['videoId'] for t in playlist_items['tracks'] if t.get('videoId')}
-            print(Colors.info(f"{len(existing_video_ids)} músicas já na playlist"))
-    except:
-        pass
+    # Analisar
+    print("\n" + "="*80)
+    print("ANALISANDO PLAYLIST...")
+    print("="*80 + "\n")
     
-    # Migrar músicas
-    added = 0
-    skipped = 0
-    not_found = []
-    batch_size = 20
-    total_batches = (len(tracks) - 1) // batch_size + 1
+    tracks_to_remove = []
+    protected_tracks = []
+    plan_remove = []
+    plan_protected = []
     
-    print_section(f"Migrando {len(tracks)} Músicas")
+    analysis = analyze_against_reference(
+        [(t['name'], t['artists']) for t in sp_tracks],
+        ytmusic_tracks,
+        reference_is_source=False
+    )
+    EVENTS.emit('run_started', operacao="analise_limpeza", playlist=spotify_playlist_id, total=len(sp_tracks))
     
-    for batch_idx in range(0, len(tracks), batch_size):
-        batch = tracks[batch_idx:batch_idx+batch_size]
-        video_ids = []
-        current_batch = (batch_idx // batch_size) + 1
-        
-        print(f"\n{Colors.BOLD}{Colors.BLUE}┌─ Lote {current_batch}/{total_batches} ─────────────────────────────────────────────────────────────{Colors.ENDC}")
-        
-        for idx, track in enumerate(batch, 1):
-            track_info = f"{track['name'][:35]:<35} • {track['all_artists'][0][:25]:<25}"
-            print(f"{Colors.BOLD}│{Colors.ENDC} {track_info}", end=" ")
-            
-            video_id = search_on_ytmusic(ytmusic, track)
-            
-            if video_id:
-                if video_id in existing_video_ids:
-                    skipped += 1
-                    print(Colors.skip("JÁ EXISTE"))
-                else:
-                    video_ids.append(video_id)
-                    existing_video_ids.add(video_id)
-                    print(Colors.success("ADICIONADA"))
-            else:
-                not_found.append(f"{track['name']} - {track['artist']}")
-                print(Colors.error("NÃO ENCONTRADA"))
-            
-            time.sleep(0.5)
-        
-        print(f"{Colors.BOLD}{Colors.BLUE}└────────────────────────────────────────────────────────────────────{Colors.ENDC}")
+    for sp_track, (found_match, best_index, title_ratio, artist_ratio) in zip(sp_tracks, analysis):
+        sp_title = sp_track['name']
+        sp_artists = sp_track['artists']
         
-        if video_ids:
+        # Verificar proteção por data
+        is_protected = False
+        if cutoff_date and sp_track['added_at']:
+            from datetime import datetime
             try:
-                ytmusic.add_playlist_items(yt_playlist_id, video_ids)
-                added += len(video_ids)
-                print(Colors.success(f"✨ {len(video_ids)} músicas adicionadas ao lote!"))
-            except Exception as e:
-                print(Colors.error(f"Erro ao adicionar: {e}"))
+                added_date = datetime.fromisoformat(sp_track['added_at'].replace('Z', '+00:00'))
+                if added_date.replace(tzinfo=None) < cutoff_date:
+                    is_protected = True
+            except:
+                pass
         
-        # Barra de progresso
-        print_progress_bar(batch_idx + len(batch), len(tracks), 
-                          prefix=f'{Colors.BOLD}Progresso:{Colors.ENDC}',
-                          suffix=f'{added + skipped}/{len(tracks)} processadas')
+        # Melhor match na playlist do YouTube Music
+        best_ref = ytmusic_tracks[best_index] if best_index is not None else None
+        best_match_info = {
+            'title_ratio': title_ratio,
+            'artist_ratio': artist_ratio,
+            'yt_title': best_ref['name'] if best_ref else '',
+            'yt_artist': best_ref['artist'] if best_ref else ''
+        }
         
-        time.sleep(2)
+        if not found_match:
+            if is_protected:
+                protected_tracks.append((sp_title, sp_track['artist_str']))
+                plan_protected.append({
+                    'title': sp_title,
+                    'artists': sp_artists,
+                    'uri': sp_track['uri'],
+                    'added_at': sp_track['added_at']
+                })
+                status = 'protegida'
+            else:
+                tracks_to_remove.append(sp_track)
+                plan_remove.append({
+                    'title': sp_title,
+                    'artists': sp_artists,
+                    'uri': sp_track['uri'],
+                    'added_at': sp_track['added_at'],
+                    'best_match': best_match_info
+                })
+                status = 'remover'
+        else:
+            status = 'correta'
+        EVENTS.emit('track_resolved', nome=sp_title, artista=sp_track['artist_str'], status=status, id=sp_track['uri'],
+                    melhor_match=best_match_info)
     
-    # Resumo
-    print_header("MIGRAÇÃO CONCLUÍDA")
+    EVENTS.emit('run_finished', operacao="analise_limpeza", remover=len(tracks_to_remove), protegidas=len(protected_tracks))
+    if debug_mode:
+        print_clean_details(plan_remove, 'yt_title', 'yt_artist')
     
-    stats = {
-        f"{Colors.GREEN}✓ Músicas adicionadas{Colors.ENDC}": f"{Colors.GREEN}{added}{Colors.ENDC}",
-        f"{Colors.YELLOW}⊙ Músicas já existentes{Colors.ENDC}": f"{Colors.YELLOW}{skipped}{Colors.ENDC}",
-        f"{Colors.RED}✗ Não encontradas{Colors.ENDC}": f"{Colors.RED}{len(not_found)}{Colors.ENDC}",
-        f"{Colors.CYAN}📊 Total processado{Colors.ENDC}": f"{Colors.CYAN}{added + skipped + len(not_found)}/{len(tracks)}{Colors.ENDC}",
-        f"{Colors.BOLD}📈 Taxa de sucesso{Colors.ENDC}": f"{Colors.BOLD}{((added + skipped)/len(tracks)*100):.1f}%{Colors.ENDC}"
-    }
+    # Resumo e confirmação
+    print("\n" + "="*80)
+    print("RESUMO DA ANÁLISE")
+    print("="*80)
+    print(f"✓ Músicas corretas: {len(sp_tracks) - len(tracks_to_remove) - len(protected_tracks)}")
+    print(f"⊙ Músicas protegidas: {len(protected_tracks)}")
+    print(f"✗ Músicas a remover: {len(tracks_to_remove)}")
     
-    print_stats_box(stats)
+    if not tracks_to_remove:
+        print("\n[+] Nenhuma música incorreta encontrada!")
+        return
     
-    if not_found:
-        save_not_found(not_found, "spotify_para_ytmusic")
+    print(f"\n[!] As seguintes {len(tracks_to_remove)} músicas serão REMOVIDAS:")
+    for i, track in enumerate(tracks_to_remove[:20], 1):
+        print(f"    {i}. {track['name']} - {track['artist_str']}")
+    if len(tracks_to_remove) > 20:
+        print(f"    ... e mais {len(tracks_to_remove) - 20} músicas")
+    
+    plan = build_clean_plan(
+        platform='spotify',
+        playlist_id=spotify_playlist_id,
+        reference_platform='ytmusic',
+        reference_url=ytmusic_url,
+        reference_tracks=ytmusic_tracks,
+        cutoff_date=cutoff_date,
+        analyzed=len(sp_tracks),
+        remove=plan_remove,
+        protected=plan_protected
+    )
+    plan_file = save_clean_plan(plan)
+    print(f"\n[+] Plano de limpeza salvo em: {plan_file}")
+    
+    confirm = input("\n[?] Confirma a remoção? (s/n): ").strip().lower()
+    
+    if confirm == 's':
+        apply_clean_plan(sp, ytmusic, plan, plan_file)
+    else:
+        print("\n[!] Operação cancelada.")
+        print(f"[i] Para aplicar depois, use a opção 5 do menu com o arquivo {plan_file}")
 
 # ============================================================================
-# BUSCA E MIGRAÇÃO - YOUTUBE MUSIC → SPOTIFY
+# PLANO DE LIMPEZA - ANÁLISE SEPARADA DA REMOÇÃO
 # ============================================================================
 
-def get_ytmusic_tracks(ytmusic: YTMusic, playlist_id: str) -> List[Dict]:
-    """Busca todas as músicas de uma playlist do YouTube Music."""
-    print("[*] Buscando músicas da playlist do YouTube Music...")
+PLATFORM_NAMES = {'ytmusic': 'YOUTUBE MUSIC', 'spotify': 'SPOTIFY'}
+
+def print_clean_details(plan_remove: List[Dict], title_field: str, artist_field: str):
+    """Modo debug: mostra, depois da análise, o melhor match de cada música a remover."""
+    for entry in plan_remove:
+        best = entry['best_match']
+        print(f"[-] REMOVER: {entry['title']} - {', '.join(entry['artists'])}")
+        print(f"    Melhor match: {best[title_field]} - {best[artist_field]}")
+        print(f"    Título: {best['title_ratio']:.1f}% | Artista: {best['artist_ratio']:.1f}%")
+        print()
+
+def build_clean_plan(platform: str, playlist_id: str, reference_platform: str, reference_url: str,
+                     reference_tracks: List[Dict], cutoff_date, analyzed: int,
+                     remove: List[Dict], protected: List[Dict]) -> Dict:
+    """Monta o plano de remoção a partir do resultado da análise."""
+    return {
+        'version': 1,
+        'platform': platform,
+        'playlist_id': playlist_id,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'reference': {
+            'platform': reference_platform,
+            'url': reference_url,
+            'tracks': [
+                {'name': t['name'], 'artist': t['artist'], 'all_artists': t['all_artists']}
+                for t in reference_tracks
+            ]
+        },
+        'cutoff_date': cutoff_date.strftime('%d/%m/%Y') if cutoff_date else None,
+        'summary': {
+            'analyzed': analyzed,
+            'correct': analyzed - len(remove) - len(protected),
+            'protected': len(protected),
+            'to_remove': len(remove)
+        },
+        'remove': remove,
+        'protected': protected,
+        'applied_at': None
+    }
+
+def save_clean_plan(plan: Dict, filename: Optional[str] = None) -> str:
+    """Salva o plano de limpeza em JSON."""
+    if not filename:
+        filename = f"plano_limpeza_{plan['platform']}_{int(time.time())}.json"
     
-    try:
-        playlist = ytmusic.get_playlist(playlist_id, limit=None)
-        tracks = []
-        
-        for item in playlist.get('tracks', []):
-            if item and item.get('title'):
-                artists = [a['name'] for a in item.get('artists', []) if a.get('name')]
-                
-                if artists:
-                    tracks.append({
-                        'name': item['title'],
-                        'artist': ', '.join(artists),
-                        'all_artists': artists,
-                        'album': item.get('album', {}).get('name', '') if item.get('album') else '',
-                        'videoId': item.get('videoId', '')
-                    })
-        
-        print(f"[+] Encontradas {len(tracks)} músicas válidas!")
-        return tracks
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
     
-    except Exception as e:
-        print(f"[!] Erro ao buscar playlist: {e}")
-        return []
+    return filename
 
-def search_on_spotify(sp: Spotify, track: Dict) -> Optional[str]:
-    """Busca uma música no Spotify."""
+def load_clean_plan(filename: str) -> Optional[Dict]:
+    """Carrega um plano de limpeza salvo."""
     try:
-        track_name = track['name']
-        all_artists = track['all_artists']
-        
-        # Estratégia 1: Busca com título + artista
-        query = f"track:{track_name} artist:{all_artists[0]}"
-        results = sp.search(q=query, type='track', limit=10)
-        
-        if results['tracks']['items']:
-            for item in results['tracks']['items']:
-                sp_title = item['name']
-                sp_artists = [a['name'] for a in item['artists']]
-                
-                match, _, _ = is_match(
-                    sp_title, sp_artists, track_name, all_artists
-                )
-                
-                if match:
-                    return item['uri']
-        
-        # Estratégia 2: Busca mais ampla
-        query = f"{track_name} {all_artists[0]}"
-        results = sp.search(q=query, type='track', limit=10)
-        
-        if results['tracks']['items']:
-            for item in results['tracks']['items']:
-                sp_title = item['name']
-                sp_artists = [a['name'] for a in item['artists']]
-                
-                match, _, _ = is_match(
-                    sp_title, sp_artists, track_name, all_artists
-                )
-                
-                if match:
-                    return item['uri']
-        
+        with open(filename, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[!] Erro ao carregar plano: {e}")
         return None
     
-    except Exception as e:
+    if plan.get('platform') not in PLATFORM_NAMES or 'remove' not in plan:
+        print("[!] Arquivo não é um plano de limpeza válido!")
         return None
+    
+    return plan
 
-def migrate_ytmusic_to_spotify(sp: Spotify, ytmusic: YTMusic, yt_playlist_url: str):
-    """Migra playlist do YouTube Music para Spotify."""
-    print("\n" + "="*80)
-    print("MIGRAÇÃO: YOUTUBE MUSIC → SPOTIFY")
-    print("="*80)
+@profiled('ingest')
+def get_playlist_removal_keys(sp: Optional[Spotify], ytmusic: Optional[YTMusic], platform: str, playlist_id: str) -> set:
+    """Retorna os identificadores removíveis ainda presentes na playlist."""
+    if platform == 'ytmusic':
+        playlist = ytmusic.get_playlist(playlist_id, limit=None)
+        return {t['setVideoId'] for t in playlist.get('tracks', []) if t.get('setVideoId')}
     
-    # Extrair ID da playlist do YT Music
-    if 'list=' in yt_playlist_url:
-        yt_playlist_id = yt_playlist_url.split('list=')[1].split('&')[0]
-    else:
-        yt_playlist_id = yt_playlist_url.split('/')[-1].split('?')[0]
+    present = set()
+    results = sp.playlist_items(playlist_id, fields='items(track(uri)),next', additional_types=['track'])
+    while results:
+        for item in results['items']:
+            if item.get('track') and item['track'].get('uri'):
+                present.add(item['track']['uri'])
+        
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
     
-    # Buscar músicas do YT Music
-    tracks = get_ytmusic_tracks(ytmusic, yt_playlist_id)
+    return present
+
+def apply_clean_plan(sp: Optional[Spotify], ytmusic: Optional[YTMusic], plan: Dict, plan_file: Optional[str] = None) -> int:
+    """Executa um plano de limpeza em lote, pulando músicas já removidas."""
+    platform = plan['platform']
+    playlist_id = plan['playlist_id']
+    key_field = 'setVideoId' if platform == 'ytmusic' else 'uri'
     
-    if not tracks:
-        print("[!] Nenhuma música encontrada!")
-        return
+    print("\n[*] Verificando músicas do plano ainda presentes na playlist...")
+    try:
+        present = get_playlist_removal_keys(sp, ytmusic, platform, playlist_id)
+    except Exception as e:
+        print(f"[!] Erro ao carregar playlist: {e}")
+        return 0
     
-    # Criar playlist no Spotify
-    playlist_name = input("\n[?] Nome da playlist no Spotify: ").strip() or "Migrada do YouTube Music"
+    pending = [item for item in plan['remove'] if item.get(key_field) in present]
+    already_removed = len(plan['remove']) - len(pending)
+    if already_removed:
+        print(f"[i] {already_removed} músicas do plano já foram removidas (puladas)")
     
-    user_id = sp.current_user()['id']
-    sp_playlist = sp.user_playlist_create(
-        user_id, 
-        playlist_name, 
-        description="Migrada do YouTube Music"
-    )
-    sp_playlist_id = sp_playlist['id']
-    print(f"[+] Playlist criada no Spotify! ID: {sp_playlist_id}")
+    if not pending:
+        print("[+] Nada a remover! O plano já está aplicado. ✨")
+        return 0
     
-    # Migrar músicas
-    added = 0
-    not_found = []
-    batch_size = 50  # Spotify permite até 100 por batch
+    print("\n[*] Removendo músicas...")
+    removed = 0
+    EVENTS.emit('run_started', operacao="limpeza", playlist=playlist_id, total=len(pending))
+    try:
+        if platform == 'ytmusic':
+            batch_size = 50
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i+batch_size]
+                with profile_phase('remove'):
+                    ytmusic.remove_playlist_items(
+                        playlist_id,
+                        [{'videoId': t['videoId'], 'setVideoId': t['setVideoId']} for t in batch]
+                    )
+                removed += len(batch)
+                for t in batch:
+                    EVENTS.emit('track_removed', playlist=playlist_id, nome=t['title'], artista=', '.join(t['artists']), id=t['videoId'])
+                pace(1)
+        else:
+            # Remover em lotes de 100 (limite do Spotify)
+            batch_size = 100
+            uris = list(dict.fromkeys(t['uri'] for t in pending))
+            names = {t['uri']: t for t in pending}
+            for i in range(0, len(uris), batch_size):
+                batch = uris[i:i+batch_size]
+                with profile_phase('remove'):
+                    sp.playlist_remove_all_occurrences_of_items(playlist_id, batch)
+                removed = min(i+batch_size, len(uris))
+                for uri in batch:
+                    EVENTS.emit('track_removed', playlist=playlist_id, nome=names[uri]['title'],
+                                artista=', '.join(names[uri]['artists']), id=uri)
+                pace(0.5)
+    except Exception as e:
+        EVENTS.emit('run_finished', operacao="limpeza", removidas=removed, erro=str(e))
+        print(f"\n[!] ERRO ao remover músicas: {e}")
+        print("[i] Aplique o plano novamente para continuar de onde parou")
+        return removed
     
-    print(f"\n[*] Iniciando migração de {len(tracks)} músicas...\n")
+    EVENTS.emit('run_finished', operacao="limpeza", removidas=len(pending))
+    print(f"\n[+] ✨ {len(pending)} músicas removidas com sucesso!")
+    print("[+] Playlist limpa e sincronizada!")
     
-    for i in range(0, len(tracks), batch_size):
-        batch = tracks[i:i+batch_size]
-        track_uris = []
-        
-        print(f"--- Lote {(i//batch_size)+1}/{(len(tracks)-1)//batch_size+1} ---")
-        
-        for track in batch:
-            track_info = f"{track['name'][:40]} - {track['all_artists'][0][:30]}"
-            print(f"[*] {track_info:<70}", end=" ")
-            
-            track_uri = search_on_spotify(sp, track)
-            
-            if track_uri:
-                track_uris.append(track_uri)
-                print("✓")
-            else:
-                not_found.append(f"{track['name']} - {track['artist']}")
-                print("✗")
-            
-            time.sleep(0.3)
-        
-        if track_uris:
-            try:
-                sp.playlist_add_items(sp_playlist_id, track_uris)
-                added += len(track_uris)
-                print(f"\n[+] {len(track_uris)} músicas adicionadas!")
-            except Exception as e:
-                print(f"\n[!] Erro ao adicionar: {e}")
-        
-        time.sleep(1)
+    plan['applied_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    if plan_file:
+        save_clean_plan(plan, plan_file)
     
-    # Resumo
-    print("\n" + "="*80)
-    print("MIGRAÇÃO CONCLUÍDA!")
-    print("="*80)
-    print(f"✓ Adicionadas: {added}")
-    print(f"✗ Não encontradas: {len(not_found)}")
-    print(f"📊 Taxa de sucesso: {(added/len(tracks)*100):.1f}%")
-    print(f"🔗 Link: https://open.spotify.com/playlist/{sp_playlist_id}")
+    # Salvar log da limpeza
+    log_file = f"limpeza_{int(time.time())}.txt"
+    with open(log_file, 'w', encoding='utf-8') as f:
+        f.write("="*70 + "\n")
+        f.write(f"LOG DE LIMPEZA - {PLATFORM_NAMES[platform]}\n")
+        f.write("="*70 + "\n\n")
+        f.write(f"Data: {time.strftime('%d/%m/%Y %H:%M:%S')}\n")
+        f.write(f"Músicas removidas: {len(pending)}\n\n")
+        f.write("="*70 + "\n\n")
+        
+        for track in pending:
+            f.write(f"• {track['title']} - {', '.join(track['artists'])}\n")
     
-    if not_found:
-        save_not_found(not_found, "ytmusic_para_spotify")
+    print(f"\n[+] Log salvo em: {log_file}")
+    return len(pending)
 
 # ============================================================================
-# UTILITÁRIOS
+# DUPLICADAS - VERSÕES QUASE IGUAIS DENTRO DA MESMA PLAYLIST
 # ============================================================================
 
-def save_not_found(tracks: List[str], direction: str):
-    """Salva músicas não encontradas em arquivo."""
-    filename = f"nao_encontradas_{direction}_{int(time.time())}.txt"
+# Títulos normalizados do mesmo artista com fuzz.ratio a partir disto são a mesma música
+DUPLICATE_TITLE_RATIO = 90
+
+@profiled('analyse')
+def find_duplicate_groups(entries: List[Dict]) -> List[List[int]]:
+    """Agrupa entradas ({'title', 'artists'}) que são a mesma música.
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write("="*70 + "\n")
-        f.write(f"MÚSICAS NÃO ENCONTRADAS ({direction})\n")
-        f.write("="*70 + "\n\n")
-        f.write(f"Total: {len(tracks)}\n\n")
+    Os blocos são o artista principal normalizado; dentro de cada bloco,
+    títulos normalizados iguais (remaster, ao vivo, ...) já caem juntos e só
+    os títulos distintos são comparados, com o limite por tamanho/máscara
+    descartando a maioria dos pares. Retorna grupos de índices com mais de
+    uma entrada, na ordem da playlist (o primeiro índice é o que fica).
+    """
+    parent = list(range(len(entries)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    blocks = {}
+    for i, entry in enumerate(entries):
+        title = normalize_title(entry['title'])
+        if title and entry['artists']:
+            blocks.setdefault(normalize_artist(entry['artists'][0]), {}).setdefault(title, []).append(i)
+    
+    for titles in blocks.values():
+        for positions in titles.values():
+            for i in positions[1:]:
+                union(positions[0], i)
         
-        for i, track in enumerate(tracks, 1):
-            f.write(f"{i}. {track}\n")
+        # Títulos em ordem de tamanho: a razão máxima cai à medida que a diferença cresce
+        # (arredondada para cima como em ratio_upper_bound, já que fuzz.ratio arredonda)
+        keys = sorted(titles, key=len)
+        for a, title_a in enumerate(keys):
+            for title_b in keys[a + 1:]:
+                if math.ceil(200 * len(title_a) / (len(title_a) + len(title_b))) < DUPLICATE_TITLE_RATIO:
+                    break
+                if (ratio_upper_bound(title_a, title_b) >= DUPLICATE_TITLE_RATIO
+                        and fuzz.ratio(title_a, title_b) >= DUPLICATE_TITLE_RATIO):
+                    union(titles[title_a][0], titles[title_b][0])
     
-    print(f"\n[+] Lista salva em: {filename}")
+    groups = {}
+    for i in range(len(entries)):
+        groups.setdefault(find(i), []).append(i)
+    
+    return [group for root, group in sorted(groups.items()) if len(group) > 1]
 
-# ============================================================================
-# LIMPEZA DE PLAYLIST - REMOVE MÚSICAS INCORRETAS
-# ============================================================================
+def remove_duplicate_entries(sp: Optional[Spotify], ytmusic: Optional[YTMusic], platform: str,
+                             playlist_id: str, extras: List[Dict]):
+    """Remove as entradas extras em lote, sem tocar na entrada mantida de cada grupo."""
+    with profile_phase('remove'):
+        if platform == 'ytmusic':
+            for i in range(0, len(extras), 50):
+                ytmusic.remove_playlist_items(
+                    playlist_id,
+                    [{'videoId': e['id'], 'setVideoId': e['setVideoId']} for e in extras[i:i+50]]
+                )
+                pace(1)
+            return
+        
+        # Spotify: a mesma URI pode estar na entrada mantida, então remove por posição.
+        # Lotes do fim para o começo, para que uma remoção não desloque as posições do próximo
+        extras = sorted(extras, key=lambda e: e['position'], reverse=True)
+        for i in range(0, len(extras), 100):
+            positions = {}
+            for entry in extras[i:i+100]:
+                positions.setdefault(entry['id'], []).append(entry['position'])
+            items = [{'uri': uri, 'positions': sorted(p)} for uri, p in positions.items()]
+            sp.playlist_remove_specific_occurrences_of_items(playlist_id, items)
+            pace(0.5)
 
-def clean_ytmusic_playlist(sp: Spotify, ytmusic: YTMusic, spotify_url: str, ytmusic_playlist_id: str):
-    """Remove músicas incorretas do YT Music baseado na playlist do Spotify."""
-    print("\n" + "="*80)
-    print("LIMPEZA DE PLAYLIST - YOUTUBE MUSIC")
-    print("="*80)
+def dedupe_playlist(sp: Optional[Spotify], ytmusic: Optional[YTMusic], platform: str, playlist_id: str,
+                    interactive: bool = True):
+    """Encontra músicas duplicadas (inclusive versões diferentes) e remove as extras."""
+    print_header(f"DUPLICADAS: {PLATFORM_NAMES[platform].upper()}")
     
-    # Buscar músicas do Spotify (referência)
-    print("\n[*] Buscando músicas da playlist de referência do Spotify...")
-    spotify_tracks = get_spotify_tracks(sp, spotify_url)
+    with profile_phase('ingest'):
+        if platform == 'ytmusic':
+            playlist = ytmusic.get_playlist(playlist_id, limit=None)
+            entries = [
+                dict(ytmusic_candidate(t), setVideoId=t['setVideoId'])
+                for t in playlist.get('tracks') or [] if t.get('videoId') and t.get('setVideoId')
+            ]
+        else:
+            entries = [
+                {'id': e['uri'], 'title': e['name'], 'artists': e['artists'], 'position': e['position']}
+                for e in get_spotify_playlist_entries(sp, playlist_id)
+            ]
     
-    if not spotify_tracks:
-        print("[!] Nenhuma música encontrada no Spotify!")
+    print(Colors.info(f"{len(entries)} músicas na playlist"))
+    groups = find_duplicate_groups(entries)
+    
+    if not groups:
+        print(Colors.success("Nenhuma duplicada encontrada! ✨"))
         return
     
-    print(f"[+] {len(spotify_tracks)} músicas na playlist do Spotify")
+    # A primeira entrada de cada grupo na ordem da playlist é mantida (não necessariamente a adicionada antes)
+    extras = [entries[i] for group in groups for i in group[1:]]
+    
+    print_section(f"{len(groups)} Grupos de Duplicadas ({len(extras)} extras)")
+    for group in groups:
+        keep = entries[group[0]]
+        print(f"  {Colors.GREEN}✓{Colors.ENDC} {keep['title']} - {', '.join(keep['artists'])}")
+        for i in group[1:]:
+            print(f"    {Colors.RED}✗{Colors.ENDC} {entries[i]['title']} - {', '.join(entries[i]['artists'])}")
+    
+    report_file = f"duplicadas_{platform}_{int(time.time())}.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'platform': platform,
+            'playlist_id': playlist_id,
+            'groups': [[entries[i] for i in group] for group in groups]
+        }, f, ensure_ascii=False, indent=2)
+    print(Colors.info(f"Relatório salvo em: {report_file}"))
+    
+    if interactive:
+        confirm = input(f"\n{Colors.CYAN}Remover as {len(extras)} extras? (s/n):{Colors.ENDC} ").strip().lower()
+        if confirm != 's':
+            print(Colors.warning("Nada foi removido."))
+            return
     
-    # Buscar músicas do YT Music
-    print("\n[*] Buscando músicas da playlist do YouTube Music...")
     try:
-        yt_playlist = ytmusic.get_playlist(ytmusic_playlist_id, limit=None)
-        yt_tracks = yt_playlist.get('tracks', [])
+        remove_duplicate_entries(sp, ytmusic, platform, playlist_id, extras)
     except Exception as e:
-        print(f"[!] Erro ao carregar playlist do YT Music: {e}")
-        return
-    
-    if not yt_tracks:
-        print("[+] A playlist do YouTube Music está vazia!")
+        print(Colors.error(f"Erro ao remover duplicadas: {e}"))
         return
     
-    print(f"[+] {len(yt_tracks)} músicas na playlist do YouTube Music")
+    for entry in extras:
+        EVENTS.emit('track_removed', playlist=playlist_id, nome=entry['title'], artista=', '.join(entry['artists']), id=entry['id'])
+    print(Colors.success(f"{len(extras)} duplicadas removidas!"))
+
+# ============================================================================
+# NÚCLEO ASSÍNCRONO - CENTENAS DE REQUISIÇÕES EM VOO NUM SÓ PROCESSO
+# ============================================================================
+
+# Os clientes abaixo usam uma única aiohttp.ClientSession (conexões persistentes
+# reaproveitadas entre as requisições) e as credenciais já existentes:
+# .spotify_cache (token OAuth do spotipy) e headers_auth.json (ytmusicapi).
+
+class AsyncClientError(Exception):
+    """Resposta de erro de uma API no núcleo assíncrono."""
+
+def async_request_timeout(endpoint: str) -> Optional['aiohttp.ClientTimeout']:
+    """Prazo de uma requisição: SEARCH_DEADLINE só nas buscas; leituras e gravações usam o padrão da sessão."""
+    if endpoint == 'search' and SEARCH_DEADLINE > 0:
+        return aiohttp.ClientTimeout(total=SEARCH_DEADLINE)
+    return None
+
+class AsyncRateLimiter:
+    """Token bucket para corrotinas: até `rate` chamadas por segundo, esperando com asyncio.sleep."""
     
-    # Perguntar sobre proteção por data
-    print("\n" + "="*80)
-    print("CONFIGURAÇÃO DE PROTEÇÃO")
-    print("="*80)
-    print("\nDeseja proteger músicas adicionadas manualmente pelo usuário?")
-    print("(Músicas adicionadas ANTES da primeira migração não serão removidas)")
-    print()
-    protect_manual = input("[?] Proteger músicas manuais? (s/n): ").strip().lower() == 's'
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
     
-    cutoff_date = None
-    if protect_manual:
-        print("\n[*] Digite a data da primeira migração automática:")
-        print("    Músicas adicionadas ANTES dessa data serão protegidas")
-        print("    Formato: DD/MM/AAAA (ex: 15/11/2025)")
-        date_str = input("[?] Data: ").strip()
+    async def acquire(self):
+        """Espera até haver uma permissão disponível."""
+        if self.rate <= 0:
+            return
         
-        try:
-            from datetime import datetime
-            cutoff_date = datetime.strptime(date_str, "%d/%m/%Y")
-            print(f"[+] Protegendo músicas adicionadas antes de {cutoff_date.strftime('%d/%m/%Y')}")
-        except:
-            print("[!] Data inválida! Continuando sem proteção...")
-            cutoff_date = None
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncSpotify:
+    """Endpoints da Web API do Spotify usados aqui, com os mesmos nomes e retornos do spotipy."""
     
-    # Modo debug
-    debug_mode = input("\n[?] Ativar modo debug? (s/n): ").strip().lower() == 's'
+    API_URL = 'https://api.spotify.com/v1/'
+    TOKEN_URL = 'https://accounts.spotify.com/api/token'
     
-    # Analisar músicas
-    print("\n" + "="*80)
-    print("ANALISANDO PLAYLIST...")
-    print("="*80 + "\n")
+    def __init__(self, session: 'aiohttp.ClientSession', cache_path: str = ".spotify_cache",
+                 rate: float = SPOTIFY_RATE_PER_SEC):
+        self.session = session
+        self.cache_path = cache_path
+        self.limiter = AsyncRateLimiter(rate)
+        self.token_lock = asyncio.Lock()
+        self.token_info = None
     
-    tracks_to_remove = []
-    protected_tracks = []
+    async def _access_token(self, force_refresh: bool = False) -> str:
+        async with self.token_lock:
+            if self.token_info is None:
+                if not os.path.exists(self.cache_path):
+                    raise AsyncClientError(f"{self.cache_path} não encontrado: autentique uma vez pelo menu (modo síncrono)")
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.token_info = json.load(f)
+            if force_refresh or self.token_info.get('expires_at', 0) - 60 <= time.time():
+                await self._refresh_token()
+            return self.token_info['access_token']
     
-    for yt_track in yt_tracks:
-        yt_title = yt_track.get('title', '')
-        yt_artists = [a['name'] for a in yt_track.get('artists', []) if a.get('name')]
-        yt_artist_str = ', '.join(yt_artists)
+    async def _refresh_token(self):
+        """Renova o token com o refresh_token do cache e grava o cache atualizado (formato do spotipy)."""
+        data = {'grant_type': 'refresh_token', 'refresh_token': self.token_info['refresh_token']}
+        auth = aiohttp.BasicAuth(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
+        async with self.session.post(self.TOKEN_URL, data=data, auth=auth) as response:
+            info = await response.json(content_type=None)
+            if response.status >= 400:
+                raise AsyncClientError(f"Spotify (token) {response.status}: {info}")
         
-        # Verificar data de adição (se disponível)
-        is_protected = False
-        if cutoff_date and 'setVideoId' in yt_track:
-            # setVideoId presente indica que temos metadados completos
-            # Nota: A API do ytmusicapi não expõe diretamente a data de adição
-            # mas podemos usar outras heurísticas
-            pass
+        info.setdefault('refresh_token', self.token_info['refresh_token'])
+        info.setdefault('scope', self.token_info.get('scope'))
+        info['expires_at'] = int(time.time()) + info['expires_in']
+        self.token_info = info
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+    
+    async def _request(self, endpoint: str, method: str, url: str, params: Optional[Dict] = None,
+                       payload: Optional[Dict] = None, retries: int = 3) -> Dict:
+        call_ledger().charge('spotify', endpoint)
+        if not url.startswith('http'):
+            url = self.API_URL + url
         
-        # Procurar match na playlist do Spotify
-        found_match = False
-        best_match_info = {
-            'title_ratio': 0,
-            'artist_ratio': 0,
-            'sp_title': '',
-            'sp_artist': ''
-        }
+        expired = False
+        for attempt in range(retries + 1):
+            await self.limiter.acquire()
+            headers = {'Authorization': f"Bearer {await self._access_token(force_refresh=expired)}"}
+            expired = False
+            async with self.session.request(method, url, params=params, json=payload, headers=headers,
+                                            timeout=async_request_timeout(endpoint) or self.session.timeout) as response:
+                if response.status == 429 and attempt < retries:
+                    await asyncio.sleep(float(response.headers.get('Retry-After', 1)))
+                    continue
+                if response.status == 401 and attempt < retries:
+                    expired = True
+                    continue
+                body = await response.json(content_type=None) if response.content_length != 0 else {}
+                if response.status >= 400:
+                    raise AsyncClientError(f"Spotify {response.status}: {body}")
+                return body or {}
+        raise AsyncClientError(f"Spotify: {endpoint} falhou após {retries + 1} tentativas")
+    
+    async def search(self, q: str, type: str = 'track', limit: int = 10) -> Dict:
+        return await self._request('search', 'GET', 'search', params={'q': q, 'type': type, 'limit': limit})
+    
+    async def playlist_items(self, playlist_id: str, limit: int = 100, offset: int = 0) -> Dict:
+        return await self._request('playlist_items', 'GET', f'playlists/{playlist_id}/tracks',
+                                   params={'limit': limit, 'offset': offset, 'additional_types': 'track'})
+    
+    async def next(self, result: Dict) -> Optional[Dict]:
+        return await self._request('next', 'GET', result['next']) if result.get('next') else None
+    
+    async def current_user(self) -> Dict:
+        return await self._request('current_user', 'GET', 'me')
+    
+    async def current_user_playlists(self, limit: int = 50, offset: int = 0) -> Dict:
+        return await self._request('current_user_playlists', 'GET', 'me/playlists', params={'limit': limit, 'offset': offset})
+    
+    async def user_playlist_create(self, user: str, name: str, description: str = '') -> Dict:
+        return await self._request('user_playlist_create', 'POST', f'users/{user}/playlists',
+                                   payload={'name': name, 'public': True, 'description': description})
+    
+    async def playlist_add_items(self, playlist_id: str, items: List[str]) -> Dict:
+        return await self._request('playlist_add_items', 'POST', f'playlists/{playlist_id}/tracks', payload={'uris': items})
+    
+    async def playlist_remove_all_occurrences_of_items(self, playlist_id: str, items: List[str]) -> Dict:
+        return await self._request('playlist_remove_all_occurrences_of_items', 'DELETE', f'playlists/{playlist_id}/tracks',
+                                   payload={'tracks': [{'uri': uri} for uri in items]})
+
+class _PendingRequest(Exception):
+    """Requisição que o ytmusicapi pediu e ainda não tem resposta (ver AsyncYTMusic)."""
+    
+    def __init__(self, endpoint: str, body: Dict, additional_params: str):
+        super().__init__(endpoint)
+        self.endpoint = endpoint
+        self.body = body
+        self.additional_params = additional_params
+
+class AsyncYTMusic:
+    """Métodos do ytmusicapi com transporte assíncrono.
+    
+    O YTMusic continua montando as requisições e interpretando as respostas:
+    o método é executado de novo a cada resposta recebida, reaproveitando as
+    anteriores em ordem, até não pedir mais nenhuma (paginação incluída).
+    Cada requisição vai à rede uma única vez.
+    """
+    
+    def __init__(self, session: 'aiohttp.ClientSession', auth_path: str = 'headers_auth.json',
+                 rate: float = YTMUSIC_RATE_PER_SEC):
+        self.session = session
+        self.client = YTMusic(auth_path)
+        self.client.base_headers  # obtém o visitor id (se faltar) antes de entrar no laço de eventos
+        self.limiter = AsyncRateLimiter(rate)
+    
+    async def _run(self, method: str, *args, **kwargs):
+        call_ledger().charge('ytmusic', method)
+        responses = []
         
-        for sp_track in spotify_tracks:
-            sp_title = sp_track['name']
-            sp_artists = sp_track['all_artists']
+        while True:
+            replay = iter(responses)
             
-            match, title_ratio, artist_ratio = is_match(
-                sp_title, sp_artists, yt_title, yt_artists
-            )
+            def send_request(endpoint, body, additionalParams=""):
+                text = next(replay, None)
+                if text is None:
+                    body.update(self.client.context)
+                    raise _PendingRequest(endpoint, body, additionalParams)
+                return json.loads(text)  # cópia nova: os parsers alteram a resposta
             
-            # Guardar melhor match para debug
-            if title_ratio > best_match_info['title_ratio']:
-                best_match_info = {
-                    'title_ratio': title_ratio,
-                    'artist_ratio': artist_ratio,
-                    'sp_title': sp_title,
-                    'sp_artist': sp_track['artist']
-                }
+            # Sem await entre trocar e restaurar: outras corrotinas não veem o transporte trocado
+            self.client._send_request = send_request
+            try:
+                return getattr(self.client, method)(*args, **kwargs)
+            except _PendingRequest as request:
+                pending = request
+            finally:
+                del self.client._send_request
             
-            if match:
-                found_match = True
-                break
-        
-        # Decidir se remove
-        if not found_match:
-            if is_protected:
-                protected_tracks.append((yt_title, yt_artist_str))
-                if debug_mode:
-                    print(f"[P] PROTEGIDA: {yt_title} - {yt_artist_str}")
-                    print(f"    (adicionada manualmente pelo usuário)")
-                    print()
-            else:
-                tracks_to_remove.append(yt_track)
-                if debug_mode:
-                    print(f"[-] REMOVER: {yt_title} - {yt_artist_str}")
-                    print(f"    Melhor match: {best_match_info['sp_title']} - {best_match_info['sp_artist']}")
-                    print(f"    Título: {best_match_info['title_ratio']:.1f}% | Artista: {best_match_info['artist_ratio']:.1f}%")
-                    print()
-                else:
-                    print(f"[-] {yt_title} - {yt_artist_str}")
-        else:
-            if debug_mode:
-                print(f"[✓] {yt_title} - {yt_artist_str}")
+            responses.append(await self._post(pending, async_request_timeout(method)))
     
-    # Resumo
-    print("\n" + "="*80)
-    print("RESUMO DA ANÁLISE")
-    print("="*80)
-    print(f"✓ Músicas corretas: {len(yt_tracks) - len(tracks_to_remove) - len(protected_tracks)}")
-    print(f"⊙ Músicas protegidas: {len(protected_tracks)}")
-    print(f"✗ Músicas a remover: {len(tracks_to_remove)}")
+    async def _post(self, request: _PendingRequest, timeout: Optional['aiohttp.ClientTimeout'] = None) -> str:
+        await self.limiter.acquire()
+        url = YTM_BASE_API + request.endpoint + self.client.params + request.additional_params
+        async with self.session.post(url, json=request.body, headers=dict(self.client.headers),
+                                     cookies=getattr(self.client, 'cookies', None),
+                                     timeout=timeout or self.session.timeout) as response:
+            text = await response.text()
+            if response.status >= 400:
+                raise AsyncClientError(f"YT Music {response.status}: {text[:200]}")
+            return text
     
-    if protected_tracks:
-        print("\n[i] Músicas protegidas (adicionadas manualmente):")
-        for title, artist in protected_tracks[:10]:
-            print(f"    • {title} - {artist}")
-        if len(protected_tracks) > 10:
-            print(f"    ... e mais {len(protected_tracks) - 10} músicas")
+    async def search(self, query: str, filter: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        return await self._run('search', query, filter=filter, limit=limit)
     
-    if not tracks_to_remove:
-        print("\n[+] Nenhuma música incorreta encontrada!")
-        print("[+] A playlist está sincronizada! ✨")
-        return
+    async def get_playlist(self, playlist_id: str, limit: Optional[int] = 100) -> Dict:
+        return await self._run('get_playlist', playlist_id, limit=limit)
     
-    # Mostrar músicas que serão removidas
-    print(f"\n[!] As seguintes {len(tracks_to_remove)} músicas serão REMOVIDAS:")
-    for i, track in enumerate(tracks_to_remove[:20], 1):
-        title = track.get('title', '')
-        artists = ', '.join([a['name'] for a in track.get('artists', [])])
-        print(f"    {i}. {title} - {artists}")
+    async def get_library_playlists(self, limit: Optional[int] = 25) -> List[Dict]:
+        return await self._run('get_library_playlists', limit=limit)
     
-    if len(tracks_to_remove) > 20:
-        print(f"    ... e mais {len(tracks_to_remove) - 20} músicas")
+    async def create_playlist(self, title: str, description: str) -> str:
+        return await self._run('create_playlist', title, description)
     
-    # Confirmação
-    print("\n" + "="*80)
-    confirm = input("\n[?] Confirma a remoção dessas músicas? (s/n): ").strip().lower()
+    async def add_playlist_items(self, playlist_id: str, video_ids: List[str]) -> Dict:
+        return await self._run('add_playlist_items', playlist_id, video_ids)
     
-    if confirm == 's':
-        print("\n[*] Removendo músicas...")
-        try:
-            # Remover em lotes
-            batch_size = 50
-            removed = 0
-            
-            for i in range(0, len(tracks_to_remove), batch_size):
-                batch = tracks_to_remove[i:i+batch_size]
-                ytmusic.remove_playlist_items(ytmusic_playlist_id, batch)
-                removed += len(batch)
-                print(f"[+] Removidas {removed}/{len(tracks_to_remove)} músicas...")
-                time.sleep(1)
-            
-            print(f"\n[+] ✨ {len(tracks_to_remove)} músicas removidas com sucesso!")
-            print("[+] Playlist limpa e sincronizada!")
-            
-            # Salvar log da limpeza
-            log_file = f"limpeza_{int(time.time())}.txt"
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write("="*70 + "\n")
-                f.write("LOG DE LIMPEZA - YOUTUBE MUSIC\n")
-                f.write("="*70 + "\n\n")
-                f.write(f"Data: {time.strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"Músicas removidas: {len(tracks_to_remove)}\n\n")
-                f.write("="*70 + "\n\n")
-                
-                for track in tracks_to_remove:
-                    title = track.get('title', '')
-                    artists = ', '.join([a['name'] for a in track.get('artists', [])])
-                    f.write(f"• {title} - {artists}\n")
-            
-            print(f"\n[+] Log salvo em: {log_file}")
-            
-        except Exception as e:
-            print(f"\n[!] ERRO ao remover músicas: {e}")
+    async def remove_playlist_items(self, playlist_id: str, videos: List[Dict]) -> Dict:
+        return await self._run('remove_playlist_items', playlist_id, videos)
+
+async def async_spotify_items(sp: AsyncSpotify, first_page: Dict) -> List[Dict]:
+    """Todos os itens de uma listagem paginada do Spotify."""
+    items = []
+    results = first_page
+    while results:
+        items.extend(item for item in results['items'] if item)
+        results = await sp.next(results)
+    return items
+
+async def async_read_source(sp: AsyncSpotify, ytmusic: AsyncYTMusic, direction: str, playlist_id: str) -> List[Dict]:
+    """Músicas da playlist de origem no formato interno."""
+    if direction == "spotify_para_ytmusic":
+        items = await async_spotify_items(sp, await sp.playlist_items(playlist_id))
+        records = [spotify_track_record(item.get('track')) for item in items]
     else:
-        print("\n[!] Operação cancelada. Nenhuma música foi removida.")
+        playlist = await ytmusic.get_playlist(playlist_id, limit=None)
+        records = [ytmusic_track_record(item) for item in playlist.get('tracks') or []]
+    return [r for r in records if r]
 
-def clean_spotify_playlist(sp: Spotify, ytmusic: YTMusic, spotify_playlist_id: str, ytmusic_url: str):
-    """Remove músicas incorretas do Spotify baseado na playlist do YT Music."""
-    print("\n" + "="*80)
-    print("LIMPEZA DE PLAYLIST - SPOTIFY")
-    print("="*80)
+async def async_destination(sp: AsyncSpotify, ytmusic: AsyncYTMusic, direction: str,
+                            playlist_name: str) -> Tuple[str, List[Dict]]:
+    """Encontra (ou cria) a playlist de destino pelo nome e devolve (id, músicas já nela como candidatos)."""
+    if direction == "spotify_para_ytmusic":
+        library = await ytmusic.get_library_playlists(limit=None)
+        playlist_id = next((p['playlistId'] for p in library if p['title'] == playlist_name), None)
+        if playlist_id is None:
+            return await ytmusic.create_playlist(playlist_name, "Migrada do Spotify"), []
+        playlist = await ytmusic.get_playlist(playlist_id, limit=None)
+        return playlist_id, [ytmusic_candidate(t) for t in playlist.get('tracks') or [] if t.get('videoId')]
     
-    # Extrair ID do YT Music
-    if 'list=' in ytmusic_url:
-        yt_playlist_id = ytmusic_url.split('list=')[1].split('&')[0]
-    else:
-        yt_playlist_id = ytmusic_url.split('/')[-1].split('?')[0]
+    user_id = (await sp.current_user())['id']
+    playlists = await async_spotify_items(sp, await sp.current_user_playlists(limit=50))
+    playlist_id = next((p['id'] for p in playlists
+                        if p['name'] == playlist_name and (p.get('owner') or {}).get('id') == user_id), None)
+    if playlist_id is None:
+        created = await sp.user_playlist_create(user_id, playlist_name, description="Migrada do YouTube Music")
+        return created['id'], []
+    items = await async_spotify_items(sp, await sp.playlist_items(playlist_id))
+    return playlist_id, [spotify_candidate(item['track']) for item in items if item.get('track') and item['track'].get('uri')]
+
+async def async_search(sp: AsyncSpotify, ytmusic: AsyncYTMusic, direction: str, track: Dict) -> Optional[str]:
+    """As mesmas estratégias de search_on_ytmusic/search_on_spotify, em sequência e sem threads."""
+    archive = candidate_archive()
+    source_is_spotify = direction == "spotify_para_ytmusic"
     
-    # Buscar músicas do YT Music (referência)
-    print("\n[*] Buscando músicas da playlist de referência do YouTube Music...")
-    ytmusic_tracks = get_ytmusic_tracks(ytmusic, yt_playlist_id)
+    for query, order, criterion in search_plan(direction, track):
+        if source_is_spotify:
+            candidates = [ytmusic_candidate(r) for r in await ytmusic.search(query, filter='songs', limit=10)]
+        else:
+            results = await sp.search(q=query, type='track', limit=10)
+            candidates = [spotify_candidate(item) for item in results['tracks']['items'] if item]
+        archive.record_search(direction, track, query, order, criterion, candidates)
+        match_id = select_candidate(track, candidates, criterion, source_is_spotify)
+        if match_id:
+            return match_id
+    return None
+
+async def async_migrate(direction: str, playlist_id: str, playlist_name: str, concurrency: int) -> Dict:
+    """Migra uma playlist com todas as buscas pendentes em voo ao mesmo tempo (até concurrency)."""
+    source_is_spotify = direction == "spotify_para_ytmusic"
+    connector = aiohttp.TCPConnector(limit=concurrency)
     
-    if not ytmusic_tracks:
-        print("[!] Nenhuma música encontrada no YouTube Music!")
+    async with aiohttp.ClientSession(connector=connector) as session:
+        sp = AsyncSpotify(session)
+        ytmusic = AsyncYTMusic(session)
+        
+        with profile_phase('ingest'):
+            tracks, (destination_id, destination) = await asyncio.gather(
+                async_read_source(sp, ytmusic, direction, playlist_id),
+                async_destination(sp, ytmusic, direction, playlist_name)
+            )
+        print(Colors.success(f"{len(tracks)} músicas na origem, {len(destination)} já no destino"))
+        
+        existing = {c['id'] for c in destination}
+        index = MatchIndex(destination)
+        not_found_store = load_not_found_store()
+        archive = candidate_archive()
+        pending = []
+        skipped = 0
+        for track in tracks:
+            if index.find(track, source_is_spotify=source_is_spotify):
+                skipped += 1
+            elif is_retry_due(not_found_store, direction, track):
+                pending.append(track)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        started = set()
+        
+        async def resolve(position, track):
+            async with semaphore:
+                started.add(position)
+                try:
+                    return position, track, await async_search(sp, ytmusic, direction, track), None
+                except (AsyncClientError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Sem resposta não quer dizer que a música não existe: fica fora da fila de não encontradas
+                    return position, track, None, str(e) or type(e).__name__
+        
+        EVENTS.emit('run_started', operacao=f"{direction}_assincrono", playlist=destination_id, total=len(pending))
+        matches = {}
+        not_found = []
+        failed = []
+        stopped = None
+        tasks = [asyncio.ensure_future(resolve(i, t)) for i, t in enumerate(pending)]
+        with profile_phase('resolve'):
+            for done_count, done in enumerate(asyncio.as_completed(tasks), 1):
+                if done_count % NOT_FOUND_SAVE_EVERY == 0:
+                    save_not_found_store(not_found_store)
+                try:
+                    position, track, match_id, error = await done
+                except asyncio.CancelledError:
+                    continue
+                except CallBudgetExceeded as e:
+                    # Cancela as buscas que ainda não começaram; as em voo já foram pagas e terminam
+                    if stopped is None:
+                        stopped = e
+                        for i, task in enumerate(tasks):
+                            if i not in started:
+                                task.cancel()
+                    continue
+                if error:
+                    failed.append(f"{track['name']} - {track['artist']}")
+                    EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'], status='erro', erro=error)
+                    continue
+                archive.record_decision(direction, track, destination_id, match_id)
+                if match_id:
+                    forget_not_found(not_found_store, direction, track)
+                    matches[position] = match_id
+                else:
+                    not_found.append(f"{track['name']} - {track['artist']}")
+                    record_not_found(not_found_store, direction, track, destination_id)
+                EVENTS.emit('track_resolved', nome=track['name'], artista=track['artist'],
+                            status='encontrada' if match_id else 'nao_encontrada', id=match_id)
+        
+        # As respostas chegam fora de ordem; a gravação segue a ordem da origem
+        new_ids = []
+        for position in sorted(matches):
+            if matches[position] not in existing:
+                existing.add(matches[position])
+                new_ids.append(matches[position])
+        
+        added = 0
+        batch_size = 50 if source_is_spotify else 100
+        with profile_phase('write'):
+            i = 0
+            while i < len(new_ids):
+                batch = new_ids[i:i + batch_size]
+                try:
+                    # Interrompida pelo orçamento: grava mesmo assim o que já foi resolvido
+                    with call_ledger().overdraft() if stopped else nullcontext():
+                        if source_is_spotify:
+                            await ytmusic.add_playlist_items(destination_id, batch)
+                        else:
+                            await sp.playlist_add_items(destination_id, batch)
+                    added += len(batch)
+                    EVENTS.emit('batch_written', playlist=destination_id, quantidade=len(batch))
+                except CallBudgetExceeded as e:
+                    stopped = e
+                    continue
+                except (AsyncClientError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    EVENTS.emit('batch_written', playlist=destination_id, quantidade=0, erro=str(e))
+                i += batch_size
+        
+        save_not_found_store(not_found_store)
+        archive.flush()
+        EVENTS.emit('run_finished', operacao=f"{direction}_assincrono", adicionadas=added, existentes=skipped,
+                    nao_encontradas=len(not_found), falhas=len(failed), interrompida=str(stopped) if stopped else None)
+        return {'total': len(tracks), 'adicionadas': added, 'existentes': skipped, 'nao_encontradas': not_found,
+                'falhas': failed, 'interrompida': stopped}
+
+def run_async_migration(direction: str, playlist_url: str, playlist_name: Optional[str] = None,
+                        concurrency: int = 0):
+    """Ponto de entrada síncrono do núcleo assíncrono."""
+    if aiohttp is None:
+        print(Colors.error("O núcleo assíncrono requer aiohttp: pip install aiohttp"))
         return
     
-    print(f"[+] {len(ytmusic_tracks)} músicas na playlist do YouTube Music")
+    if direction == "spotify_para_ytmusic":
+        playlist_id = playlist_url.split("/")[-1].split("?")[0]
+        playlist_name = playlist_name or "Migrada do Spotify"
+    else:
+        playlist_id = playlist_url.split('list=')[1].split('&')[0] if 'list=' in playlist_url else playlist_url
+        playlist_name = playlist_name or "Migrada do YouTube Music"
     
-    # Buscar músicas do Spotify
-    print("\n[*] Buscando músicas da playlist do Spotify...")
+    print_header(f"MIGRAÇÃO ASSÍNCRONA: {direction.replace('_para_', ' → ').upper()}")
+    call_ledger().reset()
+    concurrency = concurrency or ASYNC_MAX_IN_FLIGHT
     try:
-        results = sp.playlist_items(spotify_playlist_id, additional_types=['track'])
-        sp_tracks = []
+        result = asyncio.run(async_migrate(direction, playlist_id, playlist_name, concurrency))
+    except (AsyncClientError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(Colors.error(f"Migração assíncrona interrompida: {e or type(e).__name__}"))
+        return
+    
+    stopped = result['interrompida']
+    print_header("MIGRAÇÃO INTERROMPIDA" if stopped else "MIGRAÇÃO CONCLUÍDA")
+    processed = result['adicionadas'] + result['existentes'] + len(result['nao_encontradas'])
+    stats = {
+        f"{Colors.GREEN}✓ Músicas adicionadas{Colors.ENDC}": f"{Colors.GREEN}{result['adicionadas']}{Colors.ENDC}",
+        f"{Colors.YELLOW}⊙ Músicas já existentes{Colors.ENDC}": f"{Colors.YELLOW}{result['existentes']}{Colors.ENDC}",
+        f"{Colors.RED}✗ Não encontradas{Colors.ENDC}": f"{Colors.RED}{len(result['nao_encontradas'])}{Colors.ENDC}",
+        f"{Colors.CYAN}📊 Total processado{Colors.ENDC}": f"{Colors.CYAN}{processed}/{result['total']}{Colors.ENDC}",
+        f"{Colors.CYAN}⚡ Requisições simultâneas{Colors.ENDC}": f"{Colors.CYAN}até {concurrency}{Colors.ENDC}"
+    }
+    if result['falhas']:
+        stats[f"{Colors.YELLOW}⚠ Buscas com erro (tentadas de novo na próxima execução){Colors.ENDC}"] = \
+            f"{Colors.YELLOW}{len(result['falhas'])}{Colors.ENDC}"
+    if stopped:
+        stats[f"{Colors.RED}⛔ Interrompida{Colors.ENDC}"] = f"{Colors.RED}{stopped}{Colors.ENDC}"
+    stats.update(call_summary(f"{direction}_assincrono"))
+    print_stats_box(stats)
+    
+    if result['nao_encontradas']:
+        save_not_found(result['nao_encontradas'], direction)
+    if stopped:
+        raise stopped
+
+# ============================================================================
+# SERVIÇO MULTI-CONTA - FILA DE MIGRAÇÕES COM LIMITES POR CONTA
+# ============================================================================
+#
+# Estrutura esperada:
+#   contas/<nome>/.spotify_cache      token OAuth do Spotify da conta
+#   contas/<nome>/headers_auth.json   autenticação do YT Music da conta
+#   contas/<nome>/conta.json          opcional: {"spotify_rate": 5, "ytmusic_rate": 2}
+#
+# Fila (JSONL), um job por linha:
+#   {"id": "1", "conta": "ana", "tipo": "spotify_para_ytmusic", "playlist": "<url>", "nome": "Destino"}
+
+ACCOUNT_JOB_TYPES = ('spotify_para_ytmusic', 'ytmusic_para_spotify')
+
+class Account:
+    """Credenciais, clientes e limites de taxa de uma conta do serviço."""
+    
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
         
-        while results:
-            for item in results['items']:
-                track = item['track']
-                if track and track.get('name'):
-                    artists = [a['name'] for a in track.get('artists', []) if a and a.get('name')]
-                    if artists:
-                        sp_tracks.append({
-                            'uri': track['uri'],
-                            'name': track['name'],
-                            'artists': artists,
-                            'artist_str': ', '.join(artists),
-                            'added_at': item.get('added_at', '')
-                        })
-            
-            if results['next']:
-                results = sp.next(results)
-            else:
-                break
+        config = {}
+        config_file = os.path.join(path, 'conta.json')
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
         
-    except Exception as e:
-        print(f"[!] Erro ao carregar playlist do Spotify: {e}")
-        return
+        self.limiters = {
+            'spotify': RateLimiter(float(config.get('spotify_rate', SPOTIFY_RATE_PER_SEC))),
+            'ytmusic': RateLimiter(float(config.get('ytmusic_rate', YTMUSIC_RATE_PER_SEC)))
+        }
+        self.search_metrics = SearchMetrics()
+        self.call_ledger = CallLedger(int(config.get('orcamento_execucao', CALL_BUDGET_RUN)),
+                                      int(config.get('orcamento_musica', CALL_BUDGET_PER_TRACK)))
+        self._sp = None
+        self._ytmusic = None
     
-    if not sp_tracks:
-        print("[+] A playlist do Spotify está vazia!")
-        return
+    @property
+    def sp(self) -> Spotify:
+        if self._sp is None:
+            client = authenticate_spotify(need_write_access=True, cache_path=os.path.join(self.path, '.spotify_cache'))
+            self._sp = ThrottledClient(client, self.limiters['spotify'])
+        return self._sp
     
-    print(f"[+] {len(sp_tracks)} músicas na playlist do Spotify")
+    @property
+    def ytmusic(self) -> YTMusic:
+        if self._ytmusic is None:
+            client = authenticate_ytmusic(os.path.join(self.path, 'headers_auth.json'))
+            self._ytmusic = ThrottledClient(client, self.limiters['ytmusic'])
+        return self._ytmusic
+
+class ThreadRoutedOutput:
+    """stdout que envia a saída de cada job para o log da sua thread."""
     
-    # Proteção por data
-    print("\n" + "="*80)
-    print("CONFIGURAÇÃO DE PROTEÇÃO")
-    print("="*80)
-    protect_manual = input("\n[?] Proteger músicas adicionadas manualmente? (s/n): ").strip().lower() == 's'
+    def __init__(self, default):
+        self.default = default
     
-    cutoff_date = None
-    if protect_manual:
-        from datetime import datetime
-        print("\n[*] Digite a data da primeira migração automática:")
-        print("    Formato: DD/MM/AAAA (ex: 15/11/2025)")
-        date_str = input("[?] Data: ").strip()
-        
-        try:
-            cutoff_date = datetime.strptime(date_str, "%d/%m/%Y")
-            print(f"[+] Protegendo músicas adicionadas antes de {cutoff_date.strftime('%d/%m/%Y')}")
-        except:
-            print("[!] Data inválida! Continuando sem proteção...")
-            cutoff_date = None
+    def _target(self):
+        return getattr(_api_context, 'output', None) or self.default
     
-    debug_mode = input("\n[?] Ativar modo debug? (s/n): ").strip().lower() == 's'
+    def write(self, text):
+        return self._target().write(text)
     
-    # Analisar
-    print("\n" + "="*80)
-    print("ANALISANDO PLAYLIST...")
-    print("="*80 + "\n")
+    def flush(self):
+        self._target().flush()
     
-    tracks_to_remove = []
-    protected_tracks = []
+    def isatty(self):
+        return self._target().isatty()
     
-    for sp_track in sp_tracks:
-        sp_title = sp_track['name']
-        sp_artists = sp_track['artists']
-        
-        # Verificar proteção por data
-        is_protected = False
-        if cutoff_date and sp_track['added_at']:
-            from datetime import datetime
-            try:
-                added_date = datetime.fromisoformat(sp_track['added_at'].replace('Z', '+00:00'))
-                if added_date.replace(tzinfo=None) < cutoff_date:
-                    is_protected = True
-            except:
-                pass
-        
-        # Procurar match
-        found_match = False
-        best_match_info = {'title_ratio': 0, 'artist_ratio': 0, 'yt_title': '', 'yt_artist': ''}
-        
-        for yt_track in ytmusic_tracks:
-            yt_title = yt_track['name']
-            yt_artists = yt_track['all_artists']
-            
-            match, title_ratio, artist_ratio = is_match(
-                sp_title, sp_artists, yt_title, yt_artists
-            )
-            
-            if title_ratio > best_match_info['title_ratio']:
-                best_match_info = {
-                    'title_ratio': title_ratio,
-                    'artist_ratio': artist_ratio,
-                    'yt_title': yt_title,
-                    'yt_artist': yt_track['artist']
-                }
-            
-            if match:
-                found_match = True
-                break
-        
-        if not found_match:
-            if is_protected:
-                protected_tracks.append((sp_title, sp_track['artist_str']))
-                if debug_mode:
-                    print(f"[P] PROTEGIDA: {sp_title} - {sp_track['artist_str']}")
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+def load_accounts(accounts_dir: str) -> Dict[str, Account]:
+    """Carrega as contas (subpastas com .spotify_cache e/ou headers_auth.json)."""
+    accounts = {}
+    if not os.path.isdir(accounts_dir):
+        return accounts
+    
+    for name in sorted(os.listdir(accounts_dir)):
+        path = os.path.join(accounts_dir, name)
+        if os.path.isdir(path) and any(
+            os.path.exists(os.path.join(path, f)) for f in ('.spotify_cache', 'headers_auth.json')
+        ):
+            accounts[name] = Account(name, path)
+    
+    return accounts
+
+def load_jobs(queue_file: str) -> List[Dict]:
+    """Lê a fila de jobs (um JSON por linha)."""
+    jobs = []
+    with open(queue_file, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                job = json.loads(line)
+                job.setdefault('id', str(line_no))
+                jobs.append(job)
+    return jobs
+
+def run_account_job(account: Account, job: Dict) -> Dict:
+    """Executa um job com os clientes, limites e pasta de dados da conta."""
+    log_dir = os.path.join(account.path, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"job_{job['id']}_{int(time.time())}.log")
+    
+    start = time.time()
+    result = {'id': job['id'], 'conta': account.name, 'tipo': job.get('tipo'), 'log': log_file}
+    
+    with open(log_file, 'w', encoding='utf-8') as output:
+        _api_context.job = {'conta': account.name, 'id': job['id']}
+        _api_context.output = output
+        _api_context.data_dir = account.path
+        _api_context.rate_limited = True
+        _api_context.search_metrics = account.search_metrics
+        _api_context.call_ledger = account.call_ledger
+        try:
+            if job.get('tipo') == 'spotify_para_ytmusic':
+                migrate_spotify_to_ytmusic(account.sp, account.ytmusic, job['playlist'],
+                                           job.get('nome') or "Migrada do Spotify", job.get('prazo'))
+            elif job.get('tipo') == 'ytmusic_para_spotify':
+                migrate_ytmusic_to_spotify(account.sp, account.ytmusic, job['playlist'],
+                                           job.get('nome') or "Migrada do YouTube Music")
             else:
-                tracks_to_remove.append(sp_track)
-                if debug_mode:
-                    print(f"[-] REMOVER: {sp_title} - {sp_track['artist_str']}")
-                    print(f"    Melhor match: {best_match_info['yt_title']} - {best_match_info['yt_artist']}")
-                    print(f"    Título: {best_match_info['title_ratio']:.1f}% | Artista: {best_match_info['artist_ratio']:.1f}%")
-                    print()
-                else:
-                    print(f"[-] {sp_title} - {sp_track['artist_str']}")
+                raise ValueError(f"tipo de job desconhecido: {job.get('tipo')}")
+            result['status'] = 'ok'
+        except (Exception, SystemExit) as e:
+            result['status'] = 'erro'
+            result['erro'] = str(e) or type(e).__name__
+        finally:
+            _api_context.job = None
+            _api_context.output = None
+            _api_context.data_dir = None
+            _api_context.rate_limited = False
+            _api_context.search_metrics = None
+            _api_context.call_ledger = None
     
-    # Resumo e confirmação
-    print("\n" + "="*80)
-    print("RESUMO DA ANÁLISE")
-    print("="*80)
-    print(f"✓ Músicas corretas: {len(sp_tracks) - len(tracks_to_remove) - len(protected_tracks)}")
-    print(f"⊙ Músicas protegidas: {len(protected_tracks)}")
-    print(f"✗ Músicas a remover: {len(tracks_to_remove)}")
+    result['chamadas'] = account.call_ledger.snapshot()
+    result['duracao'] = round(time.time() - start, 1)
+    return result
+
+def run_worker_pool(accounts_dir: str, queue_file: str, concurrency: int = 0):
+    """Processa a fila distribuindo os jobs de forma justa (rodízio) entre as contas.
     
-    if not tracks_to_remove:
-        print("\n[+] Nenhuma música incorreta encontrada!")
+    Cada conta roda no máximo um job por vez, com seus próprios clientes e
+    limites de taxa; a concorrência global cresce com o número de contas.
+    """
+    print_header("SERVIÇO MULTI-CONTA")
+    
+    accounts = load_accounts(accounts_dir)
+    if not accounts:
+        print(Colors.error(f"Nenhuma conta encontrada em {accounts_dir}/"))
         return
     
-    print(f"\n[!] As seguintes {len(tracks_to_remove)} músicas serão REMOVIDAS:")
-    for i, track in enumerate(tracks_to_remove[:20], 1):
-        print(f"    {i}. {track['name']} - {track['artist_str']}")
-    if len(tracks_to_remove) > 20:
-        print(f"    ... e mais {len(tracks_to_remove) - 20} músicas")
+    results_file = f"{os.path.splitext(queue_file)[0]}_resultados.jsonl"
+    finished = set()
+    if os.path.exists(results_file):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            finished = {r['id'] for r in map(json.loads, filter(str.strip, f)) if r.get('status') == 'ok'}
     
-    confirm = input("\n[?] Confirma a remoção? (s/n): ").strip().lower()
+    queues = {name: deque() for name in accounts}
+    for job in load_jobs(queue_file):
+        if job['id'] in finished:
+            continue
+        if job.get('conta') in queues:
+            queues[job['conta']].append(job)
+        else:
+            print(Colors.error(f"Job {job['id']}: conta desconhecida '{job.get('conta')}'"))
     
-    if confirm == 's':
-        print("\n[*] Removendo músicas...")
-        try:
-            track_uris = [{'uri': t['uri']} for t in tracks_to_remove]
-            
-            # Remover em lotes de 100 (limite do Spotify)
-            batch_size = 100
-            for i in range(0, len(track_uris), batch_size):
-                batch = track_uris[i:i+batch_size]
-                sp.playlist_remove_all_occurrences_of_items(spotify_playlist_id, [t['uri'] for t in batch])
-                print(f"[+] Removidas {min(i+batch_size, len(track_uris))}/{len(track_uris)} músicas...")
-                time.sleep(0.5)
-            
-            print(f"\n[+] ✨ {len(tracks_to_remove)} músicas removidas com sucesso!")
-            
-        except Exception as e:
-            print(f"\n[!] ERRO: {e}")
-    else:
-        print("\n[!] Operação cancelada.")
+    pending = sum(len(q) for q in queues.values())
+    concurrency = concurrency or len(accounts)
+    print(Colors.info(f"{len(accounts)} contas, {pending} jobs pendentes, concorrência {concurrency}"))
+    
+    order = list(queues)
+    cursor = 0
+    running = {}
+    original_stdout = sys.stdout
+    sys.stdout = ThreadRoutedOutput(original_stdout)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+                open(results_file, 'a', encoding='utf-8') as results:
+            while running or any(queues.values()):
+                # Rodízio entre contas ociosas com jobs pendentes
+                busy = {name for name, _ in running.values()}
+                for _ in range(len(order)):
+                    if len(running) >= concurrency:
+                        break
+                    name = order[cursor % len(order)]
+                    cursor += 1
+                    if name in busy or not queues[name]:
+                        continue
+                    job = queues[name].popleft()
+                    running[executor.submit(run_account_job, accounts[name], job)] = (name, job)
+                    busy.add(name)
+                    print(Colors.info(f"[{name}] job {job['id']} iniciado ({job.get('tipo')})"))
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, job = running.pop(future)
+                    result = future.result()
+                    results.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    results.flush()
+                    
+                    if result['status'] == 'ok':
+                        print(Colors.success(f"[{name}] job {job['id']} concluído em {result['duracao']}s"))
+                    else:
+                        print(Colors.error(f"[{name}] job {job['id']} falhou: {result['erro']} (log: {result['log']})"))
+    finally:
+        sys.stdout = original_stdout
+    
+    print(Colors.success(f"Fila processada! Resultados em {results_file}"))
 
 # ============================================================================
 # MENU PRINCIPAL
@@ -1173,9 +5318,14 @@ def main():
     print(f"  {Colors.GREEN}2{Colors.ENDC} - {Colors.BOLD}Migrar:{Colors.ENDC} YouTube Music → Spotify")
     print(f"  {Colors.YELLOW}3{Colors.ENDC} - {Colors.BOLD}Limpar:{Colors.ENDC} Remover incorretas do YouTube Music")
     print(f"  {Colors.YELLOW}4{Colors.ENDC} - {Colors.BOLD}Limpar:{Colors.ENDC} Remover incorretas do Spotify")
-    print(f"  {Colors.RED}5{Colors.ENDC} - {Colors.BOLD}Sair{Colors.ENDC}")
+    print(f"  {Colors.YELLOW}5{Colors.ENDC} - {Colors.BOLD}Aplicar:{Colors.ENDC} Plano de limpeza salvo")
+    print(f"  {Colors.GREEN}6{Colors.ENDC} - {Colors.BOLD}Migrar biblioteca:{Colors.ENDC} Várias playlists Spotify → YouTube Music")
+    print(f"  {Colors.GREEN}7{Colors.ENDC} - {Colors.BOLD}Reprocessar:{Colors.ENDC} Músicas não encontradas (tentativas vencidas)")
+    print(f"  {Colors.GREEN}8{Colors.ENDC} - {Colors.BOLD}Sincronizar:{Colors.ENDC} Spotify ↔ YouTube Music (nos dois sentidos)")
+    print(f"  {Colors.YELLOW}9{Colors.ENDC} - {Colors.BOLD}Duplicadas:{Colors.ENDC} Remover versões repetidas de uma playlist")
+    print(f"  {Colors.RED}10{Colors.ENDC} - {Colors.BOLD}Sair{Colors.ENDC}")
     
-    choice = input(f"\n{Colors.CYAN}Escolha (1/2/3/4/5):{Colors.ENDC} ").strip()
+    choice = input(f"\n{Colors.CYAN}Escolha (1-10):{Colors.ENDC} ").strip()
     
     if choice == "1":
         # Spotify → YouTube Music
@@ -1226,11 +5376,170 @@ def main():
         
         clean_spotify_playlist(sp, ytmusic, spotify_id, ytmusic_url)
     
+    elif choice == "5":
+        # Aplicar plano de limpeza
+        print_section("Aplicar Plano de Limpeza")
+        plan_file = input(f"\n{Colors.CYAN}Arquivo do plano (plano_limpeza_*.json):{Colors.ENDC} ").strip()
+        plan = load_clean_plan(plan_file)
+        if not plan:
+            return
+        
+        summary = plan['summary']
+        print(Colors.info(f"Playlist: {plan['playlist_id']} ({PLATFORM_NAMES[plan['platform']]})"))
+        print(Colors.info(f"Plano criado em {plan['created_at']}: {summary['to_remove']} a remover, {summary['protected']} protegidas"))
+        
+        if plan['platform'] == 'ytmusic':
+            sp, ytmusic = None, authenticate_ytmusic()
+        else:
+            sp, ytmusic = authenticate_spotify(need_write_access=True), None
+        
+        confirm = input(f"\n{Colors.CYAN}Confirma a remoção? (s/n):{Colors.ENDC} ").strip().lower()
+        if confirm == 's':
+            apply_clean_plan(sp, ytmusic, plan, plan_file)
+        else:
+            print(Colors.warning("Operação cancelada."))
+    
+    elif choice == "6":
+        # Biblioteca Spotify → YouTube Music
+        sp = authenticate_spotify(need_write_access=True)
+        ytmusic = authenticate_ytmusic()
+        
+        print_section("Migração de Biblioteca")
+        print(f"\n{Colors.YELLOW}Cada música é buscada uma única vez, mesmo que esteja em várias playlists{Colors.ENDC}\n")
+        urls = input(f"{Colors.CYAN}URLs das playlists do Spotify (separadas por vírgula, vazio = biblioteca inteira):{Colors.ENDC} ").strip()
+        playlist_urls = [u.strip() for u in urls.split(',') if u.strip()]
+        
+        migrate_library_spotify_to_ytmusic(sp, ytmusic, playlist_urls or None)
+    
+    elif choice == "7":
+        # Reprocessar não encontradas
+        store = load_not_found_store()
+        due = due_not_found_entries(store)
+        print(Colors.info(f"{len(store['entries'])} músicas na fila, {len(due)} com tentativa vencida"))
+        if not due:
+            return
+        
+        directions = {entry['direction'] for _, entry in due}
+        sp = authenticate_spotify(need_write_access=True) if "ytmusic_para_spotify" in directions else None
+        ytmusic = authenticate_ytmusic()
+        
+        retry_not_found(sp, ytmusic, store)
+    
+    elif choice == "8":
+        # Sincronização bidirecional
+        sp = authenticate_spotify(need_write_access=True)
+        ytmusic = authenticate_ytmusic()
+        
+        print_section("Sincronização Bidirecional")
+        spotify_url = input(f"\n{Colors.CYAN}URL da playlist do Spotify:{Colors.ENDC} ").strip()
+        ytmusic_url = input(f"{Colors.CYAN}URL da playlist do YouTube Music:{Colors.ENDC} ").strip()
+        
+        spotify_id = spotify_url.split("/")[-1].split("?")[0]
+        if 'list=' in ytmusic_url:
+            ytmusic_id = ytmusic_url.split('list=')[1].split('&')[0]
+        else:
+            ytmusic_id = ytmusic_url.split('/')[-1].split('?')[0]
+        
+        sync_playlists(sp, ytmusic, spotify_id, ytmusic_id)
+    
+    elif choice == "9":
+        # Duplicadas em uma playlist
+        print_section("Duplicadas na Playlist")
+        url = input(f"\n{Colors.CYAN}URL da playlist (Spotify ou YouTube Music):{Colors.ENDC} ").strip()
+        
+        if 'list=' in url:
+            sp, ytmusic = None, authenticate_ytmusic()
+            dedupe_playlist(sp, ytmusic, 'ytmusic', url.split('list=')[1].split('&')[0])
+        else:
+            sp, ytmusic = authenticate_spotify(need_write_access=True), None
+            dedupe_playlist(sp, ytmusic, 'spotify', url.split("/")[-1].split("?")[0])
+    
     else:
         print(Colors.warning("Operação cancelada."))
         return
     
     print(f"\n{Colors.GREEN}{Colors.BOLD}✨ Processo finalizado!{Colors.ENDC}")
 
+def cli(argv: Optional[List[str]] = None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Migrador bidirecional de playlists Spotify ↔ YouTube Music")
+    parser.add_argument('--perfil', nargs='?', const='', metavar='PASTA',
+                        help="mede CPU e memória por fase e grava os relatórios em PASTA (padrão: perfil_<timestamp>)")
+    parser.add_argument('--saida', choices=('tty', 'nula'), default='tty',
+                        help="progresso por música: barra com vazão/ETA ('tty') ou nenhum ('nula')")
+    parser.add_argument('--eventos', metavar='ARQUIVO',
+                        help="grava todos os eventos da execução em ARQUIVO (JSONL)")
+    parser.add_argument('--coordenar', nargs='?', const='', default=RATE_COORDINATOR_DIR or None, metavar='PASTA',
+                        help="divide o limite de taxa com outros processos pelos baldes em PASTA (padrão: pasta temporária)")
+    parser.add_argument('--prazo', type=float, metavar='MINUTOS',
+                        help="migrações Spotify → YT Music com prazo: mais baratas primeiro, resto para a próxima execução")
+    parser.add_argument('--mapeamentos', default=MAPPING_STORE_URL or None, metavar='URL',
+                        help="consulta o serviço de mapeamentos em URL antes de cada busca (ex.: http://127.0.0.1:8765)")
+    commands = parser.add_subparsers(dest='comando')
+    
+    service = commands.add_parser('servico', help="processa uma fila de migrações de várias contas")
+    service.add_argument('--contas', default='contas', help="pasta com uma subpasta de credenciais por conta")
+    service.add_argument('--fila', default='fila.jsonl', help="arquivo JSONL com os jobs")
+    service.add_argument('--concorrencia', type=int, default=0, help="jobs simultâneos (padrão: número de contas)")
+    
+    reresolve = commands.add_parser('reresolver', help="re-pontua os candidatos arquivados com novas regras, sem buscas")
+    reresolve.add_argument('--arquivo', default=CANDIDATE_ARCHIVE, help="arquivo de candidatos (padrão: %(default)s)")
+    reresolve.add_argument('--regras', type=parse_match_rules, help="critérios título:artista, ex.: 95:40,85:50,75:60")
+    reresolve.add_argument('--peso-titulo', type=float, help="peso do título no score (ex.: 0.7)")
+    reresolve.add_argument('--aplicar', action='store_true', help="aplica as mudanças nas playlists de destino")
+    
+    async_run = commands.add_parser('assincrono', help="migra uma playlist com o núcleo assíncrono (requer aiohttp)")
+    async_run.add_argument('direcao', choices=ACCOUNT_JOB_TYPES)
+    async_run.add_argument('playlist', help="URL da playlist de origem")
+    async_run.add_argument('--nome', help="nome da playlist de destino (reaproveitada se já existir)")
+    async_run.add_argument('--concorrencia', type=int, default=0,
+                           help="requisições simultâneas (padrão: ASYNC_MAX_IN_FLIGHT)")
+    
+    mappings = commands.add_parser('mapeamentos', help="serviço local de mapeamentos compartilhado entre workers")
+    mappings.add_argument('acao', choices=('servir', 'exportar', 'importar'))
+    mappings.add_argument('arquivo', nargs='?', help="JSONL de entrada/saída (exportar/importar)")
+    mappings.add_argument('--banco', default=MAPPING_STORE_DB, help="banco SQLite do serviço (padrão: %(default)s)")
+    mappings.add_argument('--porta', type=int, default=8765, help="porta do serviço (padrão: %(default)s)")
+    
+    args = parser.parse_args(argv)
+    
+    if args.perfil is not None:
+        enable_profiling(args.perfil or None)
+    
+    if args.coordenar is not None:
+        enable_rate_coordinator(args.coordenar or None)
+    
+    if args.mapeamentos:
+        enable_mapping_store(args.mapeamentos)
+    
+    if args.prazo is not None:
+        set_migration_deadline(args.prazo)
+    
+    configure_events(args.saida, args.eventos)
+    
+    try:
+        if args.comando == 'mapeamentos':
+            if args.acao == 'servir':
+                serve_mapping_store(args.banco, port=args.porta)
+            elif not args.arquivo:
+                parser.error("informe o arquivo JSONL")
+            else:
+                run_mapping_transfer(args.mapeamentos or f"http://127.0.0.1:{args.porta}", args.acao, args.arquivo)
+        elif args.comando == 'assincrono':
+            run_async_migration(args.direcao, args.playlist, args.nome, args.concorrencia)
+        elif args.comando == 'servico':
+            run_worker_pool(args.contas, args.fila, args.concorrencia)
+        elif args.comando == 'reresolver':
+            set_match_rules(args.regras, args.peso_titulo)
+            run_reresolution(args.arquivo, args.aplicar)
+        else:
+            main()
+    except CallBudgetExceeded as e:
+        print(Colors.error(f"Execução interrompida: {e}"))
+    finally:
+        EVENTS.close()
+        if PROFILER is not None:
+            print(Colors.info(f"Relatórios de perfil salvos em: {PROFILER.write_reports()}"))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
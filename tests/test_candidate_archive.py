@@ -0,0 +1,54 @@
+"""Um arquivo de candidatos cortado no meio vale até o último registro inteiro."""
+import gzip
+import json
+
+import migrate
+
+TRACK = {'name': 'Hello', 'artist': 'Adele', 'all_artists': ['Adele'], 'album': '25', 'duration': 295}
+
+
+def write_archive(path, playlists):
+    archive = migrate.CandidateArchive(str(path))
+    for playlist_id in playlists:
+        archive.record_decision("spotify_para_ytmusic", TRACK, playlist_id, f"v{playlist_id}")
+        archive.flush()
+
+
+def decided_playlists(path):
+    _, decisions = migrate.load_candidate_archive(str(path))
+    return sorted(playlist for _, _, playlist in decisions)
+
+
+def test_reads_every_member(tmp_path):
+    path = tmp_path / "candidatos.jsonl.gz"
+    write_archive(path, ["P1", "P2", "P3"])
+    assert decided_playlists(path) == ["P1", "P2", "P3"]
+
+
+def test_truncated_last_member_keeps_earlier_records(tmp_path, capsys):
+    path = tmp_path / "candidatos.jsonl.gz"
+    write_archive(path, ["P1", "P2"])
+    size = path.stat().st_size
+    write_archive(path, ["P3"])
+    data = path.read_bytes()
+    for cut in (size + 5, size + 15):
+        path.write_bytes(data[:cut])
+        assert decided_playlists(path) == ["P1", "P2"]
+        assert "cortado" in capsys.readouterr().out
+
+
+def test_unreadable_line_is_skipped(tmp_path, capsys):
+    path = tmp_path / "candidatos.jsonl.gz"
+    write_archive(path, ["P1"])
+    with gzip.open(path, 'at', encoding='utf-8') as f:
+        f.write('{"tipo": "decisao", "dire\n')
+    write_archive(path, ["P2"])
+    assert decided_playlists(path) == ["P1", "P2"]
+    assert "1 linhas ilegíveis" in capsys.readouterr().out
+
+
+def test_flush_appends_complete_lines(tmp_path):
+    path = tmp_path / "candidatos.jsonl.gz"
+    write_archive(path, ["P1", "P2"])
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line)['playlist'] for line in f] == ["P1", "P2"]
@@ -0,0 +1,49 @@
+"""Chaves Unicode do matching: acentos latinos caem, letras de outros alfabetos ficam."""
+import pytest
+
+import migrate
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Canção", "cancao"),
+    ("Ñandú", "nandu"),
+    ("ＡＢＣ", "abc"),
+    ("Ἀθῆναι", "αθηναι"),
+])
+def test_fold_text_strips_latin_and_greek_accents(text, expected):
+    assert migrate.fold_text(text) == expected
+
+
+@pytest.mark.parametrize("text", ["\u0301abc", "\u0301", "\u0301\u0308Ação"])
+def test_fold_text_drops_leading_marks(text):
+    folded = migrate.fold_text(text)
+    assert not any(migrate.unicodedata.combining(c) for c in folded)
+    assert folded == migrate.fold_text(text.lstrip("\u0301\u0308"))
+
+
+@pytest.mark.parametrize("kept, plain", [
+    ("が", "か"),
+    ("パ", "ハ"),
+    ("Й", "И"),
+    ("방탄소년단", "방탄소년"),
+])
+def test_fold_text_keeps_marks_of_other_scripts(kept, plain):
+    assert migrate.fold_text(kept) != migrate.fold_text(plain)
+    assert migrate.fold_text(kept) == migrate.unicodedata.normalize('NFC', kept).casefold()
+
+
+@pytest.mark.parametrize("alias, canonical", [
+    ("방탄소년단", "BTS"),
+    ("Bangtan Boys", "BTS"),
+    ("The Bangtan Boys", "BTS"),
+    ("Benito Antonio Martinez Ocasio", "Bad Bunny"),
+    ("블랙핑크", "BLACKPINK"),
+])
+def test_artist_aliases_resolve_to_canonical(alias, canonical):
+    assert migrate.normalize_artist(alias) == migrate.normalize_artist(canonical)
+    assert migrate.query_artist(alias) == canonical
+
+
+def test_unknown_artist_keeps_its_own_key():
+    assert migrate.normalize_artist("Zé Ramalho") == "ze ramalho"
+    assert migrate.query_artist("Zé Ramalho") == "Zé Ramalho"
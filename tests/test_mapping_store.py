@@ -0,0 +1,59 @@
+"""Um acerto só pela chave título|artista precisa ser da mesma gravação."""
+import sqlite3
+
+import pytest
+
+import migrate
+
+DIRECTION = "spotify_para_ytmusic"
+STUDIO = {'uri': 'spotify:track:a', 'name': 'Hello', 'all_artists': ['Adele'], 'duration': 295,
+          'isrc': 'GBAAA1500001'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = migrate.MappingStore(str(tmp_path / "mapeamentos.db"))
+    store.put_many(DIRECTION, [dict(migrate.mapping_keys(STUDIO), id='vStudio')])
+    return store
+
+
+def lookup(store, track, direction=DIRECTION):
+    return store.get_many(direction, [migrate.mapping_keys(track)], claim=False)[0]
+
+
+def test_same_source_id_or_isrc_hits(store):
+    assert lookup(store, STUDIO)['id'] == 'vStudio'
+    assert lookup(store, dict(STUDIO, uri='spotify:track:x', duration=None))['id'] == 'vStudio'
+
+
+def test_key_hit_needs_close_duration(store):
+    near = {'uri': 'spotify:track:c', 'name': 'Hello', 'all_artists': ['Adele'], 'duration': 300}
+    assert lookup(store, near)['id'] == 'vStudio'
+    assert lookup(store, dict(near, duration=380))['status'] == 'ausente'   # ao vivo
+    assert lookup(store, dict(near, duration=None))['status'] == 'ausente'
+
+
+def test_key_hit_with_different_isrc_misses(store):
+    remaster = {'uri': 'spotify:track:r', 'name': 'Hello', 'all_artists': ['Adele'], 'duration': 296,
+                'isrc': 'GBAAA2100042'}
+    assert lookup(store, remaster)['status'] == 'ausente'
+
+
+def test_key_hit_in_reverse_direction(store):
+    video = {'videoId': 'vOther', 'name': 'Hello', 'all_artists': ['Adele'], 'duration': 296}
+    assert lookup(store, video, "ytmusic_para_spotify")['id'] == STUDIO['uri']
+
+
+def test_old_database_gets_duration_column(tmp_path):
+    path = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE mapeamentos (spotify_uri TEXT NOT NULL, video_id TEXT NOT NULL, "
+                 "isrc TEXT, chave TEXT, atualizado REAL, PRIMARY KEY (spotify_uri, video_id))")
+    conn.execute("INSERT INTO mapeamentos VALUES ('spotify:track:z', 'vz', NULL, 'hello|adele', 1)")
+    conn.commit()
+    conn.close()
+
+    store = migrate.MappingStore(path)
+    assert lookup(store, dict(STUDIO, uri='spotify:track:y', isrc=None))['status'] == 'ausente'
+    store.import_rows([{'spotify_uri': 'spotify:track:y', 'video_id': 'vy', 'chave': 'k', 'duracao': 10}])
+    assert {r['video_id']: r['duracao'] for r in store.export_rows()} == {'vz': None, 'vy': 10}
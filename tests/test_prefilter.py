@@ -0,0 +1,106 @@
+"""O pré-filtro (limites superiores) nunca pode mudar uma decisão de matching."""
+import random
+import string
+
+import pytest
+from fuzzywuzzy import fuzz
+
+import migrate
+
+ALPHABET = string.ascii_lowercase[:8] + "  éç()-"
+RULE_SETS = [
+    ((95, 40), (85, 50), (75, 60)),
+    ((60, 0),),
+    ((90, 90), (50, 100)),
+]
+
+
+def random_text(rng: random.Random, max_len: int = 14) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_len)))
+
+
+def random_artists(rng: random.Random):
+    return [random_text(rng, 8) for _ in range(rng.randint(0, 3))]
+
+
+@pytest.fixture(params=RULE_SETS)
+def rules(request):
+    saved = migrate.MATCH_RULES
+    migrate.set_match_rules(request.param)
+    yield request.param
+    migrate.MATCH_RULES = saved
+
+
+def test_upper_bound_never_below_ratio():
+    rng = random.Random(27)
+    for _ in range(20000):
+        a, b = random_text(rng, 30), random_text(rng, 30)
+        assert fuzz.ratio(a, b) <= migrate.ratio_upper_bound(a, b), (a, b)
+
+
+@pytest.mark.parametrize("len_a,len_b", [(43, 53), (1, 2), (2, 3), (7, 9), (33, 34), (0, 5), (0, 0)])
+def test_upper_bound_rounding_edges(len_a, len_b):
+    # Mesmo conjunto de caracteres: o limite depende só dos tamanhos e precisa cobrir o arredondamento
+    a, b = "a" * len_a, "a" * len_b
+    assert fuzz.ratio(a, b) <= migrate.ratio_upper_bound(a, b)
+
+
+def test_is_match_prefilter_is_exact(rules):
+    rng = random.Random(1027)
+    for _ in range(5000):
+        sp_title, yt_title = random_text(rng), random_text(rng)
+        if rng.random() < 0.3:
+            yt_title = sp_title[:-1] if sp_title else yt_title
+        sp_artists = random_artists(rng)
+        yt_artists = sp_artists[:] if rng.random() < 0.5 else random_artists(rng)
+        
+        filtered = migrate.is_match(sp_title, sp_artists, yt_title, yt_artists, prefilter=True)
+        full = migrate.is_match(sp_title, sp_artists, yt_title, yt_artists, prefilter=False)
+        assert filtered[0] == full[0], (sp_title, sp_artists, yt_title, yt_artists)
+        if filtered[0]:
+            assert filtered == full
+
+
+def test_is_match_empty_inputs(rules):
+    for args in [("", [], "", []), ("", ["a"], "", ["a"]), ("abc", [], "abc", []), ("abc", [""], "abc", [""])]:
+        assert migrate.is_match(*args, prefilter=True)[0] == migrate.is_match(*args, prefilter=False)[0]
+
+
+def brute_force_reference_match(title, artists, reference_tracks, reference_is_source):
+    """Mesma semântica de find_reference_match, sem poda."""
+    best_index, best_title_ratio, best_artist_ratio = None, 0, 0
+    for index, ref in enumerate(reference_tracks):
+        if reference_is_source:
+            args = (ref['name'], ref['all_artists'], title, artists)
+        else:
+            args = (title, artists, ref['name'], ref['all_artists'])
+        match, title_ratio, artist_ratio = migrate.is_match(*args, prefilter=False)
+        if title_ratio > best_title_ratio:
+            best_index, best_title_ratio, best_artist_ratio = index, title_ratio, artist_ratio
+        if match:
+            return True, best_index, best_title_ratio, best_artist_ratio
+    return False, best_index, best_title_ratio, best_artist_ratio
+
+
+@pytest.mark.parametrize("reference_is_source", [True, False])
+def test_find_reference_match_equals_brute_force(rules, reference_is_source):
+    rng = random.Random(2027)
+    for _ in range(400):
+        reference = [{'name': random_text(rng), 'all_artists': random_artists(rng)} for _ in range(rng.randint(0, 25))]
+        if reference and rng.random() < 0.5:
+            picked = rng.choice(reference)
+            title, artists = picked['name'] + rng.choice(["", "a", " (x)"]), picked['all_artists']
+        else:
+            title, artists = random_text(rng), random_artists(rng)
+        
+        assert migrate.find_reference_match(title, artists, reference, reference_is_source) == \
+            brute_force_reference_match(title, artists, reference, reference_is_source)
+
+
+@pytest.mark.parametrize("len_a,len_b", [(43, 53), (9, 11), (44, 54)])
+def test_duplicate_groups_length_break_respects_rounding(len_a, len_b):
+    # O corte por tamanho não pode descartar um par que fuzz.ratio (arredondado) aceitaria
+    a, b = "a" * len_a, "a" * len_b
+    entries = [{'title': a, 'artists': ['x']}, {'title': b, 'artists': ['x']}]
+    expected = [[0, 1]] if fuzz.ratio(a, b) >= migrate.DUPLICATE_TITLE_RATIO else []
+    assert migrate.find_duplicate_groups(entries) == expected